@@ -0,0 +1,211 @@
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.core.task_executor import MAX_CONCURRENT_TASKS, STAGE_CONCURRENCY
+from app.enmus.task_stage_enums import TaskStage
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 未完成任务数上限，超过后拒绝新任务（0 表示不限制）
+ADMISSION_MAX_QUEUE_DEPTH = int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", 20))
+# 预计排队等待时间上限（秒），超过后拒绝新任务（0 表示不限制）
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", 3600))
+# EWMA 平滑系数，越大越偏向最近的观测值
+ADMISSION_EWMA_ALPHA = float(os.getenv("ADMISSION_EWMA_ALPHA", 0.2))
+
+# 尚无观测数据时使用的先验值
+DEFAULT_AUDIO_DURATION = float(os.getenv("ADMISSION_DEFAULT_AUDIO_DURATION", 600))
+DEFAULT_DOWNLOAD_SECONDS = float(os.getenv("ADMISSION_DEFAULT_DOWNLOAD_SECONDS", 30))
+DEFAULT_ASR_RTF = float(os.getenv("ADMISSION_DEFAULT_ASR_RTF", 0.3))
+DEFAULT_SUMMARIZE_SECONDS = float(os.getenv("ADMISSION_DEFAULT_SUMMARIZE_SECONDS", 60))
+DEFAULT_SCREENSHOT_SECONDS = float(os.getenv("ADMISSION_DEFAULT_SCREENSHOT_SECONDS", 10))
+
+
+class _Ewma:
+    def __init__(self, initial: float, alpha: float):
+        self.value = initial
+        self.alpha = alpha
+        self.samples = 0
+
+    def observe(self, sample: float):
+        if self.samples == 0:
+            self.value = sample
+        else:
+            self.value = self.alpha * sample + (1 - self.alpha) * self.value
+        self.samples += 1
+
+
+@dataclass
+class AdmissionDecision:
+    admitted: bool
+    outstanding: int
+    wait_seconds: float
+    eta_seconds: float
+    retry_after: Optional[int] = None
+    reason: Optional[str] = None
+
+    @property
+    def estimated_completion(self) -> float:
+        return time.time() + self.eta_seconds
+
+
+class AdmissionController:
+    """
+    基于排队深度与各阶段服务时间（EWMA）的准入控制：
+    - 单个任务耗时 ≈ 下载 + 音频时长 × ASR 实时率 + LLM 耗时 + 截图
+    - 排队等待 ≈ 未完成任务数 ÷ 瓶颈阶段吞吐量（阶段并发数 ÷ 阶段耗时）
+    超过排队深度或等待时间上限时拒绝，并给出建议的重试时间
+    """
+
+    def __init__(self, outstanding_fn: Callable[[], int],
+                 max_queue_depth: int = ADMISSION_MAX_QUEUE_DEPTH,
+                 max_wait_seconds: float = ADMISSION_MAX_WAIT_SECONDS,
+                 alpha: float = ADMISSION_EWMA_ALPHA):
+        self._outstanding_fn = outstanding_fn
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = threading.Lock()
+        self._audio_duration = _Ewma(DEFAULT_AUDIO_DURATION, alpha)
+        self._asr_rtf = _Ewma(DEFAULT_ASR_RTF, alpha)
+        self._stage_seconds: Dict[TaskStage, _Ewma] = {
+            TaskStage.DOWNLOAD: _Ewma(DEFAULT_DOWNLOAD_SECONDS, alpha),
+            TaskStage.SUMMARIZE: _Ewma(DEFAULT_SUMMARIZE_SECONDS, alpha),
+            TaskStage.SCREENSHOT: _Ewma(DEFAULT_SCREENSHOT_SECONDS, alpha),
+        }
+        self.admitted = 0
+        self.rejected = 0
+
+    # ---------------- 观测 ----------------
+
+    def observe_stage(self, stage: TaskStage, seconds: float, audio_duration: Optional[float] = None):
+        """
+        记录一次阶段实际执行耗时（缓存命中/合并复用的不计入）
+
+        :param audio_duration: 转写阶段需传入音频时长，用于计算实时率
+        """
+        with self._lock:
+            if stage == TaskStage.TRANSCRIBE:
+                if audio_duration and audio_duration > 0:
+                    self._asr_rtf.observe(seconds / audio_duration)
+                    self._audio_duration.observe(audio_duration)
+                return
+            ewma = self._stage_seconds.get(stage)
+            if ewma is not None:
+                ewma.observe(seconds)
+
+    # ---------------- 估算 ----------------
+
+    def _stage_costs(self, audio_duration: Optional[float]) -> Dict[TaskStage, float]:
+        duration = audio_duration or self._audio_duration.value
+        return {
+            TaskStage.DOWNLOAD: self._stage_seconds[TaskStage.DOWNLOAD].value,
+            TaskStage.TRANSCRIBE: duration * self._asr_rtf.value,
+            TaskStage.SUMMARIZE: self._stage_seconds[TaskStage.SUMMARIZE].value,
+            TaskStage.SCREENSHOT: self._stage_seconds[TaskStage.SCREENSHOT].value,
+        }
+
+    def _throughput(self, costs: Dict[TaskStage, float]) -> float:
+        """
+        每秒可完成的任务数，取各阶段吞吐与整体工作线程吞吐中的最小值
+        """
+        rates = [MAX_CONCURRENT_TASKS / max(sum(costs.values()), 1e-6)]
+        for stage, cost in costs.items():
+            rates.append(STAGE_CONCURRENCY.get(stage, 1) / max(cost, 1e-6))
+        return min(rates)
+
+    def job_seconds(self, audio_duration: Optional[float] = None) -> float:
+        """
+        单个任务的预计执行耗时（不含排队），音频时长未知时按近期平均时长估算
+        """
+        with self._lock:
+            return sum(self._stage_costs(audio_duration).values())
+
+    def estimate(self, audio_duration: Optional[float] = None) -> AdmissionDecision:
+        outstanding = self._outstanding_fn()
+        with self._lock:
+            costs = self._stage_costs(audio_duration)
+            # 排队中的任务按平均时长估算，新任务本身按传入时长估算
+            throughput = self._throughput(self._stage_costs(None))
+        wait = outstanding / throughput
+        eta = wait + sum(costs.values())
+        return AdmissionDecision(admitted=True, outstanding=outstanding, wait_seconds=wait, eta_seconds=eta)
+
+    def admit(self, audio_duration: Optional[float] = None) -> AdmissionDecision:
+        """
+        判断是否接受新任务；被拒绝时计入 rejected，接受的任务在 confirm 确认提交后才计入 admitted
+        （之后仍可能因时长超限等原因被拒绝）
+        """
+        decision = self.estimate(audio_duration)
+        reason = None
+        excess_jobs = 0.0
+        if self.max_queue_depth and decision.outstanding >= self.max_queue_depth:
+            reason = f"排队任务过多（{decision.outstanding}/{self.max_queue_depth}）"
+            excess_jobs = decision.outstanding - self.max_queue_depth + 1
+        elif self.max_wait_seconds and decision.wait_seconds > self.max_wait_seconds:
+            reason = f"预计等待时间过长（约 {int(decision.wait_seconds)} 秒）"
+
+        if reason is None:
+            return decision
+
+        # 建议在积压降到阈值以下后重试
+        if excess_jobs:
+            retry_after = excess_jobs * decision.wait_seconds / max(decision.outstanding, 1)
+        else:
+            retry_after = decision.wait_seconds - self.max_wait_seconds
+        decision.admitted = False
+        decision.reason = reason
+        decision.retry_after = max(1, int(math.ceil(retry_after)))
+        with self._lock:
+            self.rejected += 1
+        logger.warning(f"拒绝新任务：{reason}，建议 {decision.retry_after}s 后重试")
+        return decision
+
+    def confirm(self, decision: AdmissionDecision, audio_duration: Optional[float]) -> AdmissionDecision:
+        """
+        已准入的任务通过时长检查、确定提交时调用：计入 admitted，
+        并按探测到的实际时长更新预计完成时间（排队等待与时长无关，沿用准入时的估算）
+        """
+        with self._lock:
+            self.admitted += 1
+        if audio_duration:
+            decision.eta_seconds = decision.wait_seconds + self.job_seconds(audio_duration)
+        return decision
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_queue_depth": self.max_queue_depth,
+                "max_wait_seconds": self.max_wait_seconds,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "audio_duration": self._audio_duration.value,
+                "asr_rtf": self._asr_rtf.value,
+                "asr_samples": self._asr_rtf.samples,
+                "stage_seconds": {
+                    stage.value: {"value": ewma.value, "samples": ewma.samples}
+                    for stage, ewma in self._stage_seconds.items()
+                },
+            }
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                from app.db.note_job_dao import count_unfinished_note_jobs
+                # 以数据库中未完成任务数作为积压，本进程执行或 Celery worker 执行均适用
+                _controller = AdmissionController(outstanding_fn=count_unfinished_note_jobs)
+    return _controller
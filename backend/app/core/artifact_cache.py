@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+from app.utils.path_helper import get_app_dir
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 跨任务共享的产物缓存目录（音频元信息、转写结果等）
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR") or get_app_dir("artifact_cache")
+# 是否启用跨任务缓存
+ARTIFACT_CACHE_ENABLED = os.getenv("ARTIFACT_CACHE_ENABLED", "true").lower() == "true"
+
+_digest_lock = threading.Lock()
+_digest_memo: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    计算文件内容的 sha256，结果按 (路径, 大小, 修改时间) 缓存，同一文件不会重复读取
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        digest = _digest_memo.get(memo_key)
+    if digest:
+        return digest
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+class ArtifactCache:
+    """
+    内容寻址的产物缓存：按 (类别, 键) 的哈希存放 JSON，所有任务共享。
+    - 音频：键为 (平台, 规范化视频 ID, 下载质量, 是否需要视频)
+    - 转写：键为 (音频内容哈希, 转写器类型, 模型大小, 语言)
+    写入先落到同目录的临时文件再 os.replace，多个任务并发写同一键时读者只会看到完整的某一份。
+    """
+
+    def __init__(self, root: str = ARTIFACT_CACHE_DIR, enabled: bool = ARTIFACT_CACHE_ENABLED):
+        self.root = Path(root)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        raw = json.dumps([str(p) for p in parts], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, kind: str, key: str) -> Path:
+        return self.root / kind / key[:2] / f"{key}.json"
+
+    def get(self, kind: str, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        path = self.path_for(kind, key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self._count(kind, "misses")
+            return None
+        except Exception as e:
+            logger.warning(f"读取产物缓存失败，忽略该缓存 ({path})：{e}")
+            self._count(kind, "misses")
+            return None
+        self._count(kind, "hits")
+        return data
+
+    def put(self, kind: str, key: str, value: dict) -> None:
+        if not self.enabled:
+            return
+        path = self.path_for(kind, key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._count(kind, "writes")
+        except Exception as e:
+            logger.warning(f"写入产物缓存失败 ({path})：{e}")
+
+    def invalidate(self, kind: str, key: str) -> None:
+        try:
+            self.path_for(kind, key).unlink()
+            self._count(kind, "invalidations")
+        except FileNotFoundError:
+            pass
+
+    def _count(self, kind: str, name: str):
+        with self._lock:
+            counters = self._stats.setdefault(kind, {"hits": 0, "misses": 0, "writes": 0, "invalidations": 0})
+            counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"enabled": self.enabled, "root": str(self.root),
+                    **{kind: dict(counters) for kind, counters in self._stats.items()}}
+
+
+_cache: Optional[ArtifactCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ArtifactCache()
+    return _cache
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.core.cancellation import get_token, record_stopped, release_token
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# asyncio 模式下同时执行的任务数（协程很轻，可以远大于线程池模式的 MAX_CONCURRENT_TASKS）
+ASYNC_MAX_CONCURRENT_TASKS = int(os.getenv("ASYNC_MAX_CONCURRENT_TASKS", 200))
+# asyncio.to_thread 使用的线程数，用于本地转写、ffmpeg、文件与数据库操作
+ASYNC_OFFLOAD_WORKERS = int(os.getenv("ASYNC_OFFLOAD_WORKERS", 16))
+
+
+class AsyncTaskRunner:
+    """
+    在独立线程中运行一个事件循环，笔记任务以协程形式在其中并发执行：
+    - 等待网络的任务不占用线程，线程池只承担 to_thread 交出的 CPU/阻塞操作
+    - 同时执行的任务数受 max_concurrent 限制，超出部分在事件循环内排队
+    - 任务被取消时通过 call_soon_threadsafe 取消对应的 asyncio.Task
+    """
+
+    def __init__(self, max_concurrent: int = ASYNC_MAX_CONCURRENT_TASKS,
+                 offload_workers: int = ASYNC_OFFLOAD_WORKERS):
+        self.max_concurrent = max(1, max_concurrent)
+        self.offload_workers = max(1, offload_workers)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+        self._running: Dict[str, float] = {}
+        self._waiting = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._shutdown = False
+
+    # ---------------- 任务提交 ----------------
+
+    def submit(self, task_id: str, coro_fn: Callable, *args, **kwargs) -> Future:
+        """
+        提交一个任务，coro_fn(*args, **kwargs) 需返回协程
+
+        :return: concurrent.futures.Future，可在其他线程中等待结果
+        """
+        if self._shutdown:
+            raise RuntimeError("任务执行器已关闭")
+        self._ensure_loop()
+        with self._lock:
+            self._submitted += 1
+        logger.info(f"任务提交到事件循环 (task_id={task_id})")
+        return asyncio.run_coroutine_threadsafe(self._run(task_id, coro_fn, *args, **kwargs), self._loop)
+
+    async def _run(self, task_id: str, coro_fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        waiting = True
+        with self._lock:
+            self._waiting += 1
+        try:
+            with get_token(task_id).on_cancel(lambda: loop.call_soon_threadsafe(task.cancel)):
+                async with self._semaphore:
+                    with self._lock:
+                        self._waiting -= 1
+                        waiting = False
+                        self._running[task_id] = time.time()
+                    result = await coro_fn(*args, **kwargs)
+            with self._lock:
+                self._completed += 1
+            return result
+        except asyncio.CancelledError:
+            logger.info(f"任务协程已取消 (task_id={task_id})")
+            with self._lock:
+                self._failed += 1
+            if waiting:
+                # 排队期间被取消，协程未开始执行，由这里完成它本该做的清理（记录停止耗时并移除取消标记）
+                record_stopped(task_id)
+                release_token(task_id)
+            raise
+        except Exception as e:
+            logger.error(f"任务执行异常 (task_id={task_id})：{e}", exc_info=True)
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                if waiting:
+                    self._waiting -= 1
+                self._running.pop(task_id, None)
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop_main, name="note-async-loop", daemon=True)
+            self._thread.start()
+        self._started.wait()
+
+    def _loop_main(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.offload_workers,
+                                                     thread_name_prefix="note-offload"))
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        logger.info(f"asyncio 任务执行器启动，并发上限：{self.max_concurrent}，卸载线程数：{self.offload_workers}")
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    # ---------------- 状态 ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = list(self._running.keys())
+            return {
+                "max_concurrent": self.max_concurrent,
+                "offload_workers": self.offload_workers,
+                "queue_depth": self._waiting,
+                "in_flight": len(running),
+                "running_tasks": running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+    def shutdown(self):
+        self._shutdown = True
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_runner: Optional[AsyncTaskRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_async_runner() -> AsyncTaskRunner:
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = AsyncTaskRunner()
+    return _runner
@@ -0,0 +1,244 @@
+import contextvars
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from app.exceptions.task import TaskCancelledError
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ffmpeg 等子进程收到 terminate 后的最长等待时间，超时则 kill
+PROCESS_TERMINATE_TIMEOUT = 2
+
+
+class CancelToken:
+    """
+    单个任务的取消标记：
+    - cancel() 置位标记，并立即执行已注册的回调（终止子进程、关闭 LLM 流等）
+    - 执行中的代码在循环/阶段边界调用 raise_if_cancelled() 主动退出
+    """
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.requested_at: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.requested_at = time.time()
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"执行取消回调失败 (task_id={self.task_id})：{e}")
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise TaskCancelledError(self.task_id)
+
+    def wait(self, timeout: float) -> bool:
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]):
+        """
+        在 with 块内注册取消回调；若进入时已被取消则立即执行回调
+        """
+        with self._lock:
+            already = self._event.is_set()
+            if not already:
+                self._callbacks.append(callback)
+        if already:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+
+# ---------------- 任务级注册表 ----------------
+
+_tokens: Dict[str, CancelToken] = {}
+_tokens_lock = threading.Lock()
+_current_token: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar("cancel_token", default=None)
+
+_stats_lock = threading.Lock()
+_stats = {"requested": 0, "stopped": 0, "total_latency": 0.0, "max_latency": 0.0, "last_latency": None}
+
+
+def get_token(task_id: str) -> CancelToken:
+    with _tokens_lock:
+        token = _tokens.get(task_id)
+        if token is None:
+            token = CancelToken(task_id)
+            _tokens[task_id] = token
+        return token
+
+
+def release_token(task_id: str) -> None:
+    """
+    任务结束后移除取消标记，同一 task_id 重试时会得到新的标记
+    """
+    with _tokens_lock:
+        _tokens.pop(task_id, None)
+
+
+def active_task_ids() -> List[str]:
+    """
+    本进程中已入队或执行中的任务（持有取消标记的任务）
+    """
+    with _tokens_lock:
+        return list(_tokens)
+
+
+def cancel_task(task_id: str) -> bool:
+    """
+    取消本进程中已入队或执行中的任务
+
+    :return: 任务在本进程中存在时返回 True
+    """
+    with _tokens_lock:
+        token = _tokens.get(task_id)
+    if token is None:
+        return False
+    if not token.cancelled:
+        with _stats_lock:
+            _stats["requested"] += 1
+        logger.info(f"收到取消请求 (task_id={task_id})")
+    token.cancel()
+    return True
+
+
+def is_cancelled(task_id: Optional[str]) -> bool:
+    if not task_id:
+        return False
+    with _tokens_lock:
+        token = _tokens.get(task_id)
+    return token is not None and token.cancelled
+
+
+def record_stopped(task_id: str) -> None:
+    """
+    任务确认退出时调用，记录从取消请求到任务真正停止的耗时
+    """
+    with _tokens_lock:
+        token = _tokens.get(task_id)
+    if token is None or token.requested_at is None:
+        return
+    latency = time.time() - token.requested_at
+    with _stats_lock:
+        _stats["stopped"] += 1
+        _stats["total_latency"] += latency
+        _stats["max_latency"] = max(_stats["max_latency"], latency)
+        _stats["last_latency"] = latency
+    logger.info(f"任务已停止 (task_id={task_id})，取消耗时 {latency:.2f}s")
+
+
+def get_cancellation_stats() -> dict:
+    with _stats_lock:
+        stopped = _stats["stopped"]
+        return {
+            "requested": _stats["requested"],
+            "stopped": stopped,
+            "avg_latency": _stats["total_latency"] / stopped if stopped else None,
+            "max_latency": _stats["max_latency"] if stopped else None,
+            "last_latency": _stats["last_latency"],
+        }
+
+
+# ---------------- 当前线程/上下文绑定 ----------------
+
+@contextmanager
+def cancellation_scope(task_id: Optional[str]):
+    """
+    将任务的取消标记绑定到当前上下文，供下游的下载器、转写器、ffmpeg 调用通过 check_cancelled() 获取
+    """
+    token = get_token(task_id) if task_id else None
+    reset = _current_token.set(token)
+    try:
+        if token is not None:
+            token.raise_if_cancelled()
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _current_token.get()
+
+
+def check_cancelled() -> None:
+    """
+    当前任务已被取消时抛出 TaskCancelledError，未绑定任务时不做任何事
+    """
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def on_cancel(callback: Callable[[], None]):
+    """
+    为当前任务注册取消回调，未绑定任务时为空操作
+    """
+    token = _current_token.get()
+    if token is None:
+        yield
+        return
+    with token.on_cancel(callback):
+        yield
+
+
+def ytdlp_cancel_hook(d: dict) -> None:
+    """
+    yt-dlp progress_hooks：每收到一块数据检查一次取消标记，抛出异常以中断下载
+    """
+    check_cancelled()
+
+
+def run_process(cmd, check: bool = False, capture_output: bool = False, text: bool = False,
+                **kwargs) -> subprocess.CompletedProcess:
+    """
+    subprocess.run 的可取消版本：任务取消时终止子进程（超时未退出则 kill）并抛出 TaskCancelledError
+    """
+    if capture_output:
+        kwargs.setdefault("stdout", subprocess.PIPE)
+        kwargs.setdefault("stderr", subprocess.PIPE)
+    check_cancelled()
+    proc = subprocess.Popen(cmd, text=text, **kwargs)
+
+    def _kill_if_alive():
+        if proc.poll() is None:
+            proc.kill()
+
+    def _terminate():
+        # 回调在发起取消的线程中执行，不在此阻塞等待子进程退出
+        if proc.poll() is not None:
+            return
+        proc.terminate()
+        timer = threading.Timer(PROCESS_TERMINATE_TIMEOUT, _kill_if_alive)
+        timer.daemon = True
+        timer.start()
+
+    with on_cancel(_terminate):
+        stdout, stderr = proc.communicate()
+    check_cancelled()
+
+    if check and proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
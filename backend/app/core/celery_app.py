@@ -0,0 +1,42 @@
+import os
+
+from celery import Celery
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 消息队列地址，可替换：redis://host:6379/0、memory://（进程内，测试用）、filesystem://（本地目录，测试/单机用）
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://127.0.0.1:6379/0")
+# 结果后端，用于让 API 节点拿到其他节点上生成的笔记结果；为空则仅通过数据库同步状态
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "") or None
+CELERY_NOTE_QUEUE = os.getenv("CELERY_NOTE_QUEUE", "bilinote.notes")
+CELERY_FS_BROKER_DIR = os.getenv("CELERY_FS_BROKER_DIR", "data/celery_broker")
+
+celery_app = Celery(
+    "bilinote",
+    broker=CELERY_BROKER_URL,
+    backend=CELERY_RESULT_BACKEND,
+    include=["app.tasks.note_tasks"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_default_queue=CELERY_NOTE_QUEUE,
+    # 任务执行完成后再确认，worker 崩溃时消息会重新投递
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # 转写任务耗时长，每个 worker 只预取一个，避免任务堆积在忙碌节点上
+    worker_prefetch_multiplier=1,
+    task_always_eager=os.getenv("CELERY_TASK_ALWAYS_EAGER", "false").lower() == "true",
+)
+
+if CELERY_BROKER_URL.startswith("filesystem://"):
+    for sub in ("out", "processed"):
+        os.makedirs(os.path.join(CELERY_FS_BROKER_DIR, sub), exist_ok=True)
+    celery_app.conf.broker_transport_options = {
+        "data_folder_in": os.path.join(CELERY_FS_BROKER_DIR, "out"),
+        "data_folder_out": os.path.join(CELERY_FS_BROKER_DIR, "out"),
+        "data_folder_processed": os.path.join(CELERY_FS_BROKER_DIR, "processed"),
+    }
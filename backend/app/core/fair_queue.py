@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.enmus.task_priority_enums import TaskPriority
+
+load_dotenv()
+
+# 调度策略：fifo（按提交顺序）| fair（按客户端加权公平排队）| sjf（加权公平 + 预计耗时短的任务优先）
+SCHEDULER_POLICY = os.getenv("SCHEDULER_POLICY", "fair")
+
+
+def _parse_weights(raw: str) -> Dict[str, float]:
+    """
+    解析 "a:2,b:1" 形式的权重配置
+    """
+    weights = {}
+    for part in (raw or "").split(","):
+        if ":" not in part:
+            continue
+        name, value = part.rsplit(":", 1)
+        try:
+            weights[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return weights
+
+
+# 优先级权重：同样积压下 interactive 获得的执行机会是 batch 的 4 倍
+PRIORITY_WEIGHTS = {
+    TaskPriority.INTERACTIVE: 4.0,
+    TaskPriority.BATCH: 1.0,
+    **{TaskPriority(k): v for k, v in _parse_weights(os.getenv("PRIORITY_WEIGHTS", "")).items()
+       if k in TaskPriority._value2member_map_},
+}
+# 客户端权重，未配置的客户端权重为 1
+CLIENT_WEIGHTS = _parse_weights(os.getenv("CLIENT_WEIGHTS", ""))
+
+# 保留最近多少个任务的调度决策，供任务状态查询
+MAX_DECISIONS = 1000
+
+
+@dataclass
+class _Entry:
+    task_id: str
+    item: Any
+    client_id: str
+    priority: TaskPriority
+    cost: float
+    seq: int
+    enqueued_at: float = field(default_factory=time.time)
+
+
+class _Flow:
+    def __init__(self, key: Tuple[TaskPriority, str], weight: float):
+        self.key = key
+        self.weight = weight
+        self.entries: List[_Entry] = []
+        self.last_finish = 0.0
+
+
+class FairTaskQueue:
+    """
+    按 (优先级, 客户端) 划分队列的加权公平排队（WFQ）：
+    - 每个流的权重 = 优先级权重 × 客户端权重，出队时选取虚拟完成时间最小的流
+    - 虚拟完成时间 = max(系统虚拟时间, 该流上次完成时间) + 任务代价 / 权重，空闲后回来的流不会积累额度
+    - fair 策略下每个任务代价为 1；sjf 策略下代价为预计耗时（秒），且流内预计耗时短的任务先出队
+    """
+
+    def __init__(self, policy: str = SCHEDULER_POLICY):
+        if policy not in ("fifo", "fair", "sjf"):
+            raise ValueError(f"未知的调度策略：{policy}")
+        self.policy = policy
+        self._cond = threading.Condition()
+        self._flows: Dict[Tuple[TaskPriority, str], _Flow] = {}
+        self._virtual_time = 0.0
+        self._seq = 0
+        self._size = 0
+        self._closed = False
+        self._decisions: "OrderedDict[str, dict]" = OrderedDict()
+
+    def put(self, task_id: str, item: Any, client_id: Optional[str] = None,
+            priority: TaskPriority = TaskPriority.INTERACTIVE, expected_seconds: Optional[float] = None):
+        priority = TaskPriority(priority)
+        client_id = client_id or "anonymous"
+        cost = 1.0 if self.policy != "sjf" else max(float(expected_seconds or 1.0), 1.0)
+        with self._cond:
+            key = (priority, client_id)
+            flow = self._flows.get(key)
+            if flow is None:
+                weight = PRIORITY_WEIGHTS.get(priority, 1.0) * CLIENT_WEIGHTS.get(client_id, 1.0)
+                flow = _Flow(key, max(weight, 1e-6))
+                self._flows[key] = flow
+            self._seq += 1
+            flow.entries.append(_Entry(task_id, item, client_id, priority, cost, self._seq))
+            self._size += 1
+            self._cond.notify()
+
+    def get(self) -> Optional[Any]:
+        """
+        阻塞直到有任务可执行；队列关闭后返回 None
+        """
+        with self._cond:
+            while self._size == 0 and not self._closed:
+                self._cond.wait()
+            if self._size == 0:
+                return None
+            flow, entry, finish = self._pick()
+            flow.entries.remove(entry)
+            self._size -= 1
+            if self.policy != "fifo":
+                self._virtual_time = max(self._virtual_time, finish - entry.cost / flow.weight)
+                flow.last_finish = finish
+            self._record(flow, entry, finish)
+            self._drop_idle_flows()
+            return entry.item
+
+    def _drop_idle_flows(self):
+        # 空闲且未超前于虚拟时间的流可以删除，之后回来会从当前虚拟时间重新开始，结果等价
+        for key in [k for k, f in self._flows.items() if not f.entries and f.last_finish <= self._virtual_time]:
+            del self._flows[key]
+
+    def _head(self, flow: _Flow) -> _Entry:
+        if self.policy == "sjf":
+            return min(flow.entries, key=lambda e: (e.cost, e.seq))
+        return flow.entries[0]
+
+    def _pick(self) -> Tuple[_Flow, _Entry, float]:
+        best = None
+        for flow in self._flows.values():
+            if not flow.entries:
+                continue
+            head = self._head(flow)
+            finish = max(self._virtual_time, flow.last_finish) + head.cost / flow.weight
+            rank = (head.seq,) if self.policy == "fifo" else (finish, head.seq)
+            if best is None or rank < best[0]:
+                best = (rank, flow, head, finish)
+        _, flow, head, finish = best
+        return flow, head, finish
+
+    def _record(self, flow: _Flow, entry: _Entry, finish: float):
+        now = time.time()
+        self._decisions[entry.task_id] = {
+            "state": "dispatched",
+            "policy": self.policy,
+            "priority": entry.priority.value,
+            "client_id": entry.client_id,
+            "weight": flow.weight,
+            "cost": entry.cost,
+            "virtual_finish": finish,
+            "virtual_time": self._virtual_time,
+            "waited_seconds": round(now - entry.enqueued_at, 3),
+            "queue_depth": self._size,
+            "active_flows": sum(1 for f in self._flows.values() if f.entries),
+            "dispatched_at": now,
+        }
+        self._decisions.move_to_end(entry.task_id)
+        while len(self._decisions) > MAX_DECISIONS:
+            self._decisions.popitem(last=False)
+
+    # ---------------- 查询 ----------------
+
+    def describe(self, task_id: str) -> Optional[dict]:
+        """
+        返回任务的调度信息：排队中返回所在流的位置，已出队返回当时的调度决策
+        """
+        with self._cond:
+            for flow in self._flows.values():
+                for entry in flow.entries:
+                    if entry.task_id == task_id:
+                        order = (lambda e: (e.cost, e.seq)) if self.policy == "sjf" else (lambda e: e.seq)
+                        ahead = sum(1 for e in flow.entries if order(e) < order(entry))
+                        return {
+                            "state": "queued",
+                            "policy": self.policy,
+                            "priority": entry.priority.value,
+                            "client_id": entry.client_id,
+                            "weight": flow.weight,
+                            "cost": entry.cost,
+                            "ahead_in_flow": ahead,
+                            "queue_depth": self._size,
+                            "active_flows": sum(1 for f in self._flows.values() if f.entries),
+                            "waited_seconds": round(time.time() - entry.enqueued_at, 3),
+                        }
+            return self._decisions.get(task_id)
+
+    def qsize(self) -> int:
+        with self._cond:
+            return self._size
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "policy": self.policy,
+                "virtual_time": self._virtual_time,
+                "flows": [
+                    {"priority": f.key[0].value, "client_id": f.key[1], "weight": f.weight,
+                     "queued": len(f.entries), "last_finish": f.last_finish}
+                    for f in self._flows.values()
+                ],
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
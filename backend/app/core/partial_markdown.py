@@ -0,0 +1,99 @@
+import os
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from app.core.cancellation import current_token
+from app.utils.logger import get_logger
+from events.signals import summary_delta_added
+
+load_dotenv()
+logger = get_logger(__name__)
+
+NOTE_OUTPUT_DIR = Path(os.getenv("NOTE_OUTPUT_DIR", "note_results"))
+# LLM 增量合并推送的间隔（秒），避免逐 token 推送事件
+SUMMARY_DELTA_INTERVAL = float(os.getenv("SUMMARY_DELTA_INTERVAL", 0.2))
+
+
+def partial_markdown_path(task_id: str) -> Path:
+    return NOTE_OUTPUT_DIR / f"{task_id}_markdown.partial.md"
+
+
+class PartialMarkdown:
+    """
+    LLM 流式生成过程中的临时笔记：增量追加到 {task_id}_markdown.partial.md，并按 SUMMARY_DELTA_INTERVAL 合并推送 delta 事件。
+    任务由 cancellation_scope 绑定，未绑定任务时所有操作为空操作。
+    退出时保留临时文件，由 NoteGenerator 原子写入完整的 {task_id}_markdown.md 之后再删除（见 discard_partial_markdown），
+    轮询临时笔记的客户端不会在两者之间看到内容消失；临时文件与完整笔记文件名不同，恢复执行时不会被当作已完成的缓存。
+    """
+
+    def __init__(self, task_id: Optional[str] = None, interval: float = SUMMARY_DELTA_INTERVAL):
+        if task_id is None:
+            token = current_token()
+            task_id = token.task_id if token else None
+        self.task_id = task_id
+        self.interval = interval
+        self.offset = 0
+        self._pending: List[str] = []
+        self._last_sent = 0.0
+        self._file = None
+
+    def __enter__(self) -> "PartialMarkdown":
+        if self.task_id:
+            path = partial_markdown_path(self.task_id)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = path.open("w", encoding="utf-8")
+            except OSError as e:
+                logger.warning(f"无法创建临时笔记文件 (task_id={self.task_id})：{e}")
+        return self
+
+    def append(self, delta: str) -> None:
+        if not self.task_id or not delta:
+            return
+        self._pending.append(delta)
+        now = time.monotonic()
+        if now - self._last_sent >= self.interval:
+            self._send(now)
+
+    def _send(self, now: float) -> None:
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._last_sent = now
+        if self._file is not None:
+            self._file.write(text)
+            self._file.flush()
+        summary_delta_added.send(self.task_id, delta=text, offset=self.offset)
+        self.offset += len(text)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.task_id:
+            self._send(time.monotonic())
+        if self._file is None:
+            return False
+        self._file.close()
+        return False
+
+
+def discard_partial_markdown(task_id: str) -> None:
+    """
+    完整笔记写入后删除临时笔记
+    """
+    try:
+        partial_markdown_path(task_id).unlink()
+    except OSError:
+        pass
+
+
+def read_partial_markdown(task_id: str) -> Optional[str]:
+    """
+    读取生成中的临时笔记，文件不存在时返回 None
+    """
+    try:
+        return partial_markdown_path(task_id).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,93 @@
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from app.core.cancellation import current_token
+from app.models.transcriber_model import TranscriptSegment
+from app.utils.logger import get_logger
+from events.signals import transcript_segment_added
+
+load_dotenv()
+logger = get_logger(__name__)
+
+NOTE_OUTPUT_DIR = Path(os.getenv("NOTE_OUTPUT_DIR", "note_results"))
+
+
+def partial_transcript_path(task_id: str) -> Path:
+    return NOTE_OUTPUT_DIR / f"{task_id}_transcript.partial.jsonl"
+
+
+class PartialTranscript:
+    """
+    转写过程中逐段发布的临时字幕：每段追加一行 JSON 到 {task_id}_transcript.partial.jsonl，并推送 segment 事件。
+    任务由 cancellation_scope 绑定，未绑定任务时所有操作为空操作。
+    转写成功后删除临时文件（完整结果已写入转写缓存），失败/取消时保留已转写部分。
+
+    用法：
+        with PartialTranscript() as partial:
+            for seg in segments_raw:
+                partial.append(segment)
+    """
+
+    def __init__(self, task_id: Optional[str] = None):
+        if task_id is None:
+            token = current_token()
+            task_id = token.task_id if token else None
+        self.task_id = task_id
+        self.index = 0
+        self._file = None
+
+    def __enter__(self) -> "PartialTranscript":
+        if self.task_id:
+            path = partial_transcript_path(self.task_id)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # 行缓冲：每写一段立即可被读取
+                self._file = path.open("w", encoding="utf-8", buffering=1)
+            except OSError as e:
+                logger.warning(f"无法创建临时字幕文件 (task_id={self.task_id})：{e}")
+        return self
+
+    def append(self, segment: TranscriptSegment) -> None:
+        if not self.task_id:
+            return
+        data = {"index": self.index, **asdict(segment)}
+        self.index += 1
+        if self._file is not None:
+            self._file.write(json.dumps(data, ensure_ascii=False) + "\n")
+        transcript_segment_added.send(self.task_id, segment=data)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is None:
+            return False
+        self._file.close()
+        if exc_type is None:
+            try:
+                partial_transcript_path(self.task_id).unlink()
+            except OSError:
+                pass
+        return False
+
+
+def read_partial_transcript(task_id: str, offset: int = 0) -> Optional[List[dict]]:
+    """
+    读取临时字幕中第 offset 段之后的部分，文件不存在时返回 None
+    """
+    path = partial_transcript_path(task_id)
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return None
+    segments = []
+    for line in lines[offset:]:
+        try:
+            segments.append(json.loads(line))
+        except json.JSONDecodeError:
+            # 最后一行可能正在写入
+            break
+    return segments
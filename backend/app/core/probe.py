@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.core.singleflight import SingleFlight
+from app.models.audio_model import VideoProbeResult
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 是否在下载前探测视频元信息
+PROBE_ENABLED = os.getenv("PROBE_ENABLED", "true").lower() == "true"
+# 探测结果缓存有效期（秒）：yt-dlp 解析出的媒体直链会过期，不宜过长
+PROBE_CACHE_TTL = float(os.getenv("PROBE_CACHE_TTL", 600))
+PROBE_CACHE_MAX_ENTRIES = int(os.getenv("PROBE_CACHE_MAX_ENTRIES", 500))
+# 允许处理的最长视频时长（秒），0 表示不限制
+MAX_VIDEO_DURATION = float(os.getenv("MAX_VIDEO_DURATION", 0))
+
+
+class ProbeCache:
+    """
+    探测结果的内存缓存，按 (平台, 链接) 存放，超过 TTL 或容量时淘汰
+    """
+
+    def __init__(self, ttl: float = PROBE_CACHE_TTL, max_entries: int = PROBE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, VideoProbeResult]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[VideoProbeResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple[str, str], result: VideoProbeResult):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "failures": self.failures,
+            }
+
+
+_probe_cache = ProbeCache()
+_probe_flight = SingleFlight("probe")
+
+
+def probe_video(downloader, platform: str, video_url: str) -> Optional[VideoProbeResult]:
+    """
+    获取视频元信息（带缓存，相同链接的并发探测合并为一次）。
+    探测失败或平台不支持时返回 None，由下载阶段照常获取信息。
+    """
+    if not PROBE_ENABLED or downloader is None:
+        return None
+    key = (platform, str(video_url))
+    cached = _probe_cache.get(key)
+    if cached is not None:
+        return cached
+    try:
+        result, _ = _probe_flight.do(key, downloader.probe, str(video_url))
+    except Exception as e:
+        logger.warning(f"探测视频信息失败，将在下载时获取 ({video_url})：{e}")
+        _probe_cache.record_failure()
+        return None
+    if result is not None:
+        _probe_cache.put(key, result)
+    return result
+
+
+def check_duration_limit(probe: Optional[VideoProbeResult]) -> Optional[str]:
+    """
+    检查视频时长是否超过 MAX_VIDEO_DURATION，超过时返回拒绝原因
+    """
+    if not MAX_VIDEO_DURATION or probe is None or not probe.duration:
+        return None
+    if probe.duration > MAX_VIDEO_DURATION:
+        return f"视频时长 {int(probe.duration)} 秒，超过上限 {int(MAX_VIDEO_DURATION)} 秒"
+    return None
+
+
+def get_probe_stats() -> dict:
+    return {**_probe_cache.stats(), "coalescing": _probe_flight.stats()}
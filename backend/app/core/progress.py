@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Union
+
+from dotenv import load_dotenv
+
+from app.core.cancellation import current_token
+from app.core.task_state import get_task_state_store
+from app.enmus.task_status_enums import TaskStatus
+from events.signals import task_status_changed
+
+load_dotenv()
+
+# 同一任务两次进度上报的最小间隔（秒），进度只写内存并推送事件，不落盘
+PROGRESS_REPORT_INTERVAL = float(os.getenv("PROGRESS_REPORT_INTERVAL", 1.0))
+
+# 各阶段的阶段内进度映射到整体进度的区间
+_STAGE_RANGES = {
+    TaskStatus.DOWNLOADING: (TaskStatus.progress(TaskStatus.DOWNLOADING), TaskStatus.progress(TaskStatus.TRANSCRIBING)),
+    TaskStatus.TRANSCRIBING: (TaskStatus.progress(TaskStatus.TRANSCRIBING), TaskStatus.progress(TaskStatus.SUMMARIZING)),
+    TaskStatus.SUMMARIZING: (TaskStatus.progress(TaskStatus.SUMMARIZING), TaskStatus.progress(TaskStatus.FORMATTING)),
+}
+
+_lock = threading.Lock()
+_last_report: Dict[str, float] = {}
+
+
+def build_progress(status: Union[str, TaskStatus], fraction: Optional[float] = None, **detail) -> dict:
+    """
+    构造进度对象：stage 为所处状态，percent 为阶段内进度（未知时为 None），overall 为整体进度百分比
+
+    :param fraction: 阶段内完成比例 0~1
+    :param detail: 阶段相关的计数，如已下载字节数、已转写段数、已接收 token 数
+    """
+    status = TaskStatus(status) if status in TaskStatus._value2member_map_ else status
+    overall = TaskStatus.progress(status)
+    percent = None
+    if fraction is not None:
+        fraction = min(max(fraction, 0.0), 1.0)
+        percent = round(fraction * 100, 1)
+        start, end = _STAGE_RANGES.get(status, (overall, overall))
+        if start is not None:
+            overall = round(start + (end - start) * fraction, 1)
+    progress = {"stage": getattr(status, "value", status), "percent": percent, "overall": overall}
+    if detail:
+        progress["detail"] = detail
+    return progress
+
+
+def report_progress(status: TaskStatus, fraction: Optional[float] = None, **detail) -> None:
+    """
+    上报当前任务（由 cancellation_scope 绑定）在某阶段内的进度，按 PROGRESS_REPORT_INTERVAL 限频，
+    阶段完成（fraction >= 1）时总是上报。未绑定任务时为空操作，因此下载器/转写器可以无条件调用。
+    """
+    token = current_token()
+    if token is None or token.cancelled:
+        return
+    task_id = token.task_id
+    now = time.monotonic()
+    with _lock:
+        last = _last_report.get(task_id)
+        if last is not None and now - last < PROGRESS_REPORT_INTERVAL and not (fraction is not None and fraction >= 1):
+            return
+        _last_report[task_id] = now
+
+    progress = build_progress(status, fraction, **detail)
+    state = get_task_state_store().set_progress(task_id, status.value, progress)
+    if state is None:
+        # 任务已进入其他状态，丢弃过期的进度
+        return
+    task_status_changed.send(task_id, status=state["status"], message=state["message"], progress=progress)
+
+
+def reset_progress(task_id: str) -> None:
+    """
+    状态变化时清除限频记录，新阶段的第一次进度立即上报
+    """
+    with _lock:
+        _last_report.pop(task_id, None)
+
+
+def ytdlp_progress_hook(d: dict) -> None:
+    """
+    yt-dlp progress_hooks：按已下载字节数上报下载进度
+    """
+    if d.get("status") != "downloading":
+        return
+    downloaded = d.get("downloaded_bytes") or 0
+    total = d.get("total_bytes") or d.get("total_bytes_estimate")
+    report_progress(TaskStatus.DOWNLOADING, downloaded / total if total else None,
+                    downloaded_bytes=downloaded, total_bytes=total)
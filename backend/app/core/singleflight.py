@@ -0,0 +1,146 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.cancellation import check_cancelled, current_token
+from app.exceptions.task import TaskCancelledError
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.leader_cancelled = False
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    合并相同 key 的并发调用：第一个调用者真正执行，其余调用者阻塞等待并共享同一个结果（或异常）。
+    执行结束后 key 即被移除，之后的调用会重新执行（结果缓存由各阶段自己的缓存文件负责）。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: Optional[Hashable], fn: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        :param key: 合并键，为 None 时不合并直接执行
+        :return: (结果, 是否复用了其他调用的结果)
+        """
+        if key is None:
+            return fn(*args, **kwargs), False
+
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                break
+            logger.info(f"[{self.name}] 合并到进行中的执行：{key}")
+            # 等待期间自身被取消则退出等待，不影响执行者
+            while not call.done.wait(0.5):
+                check_cancelled()
+            if call.leader_cancelled or isinstance(call.error, TaskCancelledError):
+                # 执行者所属任务被取消，等待者重新竞争执行
+                check_cancelled()
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            token = current_token()
+            call.leader_cancelled = token is not None and token.cancelled
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        return call, leader
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": [{"key": str(k), "waiters": c.waiters} for k, c in self._calls.items()],
+                "coalesced": self.coalesced,
+            }
+
+
+_RETRY = object()
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight 的协程版本，供 asyncio 流水线使用（所有调用需在同一个事件循环内）。
+    执行者被取消时等待者重新竞争执行，而不是一起失败。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, "asyncio.Future"] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Optional[Hashable], fn: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        :param fn: 返回协程的函数
+        :return: (结果, 是否复用了其他调用的结果)
+        """
+        if key is None:
+            return await fn(*args, **kwargs), False
+
+        while key in self._calls:
+            fut = self._calls[key]
+            self.coalesced += 1
+            self._waiters[key] = self._waiters.get(key, 0) + 1
+            logger.info(f"[{self.name}] 合并到进行中的执行：{key}")
+            # shield：等待者自身被取消时不影响执行者
+            ok, value = await asyncio.shield(fut)
+            if ok:
+                return value, True
+            if value is _RETRY:
+                continue
+            raise value
+
+        fut = asyncio.get_running_loop().create_future()
+        self._calls[key] = fut
+        try:
+            result = await fn(*args, **kwargs)
+            fut.set_result((True, result))
+            return result, False
+        except BaseException as e:
+            token = current_token()
+            cancelled = isinstance(e, (asyncio.CancelledError, TaskCancelledError)) or \
+                (token is not None and token.cancelled)
+            fut.set_result((False, _RETRY if cancelled else e))
+            raise
+        finally:
+            self._calls.pop(key, None)
+            self._waiters.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": [{"key": str(k), "waiters": self._waiters.get(k, 0)} for k in list(self._calls)],
+            "coalesced": self.coalesced,
+        }
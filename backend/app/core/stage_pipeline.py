@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+StageSpec = Tuple[str, Callable[[Any], None], int]
+
+_local = threading.local()
+
+
+def current_pipeline_stage() -> Optional[str]:
+    """
+    当前线程所属的流水线阶段名，不在流水线工作线程中时返回 None
+    """
+    return getattr(_local, "stage", None)
+
+
+class _Stage:
+    def __init__(self, name: str, fn: Callable[[Any], None], workers: int):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.queue: "queue.Queue" = queue.Queue()
+        self.busy = 0
+        self.processed = 0
+        self.busy_seconds = 0.0
+
+
+class StagePipeline:
+    """
+    多阶段流水线：每个阶段拥有独立的队列和工作线程池，
+    任务完成当前阶段后进入下一阶段的队列，从而让不同任务的下载、转写、总结同时进行。
+
+    :param stages: [(阶段名, 处理函数, 工作线程数), ...]，处理函数接收流转对象并原地修改
+    :param on_complete: 所有阶段完成后的回调
+    :param on_error: 任一阶段抛出异常时的回调，该任务不再进入后续阶段
+    """
+
+    def __init__(self, stages: List[StageSpec],
+                 on_complete: Optional[Callable[[Any], None]] = None,
+                 on_error: Optional[Callable[[Any, Exception], None]] = None):
+        self._stages = [_Stage(name, fn, workers) for name, fn, workers in stages]
+        self._on_complete = on_complete
+        self._on_error = on_error
+        self._lock = threading.Lock()
+        self._threads = []
+        self._in_pipeline = 0
+        self._completed = 0
+        self._failed = 0
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            for index, stage in enumerate(self._stages):
+                for i in range(stage.workers):
+                    t = threading.Thread(target=self._worker_loop, args=(index,),
+                                         name=f"pipeline-{stage.name}-{i}", daemon=True)
+                    t.start()
+                    self._threads.append(t)
+            self._started = True
+        logger.info("流水线启动：" + ", ".join(f"{s.name}x{s.workers}" for s in self._stages))
+
+    def submit(self, item: Any) -> None:
+        self.start()
+        with self._lock:
+            self._in_pipeline += 1
+        self._stages[0].queue.put(item)
+
+    def join(self):
+        """
+        阻塞直到当前所有已提交的任务离开流水线（主要用于基准测试）
+        """
+        while True:
+            with self._lock:
+                if self._in_pipeline == 0:
+                    return
+            time.sleep(0.01)
+
+    def _worker_loop(self, index: int):
+        stage = self._stages[index]
+        _local.stage = stage.name
+        while True:
+            item = stage.queue.get()
+            if item is None:
+                return
+            with self._lock:
+                stage.busy += 1
+            started = time.perf_counter()
+            try:
+                stage.fn(item)
+            except Exception as exc:
+                self._finish(item, exc)
+                continue
+            finally:
+                with self._lock:
+                    stage.busy -= 1
+                    stage.processed += 1
+                    stage.busy_seconds += time.perf_counter() - started
+
+            if index + 1 < len(self._stages):
+                self._stages[index + 1].queue.put(item)
+            else:
+                self._finish(item, None)
+
+    def _finish(self, item: Any, exc: Optional[Exception]):
+        try:
+            if exc is None:
+                if self._on_complete:
+                    self._on_complete(item)
+            elif self._on_error:
+                self._on_error(item, exc)
+        except Exception as e:
+            logger.error(f"流水线回调异常：{e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._in_pipeline -= 1
+                if exc is None:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_pipeline": self._in_pipeline,
+                "completed": self._completed,
+                "failed": self._failed,
+                "stages": {
+                    s.name: {
+                        "workers": s.workers,
+                        "queue_depth": s.queue.qsize(),
+                        "busy": s.busy,
+                        "processed": s.processed,
+                        "busy_seconds": round(s.busy_seconds, 3),
+                    }
+                    for s in self._stages
+                },
+            }
+
+    def shutdown(self):
+        for stage in self._stages:
+            for _ in range(stage.workers):
+                stage.queue.put(None)
@@ -0,0 +1,369 @@
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from app.core.artifact_cache import ARTIFACT_CACHE_DIR
+from app.core.cancellation import active_task_ids
+from app.utils.logger import get_logger
+from app.utils.path_helper import get_app_dir, get_data_dir
+
+load_dotenv()
+logger = get_logger(__name__)
+
+NOTE_OUTPUT_DIR = os.getenv("NOTE_OUTPUT_DIR", "note_results")
+IMAGE_OUTPUT_DIR = os.getenv("OUT_DIR", "./static/screenshots")
+
+# 是否启用磁盘配额清理
+STORAGE_BUDGET_ENABLED = os.getenv("STORAGE_BUDGET_ENABLED", "true").lower() == "true"
+# 后台巡检间隔（秒）；任务结束时也会触发一次
+STORAGE_SWEEP_INTERVAL = float(os.getenv("STORAGE_SWEEP_INTERVAL", 600))
+# 最近多少秒内写入的文件视为仍在生成中，不参与淘汰
+STORAGE_MIN_AGE = float(os.getenv("STORAGE_MIN_AGE", 3600))
+# notes 超出配额时是否也淘汰已完成的笔记结果（{task_id}.json，历史记录中仍可打开），默认只淘汰阶段缓存
+STORAGE_EVICT_NOTE_RESULTS = os.getenv("STORAGE_EVICT_NOTE_RESULTS", "false").lower() == "true"
+
+MB = 1024 * 1024
+
+
+def _parse_budgets(raw: str) -> Dict[str, int]:
+    """
+    解析 "media:10240,notes:1024" 形式的配额配置（单位 MB），0 表示不限制
+    """
+    budgets = {}
+    for part in (raw or "").split(","):
+        if ":" not in part:
+            continue
+        name, value = part.rsplit(":", 1)
+        try:
+            budgets[name.strip()] = int(float(value) * MB)
+        except ValueError:
+            continue
+    return budgets
+
+
+# 各类产物的磁盘配额
+STORAGE_BUDGETS = {
+    "media": 10240 * MB,
+    "notes": 1024 * MB,
+    "screenshots": 2048 * MB,
+    "frames": 1024 * MB,
+    "cache": 1024 * MB,
+    **_parse_budgets(os.getenv("STORAGE_BUDGETS_MB", "")),
+}
+
+# 一个可淘汰单元：(单元名, 包含的路径, 字节数, 最近访问时间)
+Item = Tuple[str, List[str], int, float]
+
+
+def _path_size(path: str) -> int:
+    if os.path.isdir(path):
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return total
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _last_access(path: str) -> float:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 0.0
+    return max(stat.st_atime, stat.st_mtime)
+
+
+def _newest_mtime(path: str) -> float:
+    if os.path.isdir(path):
+        newest = 0.0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+                except OSError:
+                    continue
+        return newest or _last_access(path)
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def _file_items(*roots: str, recursive: bool = False) -> List[Item]:
+    """
+    每个文件一个单元
+    """
+    items = []
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        paths = Path(root).rglob("*") if recursive else Path(root).iterdir()
+        for path in paths:
+            if path.is_file():
+                p = str(path)
+                items.append((p, [p], _path_size(p), _last_access(p)))
+    return items
+
+
+def _dir_items(*roots: str) -> List[Item]:
+    """
+    每个一级子目录（按任务划分的帧/拼图目录）一个单元
+    """
+    items = []
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for entry in os.scandir(root):
+            items.append((entry.name, [entry.path], _path_size(entry.path), _newest_mtime(entry.path)))
+    return items
+
+
+def _task_file_items(root: str, include_results: bool = STORAGE_EVICT_NOTE_RESULTS) -> List[Item]:
+    """
+    note_results 下同一任务的阶段缓存（{task_id}_audio.json、{task_id}_transcript.json、临时笔记等）作为一个单元；
+    最终结果 {task_id}.json 仅在 include_results 时一并淘汰
+    """
+    groups: Dict[str, List[str]] = {}
+    if os.path.isdir(root):
+        for entry in os.scandir(root):
+            if not entry.is_file():
+                continue
+            task_id = re.split(r"[_.]", entry.name, 1)[0]
+            if entry.name == f"{task_id}.json" and not include_results:
+                continue
+            groups.setdefault(task_id, []).append(entry.path)
+    return [
+        (task_id, paths, sum(_path_size(p) for p in paths), max(_last_access(p) for p in paths))
+        for task_id, paths in groups.items()
+    ]
+
+
+def _referenced_images(notes_root: str, image_root: str) -> Set[str]:
+    """
+    已保留的笔记结果（{task_id}.json）中引用的截图路径，删除它们会让历史笔记里的图片失效
+    """
+    if not os.path.isdir(notes_root) or not os.path.isdir(image_root):
+        return set()
+    names = {entry.name for entry in os.scandir(image_root) if entry.is_file()}
+    referenced = set()
+    for entry in os.scandir(notes_root):
+        task_id = re.split(r"[_.]", entry.name, 1)[0]
+        if not entry.is_file() or entry.name != f"{task_id}.json":
+            continue
+        try:
+            text = Path(entry.path).read_text(encoding="utf-8")
+        except OSError:
+            continue
+        for name in re.findall(r"[\w.\-]+\.(?:jpe?g|png|webp|gif)", text, re.IGNORECASE):
+            if name in names:
+                referenced.add(os.path.abspath(os.path.join(image_root, name)))
+    return referenced
+
+
+class StorageManager:
+    """
+    按类别维护产物的磁盘配额，超出时按最近访问时间（LRU）淘汰：
+    - media：下载的音视频（data 目录）
+    - notes：note_results 下的阶段缓存（按任务整体淘汰，已完成的笔记结果默认保留）
+    - screenshots：插入笔记的截图（仍保留的笔记结果引用的截图不淘汰）
+    - frames：output_frames / grid_output 下按任务划分的帧与拼图
+    - cache：跨任务的音频/转写缓存（总结缓存有自己的索引与容量上限，由 SummaryCache 自行淘汰）
+    未完成任务（本进程持有取消标记的任务，以及 note_jobs 中未结束的任务）引用的产物、
+    以及最近 STORAGE_MIN_AGE 秒内写入的文件不会被淘汰。
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, min_age: float = STORAGE_MIN_AGE,
+                 interval: float = STORAGE_SWEEP_INTERVAL, enabled: bool = STORAGE_BUDGET_ENABLED):
+        self.budgets = dict(budgets if budgets is not None else STORAGE_BUDGETS)
+        self.min_age = min_age
+        self.interval = interval
+        self.enabled = enabled
+        self.classes: Dict[str, Callable[[], List[Item]]] = {
+            "media": lambda: _file_items(get_data_dir()),
+            "notes": lambda: _task_file_items(NOTE_OUTPUT_DIR),
+            "screenshots": lambda: _file_items(IMAGE_OUTPUT_DIR),
+            "frames": lambda: _dir_items(get_app_dir("output_frames"), get_app_dir("grid_output")),
+            "cache": lambda: _file_items(ARTIFACT_CACHE_DIR, recursive=True),
+        }
+        self._sweep_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._usage: Dict[str, dict] = {}
+        self.sweeps = 0
+        self.evicted_items = 0
+        self.evicted_bytes = 0
+        self.last_sweep_at: Optional[float] = None
+
+    # ---------------- 访问记录 ----------------
+
+    @staticmethod
+    def touch(path: Optional[str]) -> None:
+        """
+        记录一次读取：只更新 atime，不影响按 mtime 判断的文件新旧
+        """
+        if not path:
+            return
+        try:
+            stat = os.stat(path)
+            os.utime(path, (time.time(), stat.st_mtime))
+        except OSError:
+            pass
+
+    # ---------------- 淘汰 ----------------
+
+    def _references(self) -> Optional[Tuple[Set[str], Set[str]]]:
+        """
+        收集未完成任务的 task_id 与其记录的产物路径；数据库不可用时返回 None（本轮不淘汰）
+        """
+        from app.db.note_job_dao import get_unfinished_note_jobs
+        try:
+            jobs = get_unfinished_note_jobs(raise_on_error=True)
+        except Exception:
+            return None
+        task_ids = set(active_task_ids())
+        paths = set()
+        for job in jobs:
+            task_ids.add(job["task_id"])
+            for value in (job.get("artifacts") or {}).values():
+                if isinstance(value, str) and value:
+                    paths.add(os.path.abspath(value))
+        return task_ids, paths
+
+    def _is_protected(self, item: Item, task_ids: Set[str], paths: Set[str], now: float) -> bool:
+        name, item_paths, _, _ = item
+        if name in task_ids:
+            return True
+        for path in item_paths:
+            if os.path.abspath(path) in paths:
+                return True
+            if now - _newest_mtime(path) < self.min_age:
+                return True
+        return False
+
+    def sweep(self) -> dict:
+        """
+        检查各类别占用并淘汰超出配额的部分
+
+        :return: 各类别本轮淘汰的单元数与字节数
+        """
+        if not self.enabled:
+            return {}
+        with self._sweep_lock:
+            references = self._references()
+            if references is None:
+                logger.warning("无法读取未完成任务，跳过本轮磁盘清理")
+                return {}
+            task_ids, paths = references
+            now = time.time()
+            result = {}
+            for name, collect in self.classes.items():
+                items = collect()
+                used = sum(size for _, _, size, _ in items)
+                budget = self.budgets.get(name, 0)
+                evicted, freed = 0, 0
+                if budget and used > budget:
+                    protected = paths
+                    if name == "screenshots":
+                        # notes 在前面已清理完，这里只保护仍存在的笔记引用的截图
+                        protected = paths | _referenced_images(NOTE_OUTPUT_DIR, IMAGE_OUTPUT_DIR)
+                    for item in sorted(items, key=lambda i: i[3]):
+                        if used <= budget:
+                            break
+                        if self._is_protected(item, task_ids, protected, now):
+                            continue
+                        if self._remove(item):
+                            used -= item[2]
+                            freed += item[2]
+                            evicted += 1
+                    logger.info(f"磁盘清理 {name}：淘汰 {evicted} 项，释放 {freed / MB:.1f} MB，"
+                                f"当前 {used / MB:.1f} MB / 配额 {budget / MB:.1f} MB")
+                    if used > budget:
+                        logger.warning(f"{name} 占用仍超出配额，剩余文件被未完成任务或已保留的笔记引用，或刚刚写入")
+                self._usage[name] = {"bytes": used, "budget": budget, "items": len(items) - evicted}
+                self.evicted_items += evicted
+                self.evicted_bytes += freed
+                result[name] = {"evicted": evicted, "freed": freed}
+            self.sweeps += 1
+            self.last_sweep_at = now
+            return result
+
+    @staticmethod
+    def _remove(item: Item) -> bool:
+        name, item_paths, _, _ = item
+        try:
+            for path in item_paths:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            logger.error(f"删除失败：{name}，原因：{e}")
+            return False
+
+    # ---------------- 后台线程 ----------------
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="storage-manager", daemon=True)
+        self._thread.start()
+
+    def request_sweep(self):
+        """
+        请求尽快执行一次清理（任务结束时调用），多次请求会合并
+        """
+        self._wakeup.set()
+
+    def _loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._closed:
+                return
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"磁盘清理失败：{e}")
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "usage": dict(self._usage),
+            "sweeps": self.sweeps,
+            "evicted_items": self.evicted_items,
+            "evicted_bytes": self.evicted_bytes,
+            "last_sweep_at": self.last_sweep_at,
+        }
+
+
+_manager: Optional[StorageManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_storage_manager() -> StorageManager:
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = StorageManager()
+    return _manager
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+from app.utils.path_helper import get_app_dir
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# LLM 总结结果缓存：是否启用、目录、有效期（秒）、磁盘占用上限（字节）
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() == "true"
+SUMMARY_CACHE_DIR = os.getenv("SUMMARY_CACHE_DIR") or get_app_dir("summary_cache")
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", 7 * 24 * 3600))
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+
+@lru_cache(maxsize=1)
+def prompt_template_version() -> str:
+    """
+    提示词模板版本：取 prompt.py 与 prompt_builder.py 源文件的哈希，模板改动后旧缓存自动失效
+    """
+    from app.gpt import prompt, prompt_builder
+
+    h = hashlib.sha256()
+    for module in (prompt, prompt_builder):
+        h.update(Path(module.__file__).read_bytes())
+    return h.hexdigest()[:12]
+
+
+class SummaryCache:
+    """
+    LLM 总结结果缓存，键为渲染后的提示词输入（字幕文本、标题、标签、风格、格式、备注、图片摘要）
+    加上模型、接口地址与提示词模板版本的哈希，值为生成的 Markdown。
+    - 超过 TTL 的条目在读取时删除
+    - 总大小超过 max_bytes 时按最近使用顺序淘汰
+    - 写入先落临时文件再 os.replace，并发写同一键不会产生残缺文件
+    """
+
+    def __init__(self, root: str = SUMMARY_CACHE_DIR, ttl: float = SUMMARY_CACHE_TTL,
+                 max_bytes: int = SUMMARY_CACHE_MAX_BYTES, enabled: bool = SUMMARY_CACHE_ENABLED):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # key -> 文件大小，按最近使用排序（首次访问时从磁盘按修改时间加载）
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, messages: list, endpoint: str = "") -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps([prompt_template_version(), model, endpoint], ensure_ascii=False).encode("utf-8"))
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, str):
+                content = [{"type": "text", "text": content}]
+            for part in content or []:
+                if part.get("type") == "image_url":
+                    # base64 图片体积大，只参与摘要计算
+                    url = part["image_url"]["url"]
+                    h.update(b"image:" + hashlib.sha256(url.encode("utf-8")).digest())
+                else:
+                    h.update(b"text:" + part.get("text", "").encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.md"
+
+    def _ensure_index(self):
+        if self._index is not None:
+            return
+        entries = []
+        if self.root.exists():
+            for path in self.root.glob("*/*.md"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path.stem, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total_bytes = sum(self._index.values())
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        with self._lock:
+            self._ensure_index()
+            try:
+                if time.time() - path.stat().st_mtime > self.ttl:
+                    self._remove(key)
+                    self.expired += 1
+                    self.misses += 1
+                    return None
+                markdown = path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                self._forget(key)
+                self.misses += 1
+                return None
+            if key in self._index:
+                self._index.move_to_end(key)
+            self.hits += 1
+        return markdown
+
+    def put(self, key: str, markdown: str) -> None:
+        if not self.enabled or not markdown:
+            return
+        path = self._path(key)
+        data = markdown.encode("utf-8")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入总结缓存失败 ({path})：{e}")
+            return
+        with self._lock:
+            self._ensure_index()
+            self._forget(key)
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            self.writes += 1
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _forget(self, key: str):
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _remove(self, key: str):
+        self._forget(key)
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._index) if self._index is not None else None,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+_cache: Optional[SummaryCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SummaryCache()
+    return _cache
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 保留最近多少个任务的最新状态，供新连接的订阅者立即获取
+MAX_TRACKED_TASKS = 1000
+
+
+class TaskEventBus:
+    """
+    进程内的任务事件总线：执行线程发布状态，SSE 连接订阅后由事件循环推送。
+    - publish 可在任意线程调用，通过 call_soon_threadsafe 投递到订阅者所在的事件循环
+    - 每个任务只保留最新一条状态（不含结果），订阅时先推送该快照
+    - 完成事件携带的笔记结果、转写中的字幕段（kind="segment"）与 LLM 增量（kind="markdown"）
+      只投递给当前订阅者，不在内存中保留
+    """
+
+    def __init__(self, max_tracked: int = MAX_TRACKED_TASKS):
+        self._lock = threading.Lock()
+        self._latest: "OrderedDict[str, dict]" = OrderedDict()
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._max_tracked = max_tracked
+        self.published = 0
+        self.delivered = 0
+
+    def publish(self, task_id: str, event: dict, kind: str = "status") -> None:
+        event = {**event, "kind": kind, "task_id": task_id, "timestamp": time.time()}
+        with self._lock:
+            self.published += 1
+            if kind == "status":
+                snapshot = {k: v for k, v in event.items() if k != "result"}
+                if "result" in event:
+                    snapshot["result_ready"] = True
+                self._latest[task_id] = snapshot
+                self._latest.move_to_end(task_id)
+                while len(self._latest) > self._max_tracked:
+                    self._latest.popitem(last=False)
+            targets = list(self._subscribers.get(task_id, ()))
+            self.delivered += len(targets)
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # 订阅者的事件循环已关闭
+                pass
+
+    def latest(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._latest.get(task_id)
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        """
+        需在事件循环中调用，返回的队列接收该任务之后发布的所有事件
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(task_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(task_id)
+            if not subscribers:
+                return
+            for entry in [e for e in subscribers if e[1] is queue]:
+                subscribers.discard(entry)
+            if not subscribers:
+                del self._subscribers[task_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tracked_tasks": len(self._latest),
+                "subscribed_tasks": len(self._subscribers),
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+                "published": self.published,
+                "delivered": self.delivered,
+            }
+
+
+_bus: Optional[TaskEventBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_task_event_bus() -> TaskEventBus:
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = TaskEventBus()
+    return _bus
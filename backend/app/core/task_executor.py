@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Union
+
+from dotenv import load_dotenv
+
+from app.core.cancellation import check_cancelled
+from app.core.fair_queue import FairTaskQueue
+from app.core.stage_pipeline import current_pipeline_stage
+from app.enmus.task_priority_enums import TaskPriority
+from app.enmus.task_stage_enums import TaskStage
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 同时处理的任务数（超出部分进入队列排队）
+MAX_CONCURRENT_TASKS = int(os.getenv("MAX_CONCURRENT_TASKS", 4))
+
+# 各阶段并发上限：下载(I/O)、转写(CPU)、总结(网络)、截图(ffmpeg)
+STAGE_CONCURRENCY = {
+    TaskStage.DOWNLOAD: int(os.getenv("DOWNLOAD_CONCURRENCY", 4)),
+    TaskStage.TRANSCRIBE: int(os.getenv("TRANSCRIBE_CONCURRENCY", 1)),
+    TaskStage.SUMMARIZE: int(os.getenv("SUMMARIZE_CONCURRENCY", 4)),
+    TaskStage.SCREENSHOT: int(os.getenv("SCREENSHOT_CONCURRENCY", 2)),
+}
+
+
+class StageLimiter:
+    """
+    单个阶段的并发限制器，记录正在执行与等待中的数量
+    """
+
+    def __init__(self, stage: TaskStage, limit: int):
+        self.stage = stage
+        self.limit = max(1, limit)
+        self._semaphore = threading.BoundedSemaphore(self.limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            self.waiting += 1
+        try:
+            # 排队等待名额期间任务被取消则直接退出，不再占用名额
+            while not self._semaphore.acquire(timeout=0.5):
+                check_cancelled()
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"limit": self.limit, "in_flight": self.in_flight, "waiting": self.waiting}
+
+
+class NoteTaskExecutor:
+    """
+    有界的笔记任务执行器：
+    - 固定数量的工作线程从队列中取任务执行，突发提交时任务排队而不是无限并发
+    - 排队顺序由 FairTaskQueue 决定（优先级 + 按客户端加权公平，可选短任务优先）
+    - 每个阶段单独限流，NoteGenerator 在进入阶段时通过 stage() 占用名额
+    """
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_TASKS,
+                 stage_limits: Optional[Dict[TaskStage, int]] = None):
+        self.max_workers = max(1, max_workers)
+        self._limiters = {
+            stage: StageLimiter(stage, limit)
+            for stage, limit in (stage_limits or STAGE_CONCURRENCY).items()
+        }
+        self._queue = FairTaskQueue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._running: Dict[str, float] = {}
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._shutdown = False
+
+    # ---------------- 任务提交 ----------------
+
+    def submit(self, task_id: str, fn: Callable, *args, client_id: Optional[str] = None,
+               priority: TaskPriority = TaskPriority.INTERACTIVE, expected_seconds: Optional[float] = None,
+               **kwargs) -> None:
+        """
+        提交一个任务到队列
+
+        :param task_id: 任务 ID
+        :param fn: 实际执行的函数
+        :param client_id: 提交方标识，同一客户端的任务共享一个公平队列
+        :param priority: 优先级类别
+        :param expected_seconds: 预计耗时（秒），sjf 策略下用于排序
+        """
+        if self._shutdown:
+            raise RuntimeError("任务执行器已关闭")
+        self._ensure_workers()
+        with self._lock:
+            self._submitted += 1
+        self._queue.put(task_id, (task_id, fn, args, kwargs), client_id=client_id, priority=priority,
+                        expected_seconds=expected_seconds)
+        logger.info(f"任务入队 (task_id={task_id}, client={client_id}, priority={TaskPriority(priority).value})，"
+                    f"当前排队数：{self._queue.qsize()}")
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"note-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            logger.info(f"任务执行器启动，工作线程数：{self.max_workers}")
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            task_id, fn, args, kwargs = item
+            with self._lock:
+                self._running[task_id] = time.time()
+            try:
+                fn(*args, **kwargs)
+                with self._lock:
+                    self._completed += 1
+            except Exception as e:
+                logger.error(f"任务执行异常 (task_id={task_id})：{e}", exc_info=True)
+                with self._lock:
+                    self._failed += 1
+            finally:
+                with self._lock:
+                    self._running.pop(task_id, None)
+
+    # ---------------- 阶段限流 ----------------
+
+    @contextmanager
+    def stage(self, stage: Union[TaskStage, str]):
+        """
+        占用某个阶段的并发名额，用法：with executor.stage(TaskStage.TRANSCRIBE): ...
+        流水线模式下，在同名阶段的工作线程中其并发已由阶段线程池决定，不再重复限流；
+        其他阶段中嵌套的调用（如下载阶段生成拼图时的截图）仍需占用名额
+        """
+        stage = TaskStage(stage)
+        limiter = self._limiters.get(stage)
+        if limiter is None or current_pipeline_stage() == stage.value:
+            yield
+            return
+        with limiter.acquire():
+            yield
+
+    # ---------------- 状态 ----------------
+
+    def describe(self, task_id: str) -> Optional[dict]:
+        """
+        任务的调度信息（排队位置或出队时的调度决策）
+        """
+        return self._queue.describe(task_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = list(self._running.keys())
+            counters = {
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self._queue.qsize(),
+            "in_flight": len(running),
+            "running_tasks": running,
+            "stages": {stage.value: limiter.stats() for stage, limiter in self._limiters.items()},
+            "scheduler": self._queue.stats(),
+            **counters,
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._shutdown = True
+        self._queue.close()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+_executor: Optional[NoteTaskExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_task_executor() -> NoteTaskExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = NoteTaskExecutor()
+    return _executor
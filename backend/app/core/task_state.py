@@ -0,0 +1,241 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+NOTE_OUTPUT_DIR = Path(os.getenv("NOTE_OUTPUT_DIR", "note_results"))
+TASK_BACKEND = os.getenv("TASK_BACKEND", "local")
+# 状态后台落盘的间隔（秒），同一任务在间隔内的多次变更只写一次
+TASK_STATE_FLUSH_INTERVAL = float(os.getenv("TASK_STATE_FLUSH_INTERVAL", 0.5))
+# 内存中最多保留的任务状态数，超出后淘汰最久未更新且已落盘的记录
+TASK_STATE_MAX_ENTRIES = int(os.getenv("TASK_STATE_MAX_ENTRIES", 10000))
+
+TERMINAL_STATUSES = ("SUCCESS", "FAILED", "CANCELLED")
+
+
+class TaskStateStore:
+    """
+    任务状态的内存存储，读写均为 O(1) 字典操作，后台线程批量写回：
+    - 写入先更新内存并标记为脏，由落盘线程合并后写 {task_id}.status.json 与 note_jobs 表
+    - 终态（SUCCESS/FAILED/CANCELLED）同步落盘，保证重启恢复与跨进程读取不会看到过期状态
+    - 读取未命中时从状态文件/数据库加载一次，兼容旧版本写下的状态文件
+    - celery 后端下任务在其他进程执行，内存中的非终态不可信，读取时回查数据库
+    """
+
+    def __init__(self, output_dir: Path = NOTE_OUTPUT_DIR, flush_interval: float = TASK_STATE_FLUSH_INTERVAL,
+                 max_entries: int = TASK_STATE_MAX_ENTRIES, authoritative: bool = TASK_BACKEND != "celery"):
+        self.output_dir = Path(output_dir)
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.authoritative = authoritative
+        self._lock = threading.Lock()
+        # 串行化落盘：后台批量写回与终态同步写回不能交错，否则旧状态可能覆盖已写下的终态
+        self._flush_lock = threading.Lock()
+        self._states: "OrderedDict[str, dict]" = OrderedDict()
+        self._dirty: Dict[str, dict] = {}
+        # 每个任务最近一次落盘的版本号
+        self._written: Dict[str, int] = {}
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.writes = 0
+        self.flushes = 0
+        self.flushed_entries = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ---------------- 写入 ----------------
+
+    def set(self, task_id: str, status: str, message: Optional[str] = None,
+            progress: Optional[dict] = None) -> dict:
+        with self._lock:
+            previous = self._states.get(task_id)
+            state = {
+                "status": status,
+                "message": message,
+                "progress": progress,
+                "version": (previous["version"] + 1) if previous else 1,
+                "updated_at": time.time(),
+            }
+            self._states[task_id] = state
+            self._states.move_to_end(task_id)
+            self._dirty[task_id] = state
+            self.writes += 1
+            self._evict()
+        if status in TERMINAL_STATUSES:
+            self.flush([task_id])
+        else:
+            self._ensure_flusher()
+            self._wakeup.set()
+        return state
+
+    def set_progress(self, task_id: str, status: str, progress: dict) -> Optional[dict]:
+        """
+        更新阶段内进度，只改内存、不落盘；任务已不处于 status 状态时忽略并返回 None
+        """
+        with self._lock:
+            current = self._states.get(task_id)
+            if current is None or current["status"] != status:
+                return None
+            state = {**current, "progress": progress, "version": current["version"] + 1, "updated_at": time.time()}
+            self._states[task_id] = state
+            return state
+
+    def _evict(self):
+        # 只淘汰已落盘的记录，未落盘的保留到下次写回
+        while len(self._states) > self.max_entries:
+            for task_id in self._states:
+                if task_id not in self._dirty:
+                    del self._states[task_id]
+                    self._written.pop(task_id, None)
+                    break
+            else:
+                return
+
+    # ---------------- 读取 ----------------
+
+    def get(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            state = self._states.get(task_id)
+            if state is not None and (self.authoritative or state["status"] in TERMINAL_STATUSES):
+                self.hits += 1
+                return state
+            self.misses += 1
+        loaded = self._load(task_id)
+        if loaded is None:
+            return state
+        with self._lock:
+            current = self._states.get(task_id)
+            if current is not None and task_id in self._dirty:
+                # 加载期间本进程又写入了新状态，以内存为准
+                return current
+            loaded["version"] = (current["version"] + 1) if current and current["status"] != loaded["status"] \
+                else (current["version"] if current else 1)
+            self._states[task_id] = loaded
+            self._states.move_to_end(task_id)
+            self._evict()
+        return loaded
+
+    def _load(self, task_id: str) -> Optional[dict]:
+        status_file = self.output_dir / f"{task_id}.status.json"
+        # celery 后端下状态文件由本进程写入，可能落后于 worker，优先读数据库
+        if self.authoritative and status_file.exists():
+            try:
+                data = json.loads(status_file.read_text(encoding="utf-8"))
+                return {"status": data.get("status"), "message": data.get("message"),
+                        "updated_at": status_file.stat().st_mtime}
+            except Exception as e:
+                logger.warning(f"读取状态文件失败 (task_id={task_id})：{e}")
+        from app.db.note_job_dao import get_note_job
+        job = get_note_job(task_id)
+        if job:
+            updated_at = job["updated_at"].timestamp() if job.get("updated_at") else time.time()
+            return {"status": job["status"], "message": job["message"], "updated_at": updated_at}
+        return None
+
+    # ---------------- 落盘 ----------------
+
+    def flush(self, task_ids=None) -> int:
+        """
+        将脏记录写回状态文件与数据库
+
+        :param task_ids: 仅写回指定任务，None 表示全部
+        :return: 写回的记录数
+        """
+        with self._flush_lock:
+            with self._lock:
+                if task_ids is None:
+                    batch, self._dirty = self._dirty, {}
+                else:
+                    batch = {t: self._dirty.pop(t) for t in task_ids if t in self._dirty}
+                # 跳过比已落盘版本更旧的记录
+                batch = {t: s for t, s in batch.items() if s["version"] > self._written.get(t, 0)}
+            if not batch:
+                return 0
+            from app.db.note_job_dao import update_note_job_statuses
+            update_note_job_statuses({t: (s["status"], s["message"]) for t, s in batch.items()})
+            for task_id, state in batch.items():
+                self._write_status_file(task_id, state)
+            with self._lock:
+                for task_id, state in batch.items():
+                    self._written[task_id] = state["version"]
+                self.flushes += 1
+                self.flushed_entries += len(batch)
+            return len(batch)
+
+    def _write_status_file(self, task_id: str, state: dict):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        status_file = self.output_dir / f"{task_id}.status.json"
+        data = {"status": state["status"]}
+        if state["message"]:
+            data["message"] = state["message"]
+        try:
+            temp_file = status_file.with_suffix(".tmp")
+            with temp_file.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            temp_file.replace(status_file)
+        except Exception as e:
+            logger.error(f"写入状态文件失败 (task_id={task_id})：{e}")
+
+    def _ensure_flusher(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(target=self._flush_loop, name="task-state-flusher", daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # 攒一个间隔内的变更再批量写回
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"任务状态落盘失败：{e}")
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._states),
+                "dirty": len(self._dirty),
+                "writes": self.writes,
+                "flushes": self.flushes,
+                "flushed_entries": self.flushed_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_store: Optional[TaskStateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_task_state_store() -> TaskStateStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TaskStateStore()
+                # 进程退出前写回尚未落盘的状态
+                atexit.register(_store.close)
+    return _store
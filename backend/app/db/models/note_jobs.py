@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, func
+
+from app.db.engine import Base
+
+
+class NoteJob(Base):
+    __tablename__ = "note_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(String, unique=True, nullable=False)
+    params = Column(Text, nullable=False)          # 请求参数（JSON）
+    status = Column(String, nullable=False, default="PENDING")
+    stage = Column(String, nullable=True)          # 最近一个已完成的阶段
+    artifacts = Column(Text, nullable=True)        # 各阶段产出的缓存文件（JSON）
+    message = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    celery_id = Column(String, nullable=True)      # 本次执行对应的 Celery 消息 ID（每次重试不同）
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
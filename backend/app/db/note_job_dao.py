@@ -0,0 +1,160 @@
+import json
+from typing import Optional
+
+from app.db.models.note_jobs import NoteJob
+from app.db.engine import get_db
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FINISHED_STATUSES = ("SUCCESS", "FAILED", "CANCELLED")
+
+
+def _job_to_dict(job: NoteJob) -> dict:
+    return {
+        "task_id": job.task_id,
+        "params": json.loads(job.params or "{}"),
+        "status": job.status,
+        "stage": job.stage,
+        "artifacts": json.loads(job.artifacts or "{}"),
+        "message": job.message,
+        "attempts": job.attempts,
+        "celery_id": job.celery_id,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+# 新建或重置任务（重试时复用 task_id）
+def upsert_note_job(task_id: str, params: dict):
+    db = next(get_db())
+    try:
+        job = db.query(NoteJob).filter_by(task_id=task_id).first()
+        if job:
+            job.params = json.dumps(params, ensure_ascii=False)
+            job.status = "PENDING"
+            job.message = None
+            job.attempts = (job.attempts or 0) + 1
+        else:
+            db.add(NoteJob(task_id=task_id, params=json.dumps(params, ensure_ascii=False),
+                           status="PENDING", attempts=1))
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to upsert note job: {e}")
+    finally:
+        db.close()
+
+
+def update_note_job_status(task_id: str, status: str, message: Optional[str] = None):
+    db = next(get_db())
+    try:
+        job = db.query(NoteJob).filter_by(task_id=task_id).first()
+        if not job:
+            return
+        job.status = status
+        job.message = message
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to update note job status: {e}")
+    finally:
+        db.close()
+
+
+# 记录本次执行投递的 Celery 消息 ID（取消/获取结果时使用）
+def set_note_job_celery_id(task_id: str, celery_id: str):
+    db = next(get_db())
+    try:
+        job = db.query(NoteJob).filter_by(task_id=task_id).first()
+        if not job:
+            return
+        job.celery_id = celery_id
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to set note job celery id: {e}")
+    finally:
+        db.close()
+
+
+# 记录已完成的阶段及其产物
+def mark_note_job_stage(task_id: str, stage: str, artifacts: Optional[dict] = None):
+    db = next(get_db())
+    try:
+        job = db.query(NoteJob).filter_by(task_id=task_id).first()
+        if not job:
+            return
+        merged = json.loads(job.artifacts or "{}")
+        merged.update(artifacts or {})
+        job.stage = stage
+        job.artifacts = json.dumps(merged, ensure_ascii=False)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to mark note job stage: {e}")
+    finally:
+        db.close()
+
+
+def get_note_job(task_id: str) -> Optional[dict]:
+    db = next(get_db())
+    try:
+        job = db.query(NoteJob).filter_by(task_id=task_id).first()
+        return _job_to_dict(job) if job else None
+    finally:
+        db.close()
+
+
+# 统计未完成的任务数（用于准入控制估算积压）
+def count_unfinished_note_jobs() -> int:
+    db = next(get_db())
+    try:
+        return db.query(NoteJob).filter(NoteJob.status.notin_(FINISHED_STATUSES)).count()
+    except Exception as e:
+        logger.error(f"Failed to count unfinished note jobs: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+# 查询所有未完成的任务（用于启动时恢复、磁盘清理时保护在途产物）
+def get_unfinished_note_jobs(raise_on_error: bool = False) -> list:
+    db = next(get_db())
+    try:
+        jobs = (
+            db.query(NoteJob)
+            .filter(NoteJob.status.notin_(FINISHED_STATUSES))
+            .order_by(NoteJob.created_at.asc())
+            .all()
+        )
+        return [_job_to_dict(job) for job in jobs]
+    except Exception as e:
+        logger.error(f"Failed to get unfinished note jobs: {e}")
+        if raise_on_error:
+            raise
+        return []
+    finally:
+        db.close()
+
+
+# 批量更新任务状态（状态存储后台落盘时使用），updates: {task_id: (status, message)}
+# 已结束的任务不会被改回未完成状态（迟到的写回或其他进程的旧状态），重试由 upsert_note_job 重置
+def update_note_job_statuses(updates: dict) -> int:
+    if not updates:
+        return 0
+    db = next(get_db())
+    try:
+        jobs = db.query(NoteJob).filter(NoteJob.task_id.in_(list(updates.keys()))).all()
+        updated = 0
+        for job in jobs:
+            status, message = updates[job.task_id]
+            if job.status in FINISHED_STATUSES and status not in FINISHED_STATUSES:
+                logger.warning(f"Skip stale status {status} for finished note job {job.task_id} ({job.status})")
+                continue
+            job.status, job.message = status, message
+            updated += 1
+        db.commit()
+        return updated
+    except Exception as e:
+        logger.error(f"Failed to update note job statuses: {e}")
+        db.rollback()
+        return 0
+    finally:
+        db.close()
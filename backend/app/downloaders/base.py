@@ -1,9 +1,11 @@
+import asyncio
 import enum
 
 from abc import ABC, abstractmethod
 from typing import Optional, Union
 
 from app.enmus.note_enums import DownloadQuality
+from app.models.audio_model import VideoProbeResult
 from app.models.notes_model import AudioDownloadResult
 from os import getenv
 QUALITY_MAP = {
@@ -19,11 +21,22 @@ class Downloader(ABC):
         self.quality = QUALITY_MAP.get('fast')
         self.cache_data=getenv('DATA_DIR')
 
+    def probe(self, video_url: str) -> Optional[VideoProbeResult]:
+        '''
+        只获取视频元信息（ID、标题、时长）而不下载，不支持的平台返回 None
+
+        :param video_url: 资源链接
+        :return: VideoProbeResult，其 raw_info 可传给 download 复用
+        '''
+        return None
+
     @abstractmethod
     def download(self, video_url: str, output_dir: str = None,
-                 quality: DownloadQuality = "fast", need_video: Optional[bool] = False) -> AudioDownloadResult:
+                 quality: DownloadQuality = "fast", need_video: Optional[bool] = False,
+                 probe: Optional[VideoProbeResult] = None) -> AudioDownloadResult:
         '''
 
+        :param probe: 探测阶段得到的元信息，传入时不再重复获取视频信息
         :param need_video:
         :param video_url: 资源链接
         :param output_dir: 输出路径 默认根目录data
@@ -36,3 +49,17 @@ class Downloader(ABC):
     def download_video(self, video_url: str,
                        output_dir: Union[str, None] = None) -> str:
         pass
+
+    async def download_async(self, video_url: str, output_dir: str = None,
+                             quality: DownloadQuality = "fast", need_video: Optional[bool] = False,
+                             probe: Optional[VideoProbeResult] = None) -> AudioDownloadResult:
+        '''
+        异步下载音频，默认在线程中执行同步的 download；支持原生异步 I/O 的下载器可覆盖
+        '''
+        return await asyncio.to_thread(self.download, video_url, output_dir, quality, need_video, probe)
+
+    async def download_video_async(self, video_url: str, output_dir: Union[str, None] = None) -> str:
+        '''
+        异步下载视频，默认在线程中执行同步的 download_video
+        '''
+        return await asyncio.to_thread(self.download_video, video_url, output_dir)
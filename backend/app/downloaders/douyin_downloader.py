@@ -9,15 +9,21 @@ import httpx
 import requests
 from pydantic import BaseModel
 
+from app.core.cancellation import check_cancelled
+from app.core.progress import report_progress
 from app.downloaders.base import Downloader
 from app.downloaders.douyin_helper.abogus import ABogus
 from app.enmus.note_enums import DownloadQuality
-from app.models.audio_model import AudioDownloadResult
+from app.enmus.task_status_enums import TaskStatus
+from app.models.audio_model import AudioDownloadResult, VideoProbeResult
 from app.services.cookie_manager import CookieConfigManager
+from app.utils.async_http import download_to_file, get_async_client
+from app.utils.logger import get_logger
 from app.utils.path_helper import get_data_dir
 from dotenv import load_dotenv
 
 load_dotenv()
+logger = get_logger(__name__)
 DOUYIN_DOMAIN = "https://www.douyin.com"
 
 cfm=CookieConfigManager()
@@ -114,7 +120,7 @@ class DouyinDownloader(Downloader):
         super().__init__()
         self.headers_config = DouyinConfig.HEADERS.copy()
         self.headers_config["Cookie"] = cfm.get('douyin')
-        print(self.headers_config)
+        logger.debug(f"抖音请求头配置：{self.headers_config}")
         self.proxies_config = DouyinConfig.PROXIES.copy()
         self.ttwid_config = DouyinConfig.TTWID.copy()
         self.ms_token_config = DouyinConfig.MS_TOKEN.copy()
@@ -134,6 +140,21 @@ class DouyinDownloader(Downloader):
                 url = response.url
             except Exception as e:
                 return ""
+        return self._match_aweme_id(url)
+
+    async def extract_video_id_async(self, url: str) -> str:
+        video_url = self.find_url(url)
+
+        if len(video_url):
+            try:
+                response = await get_async_client().head(video_url[0], follow_redirects=True)
+                url = str(response.url)
+            except Exception as e:
+                return ""
+        return self._match_aweme_id(url)
+
+    @staticmethod
+    def _match_aweme_id(url: str) -> str:
         patterns = [
             r'video/(\d+)',
             r'aweme_id=(\d+)',
@@ -144,21 +165,41 @@ class DouyinDownloader(Downloader):
                 return match.group(1)
         return ""
 
+    def _ms_token_request(self) -> tuple:
+        payload = json.dumps(
+            {
+                "magic": self.ms_token_config["magic"],
+                "version": self.ms_token_config["version"],
+                "dataType": self.ms_token_config["dataType"],
+                "strData": self.ms_token_config["strData"],
+                "tspFromClient": get_timestamp(),
+            }
+        )
+        headers = {
+            "User-Agent": self.headers_config["User-Agent"],
+            "Content-Type": "application/json",
+        }
+        return payload, headers
+
+    @staticmethod
+    def _check_ms_token(response) -> str:
+        msToken = str(httpx.Cookies(response.cookies).get("msToken"))
+        if len(msToken) not in [120, 128]:
+            raise ValueError("响应内容：{0}， Douyin msToken API 的响应内容不符合要求。".format(msToken))
+        return msToken
+
+    async def gen_real_msToken_async(self) -> str:
+        payload, headers = self._ms_token_request()
+        try:
+            response = await get_async_client().post(self.ms_token_config["url"], content=payload, headers=headers)
+            response.raise_for_status()
+            return self._check_ms_token(response)
+        except Exception as e:
+            raise ValueError("Douyin msToken API 请求失败：{0}".format(e))
+
     def gen_real_msToken(self) -> str:
         try:
-            payload = json.dumps(
-                {
-                    "magic": self.ms_token_config["magic"],
-                    "version": self.ms_token_config["version"],
-                    "dataType": self.ms_token_config["dataType"],
-                    "strData": self.ms_token_config["strData"],
-                    "tspFromClient": get_timestamp(),
-                }
-            )
-            headers = {
-                "User-Agent": self.headers_config["User-Agent"],
-                "Content-Type": "application/json",
-            }
+            payload, headers = self._ms_token_request()
             transport = httpx.HTTPTransport(retries=5)
             with httpx.Client(transport=transport) as client:
                 try:
@@ -166,12 +207,7 @@ class DouyinDownloader(Downloader):
                         self.ms_token_config["url"], content=payload, headers=headers
                     )
                     response.raise_for_status()
-
-                    msToken = str(httpx.Cookies(response.cookies).get("msToken"))
-                    if len(msToken) not in [120, 128]:
-                        raise ValueError("响应内容：{0}， Douyin msToken API 的响应内容不符合要求。".format(msToken))
-
-                    return msToken
+                    return self._check_ms_token(response)
                 except Exception as e:
                     raise ValueError("Douyin msToken API 请求失败：{0}".format(e))
         except Exception as e:
@@ -182,42 +218,130 @@ class DouyinDownloader(Downloader):
 
             aweme_id = self.extract_video_id(video_url)
             kwargs = self.headers_config
-            print("@kwargs:", kwargs)
-            base_params = BaseRequestModel().model_dump()
-            base_params["msToken"] = self.gen_real_msToken()
-
-            base_params["aweme_id"] = aweme_id
-            bogus = ABogus()
-            ab_value = bogus.get_value(base_params)
-            a_bogus = quote(ab_value, safe='')
-            print("@a_bogus:", a_bogus)
-            print(base_params)
-            query_str = urlencode(base_params)
-            full_url = f"{DOUYIN_DOMAIN}/aweme/v1/web/aweme/detail/?{query_str}&a_bogus={a_bogus}"
-
-            print("Request URL:", full_url)
+            logger.debug(f"@kwargs: {kwargs}")
+            full_url = self._detail_url(aweme_id, self.gen_real_msToken())
 
 
             response = requests.get(full_url, headers=kwargs)
 
-            print("Response JSON:", response.content)
+            logger.debug(f"Response JSON: {response.content}")
             return response.json()
         except Exception as e:
-            print("请求失败:", e)
+            logger.error(f"请求失败: {e}")
             raise ValueError("请求失败:", e)
         # print(kwargs)
 
+    @staticmethod
+    def _detail_url(aweme_id: str, ms_token: str) -> str:
+        base_params = BaseRequestModel().model_dump()
+        base_params["msToken"] = ms_token
+
+        base_params["aweme_id"] = aweme_id
+        bogus = ABogus()
+        ab_value = bogus.get_value(base_params)
+        a_bogus = quote(ab_value, safe='')
+        query_str = urlencode(base_params)
+        full_url = f"{DOUYIN_DOMAIN}/aweme/v1/web/aweme/detail/?{query_str}&a_bogus={a_bogus}"
+        logger.debug(f"Request URL: {full_url}")
+        return full_url
+
+    async def fetch_video_info_async(self, video_url: str) -> dict:
+        try:
+            aweme_id = await self.extract_video_id_async(video_url)
+            full_url = self._detail_url(aweme_id, await self.gen_real_msToken_async())
+            response = await get_async_client().get(full_url, headers=self.headers_config)
+            return response.json()
+        except Exception as e:
+            logger.error(f"请求失败: {e}")
+            raise ValueError("请求失败:", e)
+
+    def probe(self, video_url: str) -> Optional[VideoProbeResult]:
+        video_data = self.fetch_video_info(video_url)
+        detail = video_data['aweme_detail']
+        duration = detail['video'].get('duration')
+        return VideoProbeResult(
+            platform="douyin",
+            video_id=detail['aweme_id'],
+            title=detail['item_title'],
+            # 接口返回的时长单位为毫秒
+            duration=duration / 1000 if duration else None,
+            cover_url=(detail['video'].get('cover_original_scale') or {}).get('url_list', [None])[0],
+            raw_info=video_data,
+        )
+
+    @staticmethod
+    def _to_audio_result(video_data: dict, output_path: str) -> AudioDownloadResult:
+        tags = []
+        for tag in video_data['aweme_detail']['video_tag']:
+            if tag['tag_name']:
+                tags.append(tag['tag_name'])
+
+        return AudioDownloadResult(
+            file_path=output_path,
+            title=video_data['aweme_detail']['item_title'],
+            duration=video_data['aweme_detail']['video']['duration'],
+            cover_url=video_data['aweme_detail']['video']['cover_original_scale']['url_list'][0] if
+            video_data['aweme_detail']['video']['cover'] else video_data['video']['big_thumbs']['img_url'],
+            platform="douyin",
+            video_id=video_data['aweme_detail']['aweme_id'],
+            raw_info={
+                'tags': video_data['aweme_detail']['caption'] + ''.join(tags),
+            },
+            video_path=None  # ❗音频下载不包含视频路径
+        )
+
+    def _resolve_output_dir(self, output_dir: Union[str, None]) -> str:
+        if output_dir is None:
+            output_dir = get_data_dir()
+        if not output_dir:
+            output_dir = self.cache_data
+        os.makedirs(output_dir, exist_ok=True)
+        return output_dir
+
+    async def download_async(
+            self,
+            video_url: str,
+            output_dir: Union[str, None] = None,
+            quality: DownloadQuality = "fast",
+            need_video: Optional[bool] = False,
+            probe: Optional[VideoProbeResult] = None
+    ) -> AudioDownloadResult:
+        """
+        原生异步版本：视频信息与音频数据均通过共享的 httpx.AsyncClient 获取，不占用线程
+        """
+        output_dir = self._resolve_output_dir(output_dir)
+        video_data = probe.raw_info if probe else await self.fetch_video_info_async(video_url)
+        output_path = os.path.join(output_dir, f"{video_data['aweme_detail']['aweme_id']}.mp3")
+        url = video_data['aweme_detail']['music']['play_url']['uri']
+        await download_to_file(url, output_path)
+        return self._to_audio_result(video_data, output_path)
+
+    async def download_video_async(self, video_url: str, output_dir: Union[str, None] = None) -> str:
+        try:
+            output_dir = self._resolve_output_dir(output_dir)
+            video_id = await self.extract_video_id_async(video_url)
+            video_path = os.path.join(output_dir, f"{video_id}.mp4")
+            if os.path.exists(video_path):
+                return video_path
+
+            video_data = await self.fetch_video_info_async(video_url)
+            output_path = os.path.join(output_dir, f"{video_data['aweme_detail']['aweme_id']}.mp4")
+            url = video_data['aweme_detail']['video']['download_addr']['url_list'][0]
+            return await download_to_file(url, output_path, headers=self.headers_config)
+        except Exception as e:
+            logger.error(f"请求失败: {e}")
+            raise ValueError("请求失败:", e)
+
     def download(
             self,
             video_url: str,
             output_dir: Union[str, None] = None,
             quality: DownloadQuality = "fast",
-            need_video: Optional[bool] = False
+            need_video: Optional[bool] = False,
+            probe: Optional[VideoProbeResult] = None
     ) -> AudioDownloadResult:
         try:
-            print(
-                f"正在下载视频: {video_url}，保存路径: {output_dir}，质量: {quality}"
-            )
+            logger.info(f"正在下载视频: {video_url}，保存路径: {output_dir}，质量: {quality}")
             if output_dir is None:
                 output_dir = get_data_dir()
             if not output_dir:
@@ -226,38 +350,40 @@ class DouyinDownloader(Downloader):
 
             output_path = os.path.join(output_dir, "%(id)s.%(ext)s")
 
-            video_data = self.fetch_video_info(video_url)
+            video_data = probe.raw_info if probe else self.fetch_video_info(video_url)
             output_path = output_path % {
                 "id": video_data['aweme_detail']['aweme_id'],
                 "ext": "mp3",
             }
             url = video_data['aweme_detail']['music']['play_url']['uri']
             # 下载音频
-            audio_data = requests.get(url)
-            with open(output_path, 'wb') as f:
-                f.write(audio_data.content)
-            print(url)
-            tags = []
-            for tag in video_data['aweme_detail']['video_tag']:
-                if tag['tag_name']:
-                    tags.append(tag['tag_name'])
-
-            return AudioDownloadResult(
-                file_path=output_path,
-                title=video_data['aweme_detail']['item_title'],
-                duration=video_data['aweme_detail']['video']['duration'],
-                cover_url=video_data['aweme_detail']['video']['cover_original_scale']['url_list'][0] if
-                video_data['aweme_detail']['video']['cover'] else video_data['video']['big_thumbs']['img_url'],
-                platform="douyin",
-                video_id=video_data['aweme_detail']['aweme_id'],
-                raw_info={
-                    'tags': video_data['aweme_detail']['caption'] + ''.join(tags),
-                },
-                video_path=None  # ❗音频下载不包含视频路径
-            )
+            self._stream_to_file(url, output_path)
+            return self._to_audio_result(video_data, output_path)
         except Exception as e:
             raise e
 
+    @staticmethod
+    def _stream_to_file(url: str, output_path: str, headers: Optional[dict] = None) -> None:
+        """
+        分块下载并按字节数上报进度，中途失败/取消时删除不完整的文件
+        """
+        with requests.get(url, headers=headers, allow_redirects=True, stream=True) as resp:
+            resp.raise_for_status()
+            total = int(resp.headers.get("content-length") or 0) or None
+            downloaded = 0
+            try:
+                with open(output_path, 'wb') as f:
+                    for chunk in resp.iter_content(1024 * 1024):
+                        check_cancelled()
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                        report_progress(TaskStatus.DOWNLOADING, downloaded / total if total else None,
+                                        downloaded_bytes=downloaded, total_bytes=total)
+            except BaseException:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                raise
+
     def download_video(self, video_url: str, output_dir: Union[str, None] = None) -> str:
 
         try:
@@ -283,14 +409,11 @@ class DouyinDownloader(Downloader):
             }
 
             url=video_data['aweme_detail']['video']['download_addr']['url_list'][0]
-            _data = requests.get(url,allow_redirects=True,headers=self.headers_config)
-
-            with open(output_path, 'wb') as f:
-                f.write(_data.content)
+            self._stream_to_file(url, output_path, headers=self.headers_config)
 
             return output_path
         except Exception as e:
-            print("请求失败:", e)
+            logger.error(f"请求失败: {e}")
             raise ValueError("请求失败:", e)
 
 
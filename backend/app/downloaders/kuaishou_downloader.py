@@ -5,10 +5,13 @@ from typing import Union, Optional
 
 import requests
 
+from app.core.cancellation import check_cancelled, run_process
+from app.core.progress import report_progress
+from app.enmus.task_status_enums import TaskStatus
 from app.downloaders.base import Downloader
 from app.downloaders.kuaishou_helper.kuaishou import KuaiShou
 from app.enmus.note_enums import DownloadQuality
-from app.models.audio_model import AudioDownloadResult
+from app.models.audio_model import AudioDownloadResult, VideoProbeResult
 from app.utils.path_helper import get_data_dir
 
 
@@ -16,12 +19,27 @@ class KuaiShouDownloader(Downloader, ABC):
     def __init__(self):
         super().__init__()
 
+    def probe(self, video_url: str) -> Optional[VideoProbeResult]:
+        video_raw_info = KuaiShou().run(video_url)
+        photo_info = video_raw_info['visionVideoDetail']['photo']
+        duration = photo_info.get('duration')
+        return VideoProbeResult(
+            platform="kuaishou",
+            video_id=photo_info['id'],
+            title=photo_info['caption'],
+            # 接口返回的时长单位为毫秒
+            duration=duration / 1000 if duration else None,
+            cover_url=photo_info.get('coverUrl'),
+            raw_info=video_raw_info,
+        )
+
     def download(
             self,
             video_url: str,
             output_dir: Union[str, None] = None,
             quality: str = "fast",
-            need_video: Optional[bool] = False
+            need_video: Optional[bool] = False,
+            probe: Optional[VideoProbeResult] = None
     ) -> AudioDownloadResult:
         if output_dir is None:
             output_dir = get_data_dir()
@@ -29,8 +47,7 @@ class KuaiShouDownloader(Downloader, ABC):
             output_dir = self.cache_data
         os.makedirs(output_dir, exist_ok=True)
 
-        ks = KuaiShou()
-        video_raw_info = ks.run(video_url)
+        video_raw_info = probe.raw_info if probe else KuaiShou().run(video_url)
         print(video_raw_info)
         photo_info = video_raw_info['visionVideoDetail']['photo']
         video_id = photo_info['id']
@@ -56,19 +73,37 @@ class KuaiShouDownloader(Downloader, ABC):
         # 下载 mp4 视频
         resp = requests.get(photo_info['photoUrl'], stream=True)
         if resp.status_code == 200:
-            with open(mp4_path, "wb") as f:
-                for chunk in resp.iter_content(1024 * 1024):
-                    f.write(chunk)
+            total = int(resp.headers.get("content-length") or 0) or None
+            downloaded = 0
+            try:
+                with open(mp4_path, "wb") as f:
+                    for chunk in resp.iter_content(1024 * 1024):
+                        check_cancelled()
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                        report_progress(TaskStatus.DOWNLOADING, downloaded / total if total else None,
+                                        downloaded_bytes=downloaded, total_bytes=total)
+            except BaseException:
+                # 下载中断（含任务取消）时删除不完整的文件
+                resp.close()
+                if os.path.exists(mp4_path):
+                    os.remove(mp4_path)
+                raise
         else:
             raise Exception(f"视频下载失败: {resp.status_code}")
 
         # 使用 ffmpeg 转换为 mp3
         try:
-            subprocess.run([
+            run_process([
                 "ffmpeg", "-y", "-i", mp4_path, "-vn", "-acodec", "libmp3lame", mp3_path
             ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         except subprocess.CalledProcessError:
             raise Exception("ffmpeg 转换 MP3 失败")
+        except BaseException:
+            # 转换被中断时删除不完整的 mp3，避免下次被当作已下载
+            if os.path.exists(mp3_path):
+                os.remove(mp3_path)
+            raise
 
         return AudioDownloadResult(
             file_path=mp3_path,
@@ -3,9 +3,10 @@ import subprocess
 from abc import ABC
 from typing import Optional
 
+from app.core.cancellation import run_process
 from app.downloaders.base import Downloader
 from app.enmus.note_enums import DownloadQuality
-from app.models.audio_model import AudioDownloadResult
+from app.models.audio_model import AudioDownloadResult, VideoProbeResult
 import os
 import subprocess
 
@@ -44,7 +45,7 @@ class LocalDownloader(Downloader, ABC):
                 '-y',  # 覆盖
                 output_path
             ]
-            subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+            run_process(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
 
             if not os.path.exists(output_path):
                 raise RuntimeError(f"封面图片生成失败: {output_path}")
@@ -77,7 +78,7 @@ class LocalDownloader(Downloader, ABC):
                 output_path
             ]
 
-            subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+            run_process(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
 
             if not os.path.exists(output_path):
                 raise RuntimeError(f"mp3 文件生成失败: {output_path}")
@@ -102,7 +103,8 @@ class LocalDownloader(Downloader, ABC):
             video_url: str,
             output_dir: str = None,
             quality: DownloadQuality = "fast",
-            need_video: Optional[bool] = False
+            need_video: Optional[bool] = False,
+            probe: Optional[VideoProbeResult] = None
     ) -> AudioDownloadResult:
         """
         处理本地文件路径，返回音频元信息
@@ -4,7 +4,11 @@ from typing import Union, Optional
 
 import yt_dlp
 
+from app.core.cancellation import ytdlp_cancel_hook
+from app.core.progress import ytdlp_progress_hook
 from app.downloaders.base import Downloader, DownloadQuality
+from app.downloaders.ytdlp_probe import extract_info, probe_with_ytdlp
+from app.models.audio_model import VideoProbeResult
 from app.models.notes_model import AudioDownloadResult
 from app.utils.path_helper import get_data_dir
 from app.utils.url_parser import extract_video_id
@@ -15,12 +19,16 @@ class YoutubeDownloader(Downloader, ABC):
 
         super().__init__()
 
+    def probe(self, video_url: str) -> Optional[VideoProbeResult]:
+        return probe_with_ytdlp(video_url, "youtube")
+
     def download(
         self,
         video_url: str,
         output_dir: Union[str, None] = None,
         quality: DownloadQuality = "fast",
-        need_video:Optional[bool]=False
+        need_video:Optional[bool]=False,
+        probe: Optional[VideoProbeResult] = None
     ) -> AudioDownloadResult:
         if output_dir is None:
             output_dir = get_data_dir()
@@ -34,11 +42,12 @@ class YoutubeDownloader(Downloader, ABC):
             'format': 'bestaudio[ext=m4a]/bestaudio/best',
             'outtmpl': output_path,
             'noplaylist': True,
+            'progress_hooks': [ytdlp_cancel_hook, ytdlp_progress_hook],  # 任务取消时中断下载，并上报下载进度
             'quiet': False,
         }
 
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=True)
+            info = extract_info(ydl, video_url, probe)
             video_id = info.get("id")
             title = info.get("title")
             duration = info.get("duration", 0)
@@ -79,6 +88,7 @@ class YoutubeDownloader(Downloader, ABC):
             'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]',
             'outtmpl': output_path,
             'noplaylist': True,
+            'progress_hooks': [ytdlp_cancel_hook, ytdlp_progress_hook],  # 任务取消时中断下载，并上报下载进度
             'quiet': False,
             'merge_output_format': 'mp4',  # 确保合并成 mp4
         }
@@ -0,0 +1,38 @@
+import copy
+from typing import Optional
+
+import yt_dlp
+
+from app.models.audio_model import VideoProbeResult
+
+
+def probe_with_ytdlp(video_url: str, platform: str) -> VideoProbeResult:
+    """
+    使用 yt-dlp 解析视频信息但不下载
+    """
+    ydl_opts = {
+        'noplaylist': True,
+        'skip_download': True,
+        'quiet': True,
+        'socket_timeout': 15,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+    return VideoProbeResult(
+        platform=platform,
+        video_id=info.get("id"),
+        title=info.get("title"),
+        duration=info.get("duration"),
+        cover_url=info.get("thumbnail"),
+        raw_info=info,
+    )
+
+
+def extract_info(ydl: yt_dlp.YoutubeDL, video_url: str, probe: Optional[VideoProbeResult] = None) -> dict:
+    """
+    下载视频：有探测结果时直接按当前 ydl 的格式/后处理配置处理已解析的信息（与 --load-info-json 相同），
+    不再重复请求视频页面；否则照常 extract_info
+    """
+    if probe is not None and probe.raw_info:
+        return ydl.process_ie_result(copy.deepcopy(probe.raw_info), download=True)
+    return ydl.extract_info(video_url, download=True)
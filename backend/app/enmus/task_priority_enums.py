@@ -0,0 +1,6 @@
+import enum
+
+
+class TaskPriority(str, enum.Enum):
+    INTERACTIVE = "interactive"  # 用户在页面上等待结果的单个任务
+    BATCH = "batch"  # 批量提交（如整个合集/播放列表），可以延后执行
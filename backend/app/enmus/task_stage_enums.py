@@ -0,0 +1,11 @@
+import enum
+
+
+class TaskStage(str, enum.Enum):
+    """
+    笔记任务的执行阶段，每个阶段对应一类资源（I/O、CPU、网络、ffmpeg），可分别限制并发
+    """
+    DOWNLOAD = "download"
+    TRANSCRIBE = "transcribe"
+    SUMMARIZE = "summarize"
+    SCREENSHOT = "screenshot"
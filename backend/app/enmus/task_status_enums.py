@@ -11,6 +11,7 @@ class TaskStatus(str, enum.Enum):
     SAVING = "SAVING"
     SUCCESS = "SUCCESS"
     FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
 
     @classmethod
     def description(cls, status):
@@ -24,5 +25,27 @@ class TaskStatus(str, enum.Enum):
             cls.SAVING: "保存中",
             cls.SUCCESS: "完成",
             cls.FAILED: "失败",
+            cls.CANCELLED: "已取消",
         }
         return desc_map.get(status, "未知状态")
+
+    @classmethod
+    def progress(cls, status):
+        """
+        各状态对应的大致进度百分比
+        """
+        progress_map = {
+            cls.PENDING: 0,
+            cls.PARSING: 5,
+            cls.DOWNLOADING: 10,
+            cls.TRANSCRIBING: 30,
+            cls.SUMMARIZING: 60,
+            cls.FORMATTING: 85,
+            cls.SAVING: 95,
+            cls.SUCCESS: 100,
+        }
+        return progress_map.get(status)
+
+    @classmethod
+    def is_terminal(cls, status) -> bool:
+        return status in (cls.SUCCESS, cls.FAILED, cls.CANCELLED)
@@ -0,0 +1,8 @@
+class TaskCancelledError(Exception):
+    """
+    任务被用户取消，各阶段检测到取消标记后抛出，用于尽快退出当前任务
+    """
+
+    def __init__(self, task_id: str = None) -> None:
+        super().__init__(f"任务已取消 (task_id={task_id})")
+        self.task_id = task_id
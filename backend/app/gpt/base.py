@@ -11,6 +11,12 @@ class GPT(ABC):
         :return:
         '''
         pass
+    async def summarize_async(self, source:GPTSource )->str:
+        '''
+        异步总结，未实现原生异步的模型在线程中调用 summarize
+        '''
+        import asyncio
+        return await asyncio.to_thread(self.summarize, source)
     def create_messages(self, segments:list,**kwargs)->list:
         pass
     def list_models(self):
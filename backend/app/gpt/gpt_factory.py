@@ -1,13 +1,47 @@
-from openai import OpenAI
+import asyncio
+import threading
+
+from openai import AsyncOpenAI, OpenAI
 
 from app.gpt.base import GPT
 from app.gpt.provider.OpenAI_compatible_provider import OpenAICompatibleProvider
 from app.gpt.universal_gpt import UniversalGPT
 from app.models.model_config import ModelConfig
 
+# OpenAI 客户端内部持有连接池且线程安全，按 (api_key, base_url) 复用，避免每个任务重新建连
+_clients = {}
+# AsyncOpenAI 的连接池绑定事件循环，额外按事件循环区分
+_async_clients = {}
+_clients_lock = threading.Lock()
+
 
 class GPTFactory:
     @staticmethod
-    def from_config(config: ModelConfig) -> GPT:
-        client = OpenAICompatibleProvider(api_key=config.api_key, base_url=config.base_url).get_client
-        return UniversalGPT(client=client, model=config.model_name)
\ No newline at end of file
+    def get_client(api_key: str, base_url: str) -> OpenAI:
+        key = (api_key, base_url)
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = OpenAICompatibleProvider(api_key=api_key, base_url=base_url).get_client
+                _clients[key] = client
+            return client
+
+    @staticmethod
+    def get_async_client(api_key: str, base_url: str) -> AsyncOpenAI:
+        """
+        需在事件循环中调用
+        """
+        key = (api_key, base_url, id(asyncio.get_running_loop()))
+        with _clients_lock:
+            client = _async_clients.get(key)
+            if client is None:
+                client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+                _async_clients[key] = client
+            return client
+
+    @staticmethod
+    def from_config(config: ModelConfig, use_async: bool = False) -> GPT:
+        # UniversalGPT 在 summarize 时会写入 screenshot/link 等实例属性，因此每个任务单独创建，仅共享底层客户端
+        client = GPTFactory.get_client(config.api_key, config.base_url)
+        async_client = GPTFactory.get_async_client(config.api_key, config.base_url) if use_async else None
+        return UniversalGPT(client=client, model=config.model_name, async_client=async_client)
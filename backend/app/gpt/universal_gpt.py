@@ -1,3 +1,8 @@
+from app.core.cancellation import check_cancelled, on_cancel
+from app.core.partial_markdown import PartialMarkdown
+from app.core.progress import report_progress
+from app.core.summary_cache import SummaryCache, get_summary_cache
+from app.enmus.task_status_enums import TaskStatus
 from app.gpt.base import GPT
 from app.gpt.prompt_builder import generate_base_prompt
 from app.models.gpt_model import GPTSource
@@ -6,11 +11,13 @@ from app.gpt.utils import fix_markdown
 from app.models.transcriber_model import TranscriptSegment
 from datetime import timedelta
 from typing import List
+import asyncio
 
 
 class UniversalGPT(GPT):
-    def __init__(self, client, model: str, temperature: float = 0.7):
+    def __init__(self, client, model: str, temperature: float = 0.7, async_client=None):
         self.client = client
+        self.async_client = async_client
         self.model = model
         self.temperature = temperature
         self.screenshot = False
@@ -63,12 +70,12 @@ class UniversalGPT(GPT):
     def list_models(self):
         return self.client.models.list()
 
-    def summarize(self, source: GPTSource) -> str:
+    def _source_messages(self, source: GPTSource) -> list:
         self.screenshot = source.screenshot
         self.link = source.link
         source.segment = self.ensure_segments_type(source.segment)
 
-        messages = self.create_messages(
+        return self.create_messages(
             source.segment,
             title=source.title,
             tags=source.tags,
@@ -77,9 +84,80 @@ class UniversalGPT(GPT):
             style=source.style,
             extras=source.extras
         )
-        response = self.client.chat.completions.create(
+
+    def _cache_key(self, messages: list) -> str:
+        return SummaryCache.make_key(self.model, messages, str(getattr(self.client, "base_url", "") or ""))
+
+    @staticmethod
+    def _replay_cached(markdown: str) -> str:
+        # 命中缓存时整体推送一次，SSE 客户端与流式生成时看到的内容一致
+        with PartialMarkdown() as partial:
+            partial.append(markdown)
+        report_progress(TaskStatus.SUMMARIZING, 1.0)
+        return markdown
+
+    def summarize(self, source: GPTSource) -> str:
+        messages = self._source_messages(source)
+        cache_key = self._cache_key(messages)
+        cached = get_summary_cache().get(cache_key)
+        if cached is not None:
+            return self._replay_cached(cached)
+        # 以流式方式请求，任务取消时关闭连接即可中止生成，而不必等待完整响应
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.7,
+            stream=True,
+        )
+        parts = []
+        # 增量写入临时笔记并推送给前端，完整文本仍在结束后统一返回
+        with on_cancel(stream.close), PartialMarkdown() as partial:
+            try:
+                for chunk in stream:
+                    check_cancelled()
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        partial.append(chunk.choices[0].delta.content)
+                        # 输出长度未知，只上报已接收的 token（增量）数
+                        report_progress(TaskStatus.SUMMARIZING, tokens=len(parts))
+            except Exception:
+                # 连接被取消回调关闭时，底层抛出的网络异常统一转换为取消异常
+                check_cancelled()
+                raise
+            finally:
+                stream.close()
+        markdown = "".join(parts).strip()
+        get_summary_cache().put(cache_key, markdown)
+        return markdown
+
+    async def summarize_async(self, source: GPTSource) -> str:
+        """
+        使用 AsyncOpenAI 流式请求，等待响应期间不占用线程；任务取消时协程被取消，连接随之关闭
+        """
+        if self.async_client is None:
+            raise RuntimeError("未配置异步客户端")
+        messages = self._source_messages(source)
+        cache_key = self._cache_key(messages)
+        cached = await asyncio.to_thread(get_summary_cache().get, cache_key)
+        if cached is not None:
+            return self._replay_cached(cached)
+        stream = await self.async_client.chat.completions.create(
             model=self.model,
             messages=messages,
-            temperature=0.7
+            temperature=0.7,
+            stream=True,
         )
-        return response.choices[0].message.content.strip()
+        parts = []
+        try:
+            with PartialMarkdown() as partial:
+                async for chunk in stream:
+                    check_cancelled()
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        partial.append(chunk.choices[0].delta.content)
+                        report_progress(TaskStatus.SUMMARIZING, tokens=len(parts))
+        finally:
+            await stream.close()
+        markdown = "".join(parts).strip()
+        await asyncio.to_thread(get_summary_cache().put, cache_key, markdown)
+        return markdown
@@ -13,3 +13,13 @@ class AudioDownloadResult:
     raw_info: dict               # yt-dlp 的原始 info 字典
     video_path: Optional[str] = None  #  新增字段：可选视频文件路径
 
+
+
+@dataclass
+class VideoProbeResult:
+    platform: str                # 平台
+    video_id: str                # 平台返回的规范视频ID（短链接解析后）
+    title: str                   # 视频标题
+    duration: Optional[float]    # 视频时长（秒），未知时为 None
+    cover_url: Optional[str]     # 视频封面图
+    raw_info: dict               # 平台原始信息，下载时直接复用，避免重复请求
@@ -0,0 +1,47 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, List, Optional
+
+from app.enmus.note_enums import DownloadQuality
+from app.models.audio_model import AudioDownloadResult, VideoProbeResult
+from app.models.transcriber_model import TranscriptResult
+
+
+@dataclass
+class NoteTaskContext:
+    """
+    单个笔记任务在各阶段之间流转的上下文：请求参数 + 各阶段产出
+    """
+    task_id: Optional[str]
+    video_url: str
+    platform: str
+    quality: DownloadQuality = DownloadQuality.medium
+    model_name: Optional[str] = None
+    provider_id: Optional[str] = None
+    link: bool = False
+    screenshot: bool = False
+    formats: List[str] = field(default_factory=list)
+    style: Optional[str] = None
+    extras: Optional[str] = None
+    output_path: Optional[str] = None
+    video_understanding: bool = False
+    video_interval: int = 0
+    grid_size: List[int] = field(default_factory=list)
+    resume: bool = False
+    # 本地转写模型尺寸（如 tiny / large-v3-turbo），为空时使用 WHISPER_MODEL_SIZE
+    transcriber_model: Optional[str] = None
+
+    # 运行时依赖（准备阶段填充）
+    downloader: Any = None
+    gpt: Any = None
+    audio_cache_file: Optional[Path] = None
+    transcript_cache_file: Optional[Path] = None
+    markdown_cache_file: Optional[Path] = None
+    probe: Optional[VideoProbeResult] = None
+
+    # 各阶段产出
+    video_path: Optional[Path] = None
+    video_img_urls: List[str] = field(default_factory=list)
+    audio_meta: Optional[AudioDownloadResult] = None
+    transcript: Optional[TranscriptResult] = None
+    markdown: Optional[str] = None
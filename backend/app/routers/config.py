@@ -4,6 +4,7 @@ from typing import Optional
 from app.utils.response import ResponseWrapper as R
 
 from app.services.cookie_manager import CookieConfigManager
+from app.transcriber.warmup import get_model_warmup
 from ffmpeg_helper import ensure_ffmpeg_or_raise
 
 router = APIRouter()
@@ -42,4 +43,16 @@ async def sys_health():
 
 @router.get("/sys_check")
 async def sys_check():
-    return R.success()
\ No newline at end of file
+    return R.success()
+
+
+@router.get("/readiness")
+def readiness():
+    """
+    就绪检查：默认转写器的模型已下载并加载时返回 200，否则返回 503 及各模型的下载/加载进度
+    """
+    warmup = get_model_warmup()
+    status = warmup.status()
+    if not status["ready"]:
+        return R.error(msg=status["message"], code=503, data=status, status_code=503)
+    return R.success(status)
\ No newline at end of file
@@ -1,25 +1,41 @@
 # app/routers/note.py
+import asyncio
 import json
 import os
 import uuid
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File
 from pydantic import BaseModel, validator, field_validator
 from dataclasses import asdict
 
+from app.core.admission import get_admission_controller
+from app.core.partial_markdown import read_partial_markdown
+from app.core.probe import check_duration_limit, probe_video
+from app.core.partial_transcript import read_partial_transcript
+from app.core.progress import build_progress
+from app.core.task_events import get_task_event_bus
+from app.core.task_state import get_task_state_store
+from app.db.note_job_dao import FINISHED_STATUSES, get_note_job
 from app.db.video_task_dao import get_task_by_video
 from app.enmus.exception import NoteErrorEnum
 from app.enmus.note_enums import DownloadQuality
+from app.enmus.task_priority_enums import TaskPriority
 from app.exceptions.note import NoteError
-from app.services.note import NoteGenerator, logger
+from app.services.constant import SUPPORT_PLATFORM_MAP
+from app.transcriber.warmup import get_model_warmup
+from app.transcriber.whisper import MODEL_MAP
+from app.services.note import NoteGenerator, logger, update_task_status
+from app.services.note_task import dispatch_note_task, get_dispatch_stats, fetch_remote_note_result, \
+    cancel_dispatched_task, describe_task_scheduling
 from app.utils.response import ResponseWrapper as R
 from app.utils.url_parser import extract_video_id
 from app.validators.video_url_validator import is_supported_video_url
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 import httpx
 from app.enmus.task_status_enums import TaskStatus
 
@@ -49,6 +65,9 @@ class VideoRequest(BaseModel):
     video_understanding: Optional[bool] = False
     video_interval: Optional[int] = 0
     grid_size: Optional[list] = []
+    priority: Optional[TaskPriority] = TaskPriority.INTERACTIVE
+    # 本地转写模型尺寸（如短视频用 tiny、重要任务用 large-v3-turbo），为空时使用服务端默认配置
+    transcriber_model: Optional[str] = None
 
     @field_validator("video_url")
     def validate_supported_url(cls, v):
@@ -62,48 +81,21 @@ class VideoRequest(BaseModel):
 
         return v
 
+    @field_validator("transcriber_model")
+    def validate_transcriber_model(cls, v):
+        if v and v not in MODEL_MAP:
+            raise ValueError(f"不支持的转写模型：{v}，可选 {', '.join(MODEL_MAP)}")
+        return v
+
 
 NOTE_OUTPUT_DIR = os.getenv("NOTE_OUTPUT_DIR", "note_results")
 UPLOAD_DIR = "uploads"
-
-
-def save_note_to_file(task_id: str, note):
-    os.makedirs(NOTE_OUTPUT_DIR, exist_ok=True)
-    with open(os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.json"), "w", encoding="utf-8") as f:
-        json.dump(asdict(note), f, ensure_ascii=False, indent=2)
-
-
-def run_note_task(task_id: str, video_url: str, platform: str, quality: DownloadQuality,
-                  link: bool = False, screenshot: bool = False, model_name: str = None, provider_id: str = None,
-                  _format: list = None, style: str = None, extras: str = None, video_understanding: bool = False,
-                  video_interval=0, grid_size=[]
-                  ):
-
-    if not model_name or not provider_id:
-        raise HTTPException(status_code=400, detail="请选择模型和提供者")
-
-    note = NoteGenerator().generate(
-        video_url=video_url,
-        platform=platform,
-        quality=quality,
-        task_id=task_id,
-        model_name=model_name,
-        provider_id=provider_id,
-        link=link,
-        _format=_format,
-        style=style,
-        extras=extras,
-        screenshot=screenshot
-        , video_understanding=video_understanding,
-        video_interval=video_interval,
-        grid_size=grid_size
-    )
-    logger.info(f"Note generated: {task_id}")
-    if not note or not note.markdown:
-        logger.warning(f"任务 {task_id} 执行失败，跳过保存")
-        return
-    save_note_to_file(task_id, note)
-
+# 批量查询状态时单次最多的任务数
+TASK_STATUS_BATCH_LIMIT = int(os.getenv("TASK_STATUS_BATCH_LIMIT", 200))
+# SSE 连接空闲时发送心跳的间隔（秒），同时回查一次任务状态
+TASK_EVENTS_KEEPALIVE = float(os.getenv("TASK_EVENTS_KEEPALIVE", 15))
+# 转写模型未就绪时建议客户端重试的间隔（秒）
+READINESS_RETRY_AFTER = 10
 
 
 @router.post('/delete_task')
@@ -129,8 +121,18 @@ async def upload(file: UploadFile = File(...)):
 
 
 @router.post("/generate_note")
-def generate_note(data: VideoRequest, background_tasks: BackgroundTasks):
+def generate_note(data: VideoRequest, request: Request):
     try:
+        # 转写模型尚未就绪时不接收新任务
+        warmup = get_model_warmup()
+        if not warmup.is_ready():
+            return R.error(
+                msg=f"服务启动中：{warmup.describe()}，请稍后重试",
+                code=503,
+                data=warmup.status(),
+                status_code=503,
+                headers={"Retry-After": str(READINESS_RETRY_AFTER)},
+            )
 
         video_id = extract_video_id(data.video_url, data.platform)
         # if not video_id:
@@ -141,84 +143,289 @@ def generate_note(data: VideoRequest, background_tasks: BackgroundTasks):
         #         msg='笔记已生成，请勿重复发起',
         #
         #     )
+        # 准入控制：积压过多时拒绝，避免所有任务一起变慢；
+        # 排队深度与等待时间都不依赖视频时长，先于探测判断，过载时不再为被拒绝的请求发起网络探测
+        admission = get_admission_controller()
+        decision = admission.admit()
+        if not decision.admitted:
+            return R.error(
+                msg=f"服务繁忙：{decision.reason}，请稍后重试",
+                code=429,
+                data={"retry_after": decision.retry_after, "queue_depth": decision.outstanding},
+                status_code=429,
+                headers={"Retry-After": str(decision.retry_after)},
+            )
+
+        # 下载前先探测视频信息（结果会缓存，任务执行时直接复用），用于时长限制与耗时估算
+        probe = probe_video(SUPPORT_PLATFORM_MAP.get(data.platform), data.platform, data.video_url)
+        duration_error = check_duration_limit(probe)
+        if duration_error:
+            return R.error(msg=duration_error, code=400, status_code=400)
+        duration = probe.duration if probe else None
+        admission.confirm(decision, duration)
+
         if data.task_id:
             # 如果传了task_id，说明是重试！
             task_id = data.task_id
             # 更新之前的状态
-            NoteGenerator()._update_status(task_id, TaskStatus.PENDING)
+            update_task_status(task_id, TaskStatus.PENDING)
             logger.info(f"重试模式，复用已有 task_id={task_id}")
         else:
             # 正常新建任务
             task_id = str(uuid.uuid4())
 
-        background_tasks.add_task(run_note_task, task_id, data.video_url, data.platform, data.quality, data.link,
-                                  data.screenshot, data.model_name, data.provider_id, data.format, data.style,
-                                  data.extras, data.video_understanding, data.video_interval, data.grid_size)
-        return R.success({"task_id": task_id})
+        dispatch_note_task(task_id, data.video_url, data.platform, data.quality, data.link, data.screenshot,
+                           data.model_name, data.provider_id, data.format, data.style, data.extras,
+                           data.video_understanding, data.video_interval, data.grid_size,
+                           client_id=request.headers.get("X-Client-Id") or (request.client.host if request.client else None),
+                           priority=data.priority or TaskPriority.INTERACTIVE, duration=duration,
+                           transcriber_model=data.transcriber_model)
+        return R.success({
+            "task_id": task_id,
+            "queue_depth": decision.outstanding,
+            "eta_seconds": int(decision.eta_seconds),
+            "estimated_completion": datetime.fromtimestamp(decision.estimated_completion).isoformat(),
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/task_status/{task_id}")
-def get_task_status(task_id: str):
-    status_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.status.json")
-    result_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.json")
+class TaskStatusBatchRequest(BaseModel):
+    task_ids: List[str]
+    # 客户端已有的 {task_id: etag}，未变化的任务只返回 unchanged 标记
+    etags: Optional[Dict[str, str]] = None
+    include_result: bool = True
+
 
-    # 优先读状态文件
-    if os.path.exists(status_path):
-        with open(status_path, "r", encoding="utf-8") as f:
-            status_content = json.load(f)
+def _task_etag(state: Optional[dict]) -> Optional[str]:
+    """
+    由状态存储中的版本号与更新时间生成 ETag，状态、消息、进度任一变化都会改变
+    """
+    if not state:
+        return None
+    return f'"{state.get("version", 0)}-{int(state.get("updated_at", 0) * 1000)}"'
 
-        status = status_content.get("status")
-        message = status_content.get("message", "")
+
+def _task_status_payload(task_id: str, state: Optional[dict], include_result: bool = True) -> dict:
+    if state:
+        status = state["status"]
+        message = state["message"] or ""
 
         if status == TaskStatus.SUCCESS.value:
-            # 成功状态的话，继续读取最终笔记内容
-            if os.path.exists(result_path):
-                with open(result_path, "r", encoding="utf-8") as rf:
-                    result_content = json.load(rf)
-                return R.success({
-                    "status": status,
-                    "result": result_content,
-                    "message": message,
-                    "task_id": task_id
-                })
-            else:
-                # 理论上不会出现，保险处理
-                return R.success({
-                    "status": TaskStatus.PENDING.value,
-                    "message": "任务完成，但结果文件未找到",
-                    "task_id": task_id
-                })
+            if not include_result:
+                return {"status": status, "message": message, "task_id": task_id}
+            # 成功状态的话，继续读取最终笔记内容（本地没有时从 Celery 结果后端获取）
+            result_content = _load_task_result(task_id)
+            if result_content:
+                return {"status": status, "result": result_content, "message": message, "task_id": task_id}
+            # 结果尚未落盘，保险处理
+            return {"status": TaskStatus.PENDING.value, "message": "任务完成，但结果文件未找到", "task_id": task_id}
 
         if status == TaskStatus.FAILED.value:
-            return R.error(message or "任务失败", code=500)
+            return {"status": status, "message": message or "任务失败", "task_id": task_id}
 
-        # 处理中状态
-        return R.success({
+        # 处理中/已取消状态
+        return {
             "status": status,
             "message": message,
-            "task_id": task_id
-        })
+            "progress": state.get("progress") or build_progress(status),
+            "task_id": task_id,
+            "scheduler": describe_task_scheduling(task_id),
+        }
 
-    # 没有状态文件，但有结果
+    # 没有状态记录，但有结果
+    result_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.json")
     if os.path.exists(result_path):
-        with open(result_path, "r", encoding="utf-8") as f:
-            result_content = json.load(f)
-        return R.success({
-            "status": TaskStatus.SUCCESS.value,
-            "result": result_content,
-            "task_id": task_id
-        })
+        payload = {"status": TaskStatus.SUCCESS.value, "task_id": task_id}
+        if include_result:
+            with open(result_path, "r", encoding="utf-8") as f:
+                payload["result"] = json.load(f)
+        return payload
 
     # 什么都没有，默认PENDING
-    return R.success({
-        "status": TaskStatus.PENDING.value,
-        "message": "任务排队中",
-        "task_id": task_id
+    return {"status": TaskStatus.PENDING.value, "message": "任务排队中", "task_id": task_id}
+
+
+@router.get("/task_status/{task_id}")
+def get_task_status(task_id: str, request: Request):
+    # 状态从内存状态存储读取，未命中时才回退到状态文件/数据库
+    state = get_task_state_store().get(task_id)
+    etag = _task_etag(state)
+    if etag and request.headers.get("If-None-Match") == etag:
+        # 状态未变化，不再重复读取与序列化笔记结果
+        return Response(status_code=304, headers={"ETag": etag})
+
+    payload = _task_status_payload(task_id, state)
+    if state and payload["status"] != state["status"]:
+        # 已完成但结果尚未落盘，不下发 ETag，避免结果写入后仍被判定为未变化
+        etag = None
+    headers = {"ETag": etag} if etag else None
+    if payload["status"] == TaskStatus.FAILED.value:
+        return R.error(payload["message"], code=500, headers=headers)
+    return R.success(payload, headers=headers)
+
+
+@router.post("/task_status/batch")
+def get_task_status_batch(data: TaskStatusBatchRequest):
+    """
+    一次查询多个任务的状态，客户端带上已有的 etag 时，未变化的任务只返回 {"unchanged": true}
+    """
+    if len(data.task_ids) > TASK_STATUS_BATCH_LIMIT:
+        return R.error(f"一次最多查询 {TASK_STATUS_BATCH_LIMIT} 个任务", code=400, status_code=400)
+
+    store = get_task_state_store()
+    known = data.etags or {}
+    results = {}
+    for task_id in dict.fromkeys(data.task_ids):
+        state = store.get(task_id)
+        etag = _task_etag(state)
+        if etag and not data.include_result:
+            # 不含结果的应答与含结果的应答使用不同的 ETag
+            etag = etag[:-1] + '-s"'
+        if etag and known.get(task_id) == etag:
+            results[task_id] = {"unchanged": True, "etag": etag}
+            continue
+        payload = _task_status_payload(task_id, state, include_result=data.include_result)
+        payload["etag"] = etag if not state or payload["status"] == state["status"] else None
+        results[task_id] = payload
+    return R.success(results)
+
+
+def _load_task_snapshot(task_id: str) -> Optional[dict]:
+    """
+    事件总线中没有记录的任务（如服务重启前提交、或由其他节点执行），从状态存储读取当前状态
+    """
+    state = get_task_state_store().get(task_id)
+    if state:
+        return {"status": state["status"], "message": state["message"], "progress": state.get("progress")}
+    if os.path.exists(os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.json")):
+        return {"status": TaskStatus.SUCCESS.value}
+    return None
+
+
+def _load_task_result(task_id: str) -> Optional[dict]:
+    result_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.json")
+    if os.path.exists(result_path):
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return fetch_remote_note_result(task_id)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.get("/task_transcript/{task_id}/partial")
+def get_partial_transcript(task_id: str, offset: int = 0):
+    """
+    转写进行中时返回已识别的字幕段（从第 offset 段开始），转写完成后返回完整转写结果中的字幕段
+    """
+    segments = read_partial_transcript(task_id, offset)
+    if segments is not None:
+        return R.success({"task_id": task_id, "complete": False, "offset": offset, "segments": segments})
+
+    transcript_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}_transcript.json")
+    if os.path.exists(transcript_path):
+        with open(transcript_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        segments = [{"index": i, **seg} for i, seg in enumerate(data.get("segments", []))][offset:]
+        return R.success({"task_id": task_id, "complete": True, "offset": offset, "segments": segments})
+    return R.success({"task_id": task_id, "complete": False, "offset": offset, "segments": []})
+
+
+@router.get("/task_markdown/{task_id}/partial")
+def get_partial_markdown(task_id: str):
+    """
+    LLM 生成中返回已生成的 Markdown，生成完成后返回完整的 Markdown（未经截图/链接后处理）
+    """
+    markdown = read_partial_markdown(task_id)
+    if markdown is not None:
+        return R.success({"task_id": task_id, "complete": False, "markdown": markdown})
+    markdown_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}_markdown.md")
+    if os.path.exists(markdown_path):
+        with open(markdown_path, "r", encoding="utf-8") as f:
+            return R.success({"task_id": task_id, "complete": True, "markdown": f.read()})
+    return R.success({"task_id": task_id, "complete": False, "markdown": ""})
+
+
+@router.get("/task_events/{task_id}")
+async def task_events(task_id: str):
+    """
+    以 Server-Sent Events 推送任务进度：每次状态变化推送一条 status 事件，
+    完成时推送一次 result 事件（完整笔记）后关闭连接，失败/取消时推送最终状态后关闭。
+    本地 whisper 转写期间每识别一段推送一条 segment 事件（连接前已识别的部分通过 /task_transcript/{task_id}/partial 获取，按 index 去重）；
+    LLM 生成期间推送 markdown 增量事件（连接前已生成的部分通过 /task_markdown/{task_id}/partial 获取，按 offset 拼接）。
+    连接空闲时定期发送心跳，并回查一次数据库状态（任务由 Celery worker 执行时本进程收不到事件）。
+    """
+    bus = get_task_event_bus()
+    # 先订阅再读取快照，避免两者之间发布的事件丢失
+    queue = bus.subscribe(task_id)
+
+    async def stream():
+        last_sent = None
+        try:
+            event = bus.latest(task_id) or await asyncio.to_thread(_load_task_snapshot, task_id)
+            while True:
+                if event is not None and event.get("kind") == "segment":
+                    yield _sse("segment", {"task_id": task_id, **event["segment"]})
+                    event = None
+                if event is not None and event.get("kind") == "markdown":
+                    yield _sse("markdown", {"task_id": task_id, "delta": event["delta"], "offset": event["offset"]})
+                    event = None
+                if event is not None:
+                    status = event.get("status")
+                    key = (status, event.get("message"), event.get("progress"))
+                    if key != last_sent:
+                        last_sent = key
+                        yield _sse("status", {
+                            "task_id": task_id,
+                            "status": status,
+                            "message": event.get("message") or "",
+                            "progress": event.get("progress") or build_progress(status),
+                        })
+                    if status in (TaskStatus.FAILED.value, TaskStatus.CANCELLED.value):
+                        return
+                    if status == TaskStatus.SUCCESS.value:
+                        result = event.get("result")
+                        if result is None:
+                            # 快照中只有状态，结果文件可能尚未写入，此时继续等待 result 事件
+                            result = await asyncio.to_thread(_load_task_result, task_id)
+                        if result is not None:
+                            yield _sse("result", {"task_id": task_id, "status": status, "result": result})
+                            return
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=TASK_EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    event = await asyncio.to_thread(_load_task_snapshot, task_id)
+        finally:
+            bus.unsubscribe(task_id, queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
     })
 
 
+@router.post("/cancel_task/{task_id}")
+def cancel_note_task(task_id: str):
+    job = get_note_job(task_id)
+    if not job:
+        return R.error(msg="任务不存在", code=404)
+    state = get_task_state_store().get(task_id)
+    if (state["status"] if state else job["status"]) in FINISHED_STATUSES:
+        return R.error(msg="任务已结束，无法取消", code=400)
+
+    running_here = cancel_dispatched_task(task_id)
+    logger.info(f"取消任务 (task_id={task_id}, 本进程执行中={running_here})")
+    return R.success({"task_id": task_id, "status": TaskStatus.CANCELLED.value})
+
+
+@router.get("/task_executor/stats")
+def get_task_executor_stats():
+    return R.success(get_dispatch_stats())
+
+
 @router.get("/image_proxy")
 async def image_proxy(request: Request, url: str):
     headers = {
@@ -0,0 +1,260 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.core.admission import get_admission_controller
+from app.core.cancellation import cancellation_scope
+from app.core.singleflight import AsyncSingleFlight
+from app.core.task_executor import STAGE_CONCURRENCY
+from app.enmus.task_stage_enums import TaskStage
+from app.enmus.task_status_enums import TaskStatus
+from app.gpt.gpt_factory import GPTFactory
+from app.models.audio_model import AudioDownloadResult
+from app.models.notes_model import NoteResult
+from app.models.task_context import NoteTaskContext
+from app.models.transcriber_model import TranscriptResult
+from app.services.note import NOTE_OUTPUT_DIR, NoteGenerator
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# asyncio 模式下 I/O 阶段的并发上限：等待网络时只占用一个协程，可以远高于线程模式
+ASYNC_STAGE_CONCURRENCY = {
+    TaskStage.DOWNLOAD: int(os.getenv("ASYNC_DOWNLOAD_CONCURRENCY", 50)),
+    TaskStage.TRANSCRIBE: STAGE_CONCURRENCY[TaskStage.TRANSCRIBE],
+    TaskStage.SUMMARIZE: int(os.getenv("ASYNC_SUMMARIZE_CONCURRENCY", 50)),
+    TaskStage.SCREENSHOT: STAGE_CONCURRENCY[TaskStage.SCREENSHOT],
+}
+
+# 同一事件循环内的合并执行
+_video_download_flight = AsyncSingleFlight("async_video_download")
+_audio_download_flight = AsyncSingleFlight("async_audio_download")
+_transcribe_flight = AsyncSingleFlight("async_transcribe")
+
+
+def get_async_coalescing_stats() -> dict:
+    return {
+        flight.name: flight.stats()
+        for flight in (_video_download_flight, _audio_download_flight, _transcribe_flight)
+    }
+
+
+class AsyncNoteGenerator(NoteGenerator):
+    """
+    NoteGenerator 的 asyncio 版本：下载、ASR 轮询、LLM 调用在事件循环内以协程并发，
+    只有 CPU 密集（本地 whisper、ffmpeg、PIL）与文件/数据库操作通过 asyncio.to_thread 交给线程池。
+    缓存、状态与后处理逻辑与同步版本共用。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._semaphores: Dict[TaskStage, asyncio.Semaphore] = {}
+        self._stage_stats: Dict[TaskStage, Dict[str, int]] = {
+            stage: {"in_flight": 0, "waiting": 0} for stage in ASYNC_STAGE_CONCURRENCY
+        }
+
+    # ---------------- 公有方法 ----------------
+
+    async def generate_async(self, ctx: NoteTaskContext) -> Optional[NoteResult]:
+        try:
+            with cancellation_scope(ctx.task_id):
+                await self.prepare_async(ctx)
+                await self.run_download_async(ctx)
+                await self.run_transcribe_async(ctx)
+                await self.run_summarize_async(ctx)
+                return await self.run_finalize_async(ctx)
+        except (Exception, asyncio.CancelledError) as exc:
+            await asyncio.to_thread(self.mark_failed, ctx, exc)
+            return None
+
+    async def prepare_async(self, ctx: NoteTaskContext) -> None:
+        logger.info(f"开始生成笔记 (task_id={ctx.task_id})")
+        await self._update_status_async(ctx.task_id, TaskStatus.PARSING)
+
+        ctx.downloader = self._get_downloader(ctx.platform)
+        config = await asyncio.to_thread(self._get_model_config, ctx.model_name, ctx.provider_id)
+        ctx.gpt = GPTFactory.from_config(config, use_async=True)
+
+        ctx.audio_cache_file = NOTE_OUTPUT_DIR / f"{ctx.task_id}_audio.json"
+        ctx.transcript_cache_file = NOTE_OUTPUT_DIR / f"{ctx.task_id}_transcript.json"
+        ctx.markdown_cache_file = NOTE_OUTPUT_DIR / f"{ctx.task_id}_markdown.md"
+        await asyncio.to_thread(self._probe, ctx)
+
+    async def run_download_async(self, ctx: NoteTaskContext) -> None:
+        ctx.audio_meta = await self._download_media_async(ctx)
+        await asyncio.to_thread(self._mark_stage, ctx, TaskStage.DOWNLOAD, {
+            "audio_cache_file": str(ctx.audio_cache_file),
+            "audio_file": ctx.audio_meta.file_path,
+            "video_file": str(ctx.video_path) if ctx.video_path else None,
+        })
+
+    async def run_transcribe_async(self, ctx: NoteTaskContext) -> None:
+        ctx.transcript = await self._transcribe_audio_async(ctx)
+        await asyncio.to_thread(self._mark_stage, ctx, TaskStage.TRANSCRIBE,
+                                {"transcript_cache_file": str(ctx.transcript_cache_file)})
+
+    async def run_summarize_async(self, ctx: NoteTaskContext) -> None:
+        if ctx.resume and ctx.markdown_cache_file.exists():
+            logger.info(f"恢复任务，复用 Markdown 缓存 ({ctx.markdown_cache_file})")
+            ctx.markdown = await asyncio.to_thread(ctx.markdown_cache_file.read_text, encoding="utf-8")
+            return
+
+        ctx.markdown = await self._summarize_text_async(ctx)
+        await asyncio.to_thread(self._mark_stage, ctx, TaskStage.SUMMARIZE,
+                                {"markdown_cache_file": str(ctx.markdown_cache_file)})
+
+    async def run_finalize_async(self, ctx: NoteTaskContext) -> NoteResult:
+        if ctx.formats:
+            async with self._stage(TaskStage.SCREENSHOT):
+                # 截图由 ffmpeg 子进程完成，_post_process_markdown 内部的线程限流器仍然生效
+                ctx.markdown = await asyncio.to_thread(self._post_process_markdown, ctx)
+        # 状态与数据库写入都在同步版本中实现，整体交给线程执行
+        return await asyncio.to_thread(self._finish, ctx)
+
+    def _finish(self, ctx: NoteTaskContext) -> NoteResult:
+        self._update_status(ctx.task_id, TaskStatus.SAVING)
+        self._save_metadata(video_id=ctx.audio_meta.video_id, platform=ctx.platform, task_id=ctx.task_id)
+        self._update_status(ctx.task_id, TaskStatus.SUCCESS)
+        logger.info(f"笔记生成成功 (task_id={ctx.task_id})")
+        return NoteResult(markdown=ctx.markdown, transcript=ctx.transcript, audio_meta=ctx.audio_meta)
+
+    def stats(self) -> dict:
+        return {
+            "stages": {
+                stage.value: {"limit": ASYNC_STAGE_CONCURRENCY[stage], **counts}
+                for stage, counts in self._stage_stats.items()
+            },
+            "coalescing": get_async_coalescing_stats(),
+        }
+
+    # ---------------- 私有方法 ----------------
+
+    @asynccontextmanager
+    async def _stage(self, stage: TaskStage):
+        """
+        占用阶段并发名额（信号量在首次使用时创建，绑定到当前事件循环）
+        """
+        semaphore = self._semaphores.get(stage)
+        if semaphore is None:
+            semaphore = self._semaphores[stage] = asyncio.Semaphore(max(1, ASYNC_STAGE_CONCURRENCY[stage]))
+        counts = self._stage_stats[stage]
+        counts["waiting"] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            counts["waiting"] -= 1
+        counts["in_flight"] += 1
+        try:
+            yield
+        finally:
+            counts["in_flight"] -= 1
+            semaphore.release()
+
+    async def _run_stage_async(self, stage: TaskStage, fn, *args, **kwargs):
+        async with self._stage(stage):
+            return await fn(*args, **kwargs)
+
+    async def _update_status_async(self, task_id: Optional[str], status: TaskStatus, message: Optional[str] = None):
+        await asyncio.to_thread(self._update_status, task_id, status, message)
+
+    async def _download_media_async(self, ctx: NoteTaskContext) -> AudioDownloadResult:
+        task_id = ctx.task_id
+        await self._update_status_async(task_id, TaskStatus.DOWNLOADING)
+
+        need_video = ctx.screenshot or ctx.video_understanding
+        if need_video:
+            try:
+                logger.info("开始下载视频")
+                video_path_str, _ = await _video_download_flight.do(
+                    self._ctx_media_key(ctx),
+                    self._run_stage_async, TaskStage.DOWNLOAD, ctx.downloader.download_video_async, ctx.video_url,
+                )
+                ctx.video_path = Path(video_path_str)
+                logger.info(f"视频下载完成：{ctx.video_path}")
+
+                if ctx.grid_size:
+                    async with self._stage(TaskStage.SCREENSHOT):
+                        await asyncio.to_thread(self._generate_thumbnails, ctx)
+            except Exception as exc:
+                logger.error(f"视频下载失败：{exc}")
+                await asyncio.to_thread(self._handle_exception, task_id, exc)
+                raise
+
+        cached = await asyncio.to_thread(self._load_audio_cache, ctx)
+        if cached:
+            return cached
+        try:
+            logger.info("开始下载音频")
+            started = time.perf_counter()
+            audio, shared = await _audio_download_flight.do(
+                self._ctx_media_key(ctx, ctx.quality, ctx.output_path, need_video),
+                self._run_stage_async, TaskStage.DOWNLOAD, ctx.downloader.download_async,
+                video_url=ctx.video_url,
+                output_dir=ctx.output_path,
+                quality=ctx.quality,
+                need_video=need_video,
+                probe=ctx.probe,
+            )
+            if shared:
+                logger.info(f"复用其他任务的音频下载结果 (task_id={task_id})")
+            else:
+                get_admission_controller().observe_stage(TaskStage.DOWNLOAD, time.perf_counter() - started)
+            await asyncio.to_thread(self._save_audio_cache, ctx, audio)
+            return audio
+        except Exception as exc:
+            logger.error(f"音频下载失败：{exc}")
+            await asyncio.to_thread(self._handle_exception, task_id, exc)
+            raise
+
+    async def _transcribe_audio_async(self, ctx: NoteTaskContext) -> TranscriptResult:
+        task_id = ctx.task_id
+        audio_file = ctx.audio_meta.file_path
+        await self._update_status_async(task_id, TaskStatus.TRANSCRIBING)
+
+        cached = await asyncio.to_thread(self._load_transcript_cache, ctx)
+        if cached:
+            return cached
+
+        try:
+            logger.info("开始转写音频")
+            started = time.perf_counter()
+            # 任务指定的模型尚未加载时需要读取模型文件，放到线程中避免阻塞事件循环
+            transcriber = await asyncio.to_thread(self._get_transcriber, ctx)
+            transcript, shared = await _transcribe_flight.do(
+                self._transcribe_key(ctx),
+                self._run_stage_async, TaskStage.TRANSCRIBE, transcriber.transcript_async, audio_file,
+            )
+            if shared:
+                logger.info(f"复用其他任务的转写结果 (task_id={task_id})")
+            else:
+                self._observe_transcribe(time.perf_counter() - started, transcript)
+            await asyncio.to_thread(self._save_transcript_cache, ctx, transcript)
+            return transcript
+        except Exception as exc:
+            logger.error(f"音频转写失败：{exc}")
+            await asyncio.to_thread(self._handle_exception, task_id, exc)
+            raise
+
+    async def _summarize_text_async(self, ctx: NoteTaskContext) -> str:
+        task_id = ctx.task_id
+        await self._update_status_async(task_id, TaskStatus.SUMMARIZING)
+        source = self._build_gpt_source(ctx)
+
+        try:
+            async with self._stage(TaskStage.SUMMARIZE):
+                started = time.perf_counter()
+                markdown = await ctx.gpt.summarize_async(source)
+                get_admission_controller().observe_stage(TaskStage.SUMMARIZE, time.perf_counter() - started)
+            await asyncio.to_thread(self._save_markdown_cache, ctx, markdown)
+            logger.info(f"GPT 总结并缓存成功 ({ctx.markdown_cache_file})")
+            return markdown
+        except Exception as exc:
+            logger.error(f"GPT 总结失败：{exc}")
+            await asyncio.to_thread(self._handle_exception, task_id, exc)
+            raise
@@ -2,6 +2,8 @@ import json
 import logging
 import os
 import re
+import threading
+import time
 from dataclasses import asdict
 from pathlib import Path
 from typing import List, Optional, Tuple, Union, Any
@@ -10,14 +12,26 @@ from fastapi import HTTPException
 from pydantic import HttpUrl
 from dotenv import load_dotenv
 
+from app.core.admission import get_admission_controller
+from app.core.artifact_cache import ArtifactCache, file_digest, get_artifact_cache
+from app.core.cancellation import cancellation_scope, is_cancelled, record_stopped
+from app.core.partial_markdown import discard_partial_markdown
+from app.core.probe import probe_video
+from app.core.progress import build_progress, reset_progress
+from app.core.singleflight import SingleFlight
+from app.core.storage_manager import StorageManager
+from app.core.task_executor import get_task_executor
+from app.core.task_state import get_task_state_store
 from app.downloaders.base import Downloader
 from app.downloaders.bilibili_downloader import BilibiliDownloader
 from app.downloaders.douyin_downloader import DouyinDownloader
 from app.downloaders.local_downloader import LocalDownloader
 from app.downloaders.youtube_downloader import YoutubeDownloader
 from app.db.video_task_dao import delete_task_by_video, insert_video_task
+from app.db.note_job_dao import mark_note_job_stage
 from app.enmus.exception import NoteErrorEnum, ProviderErrorEnum
 from app.enmus.task_status_enums import TaskStatus
+from app.enmus.task_stage_enums import TaskStage
 from app.enmus.note_enums import DownloadQuality
 from app.exceptions.note import NoteError
 from app.exceptions.provider import ProviderError
@@ -27,15 +41,19 @@ from app.models.audio_model import AudioDownloadResult
 from app.models.gpt_model import GPTSource
 from app.models.model_config import ModelConfig
 from app.models.notes_model import AudioDownloadResult, NoteResult
+from app.models.task_context import NoteTaskContext
 from app.models.transcriber_model import TranscriptResult, TranscriptSegment
 from app.services.constant import SUPPORT_PLATFORM_MAP
 from app.services.provider import ProviderService
 from app.transcriber.base import Transcriber
-from app.transcriber.transcriber_provider import get_transcriber, _transcribers
+from app.transcriber.transcriber_provider import TranscriberType, get_transcriber
 from app.utils.note_helper import replace_content_markers
 from app.utils.status_code import StatusCode
+from app.utils.url_parser import extract_video_id
 from app.utils.video_helper import generate_screenshot
+from app.utils.path_helper import get_app_dir
 from app.utils.video_reader import VideoReader
+from events.signals import task_status_changed
 
 # ------------------ 环境变量与全局配置 ------------------
 
@@ -58,20 +76,54 @@ IMAGE_BASE_URL = os.getenv("IMAGE_BASE_URL", "/static/screenshots")
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# 多个任务提交同一视频时，下载与转写只执行一次，其余任务等待并共享结果
+_video_download_flight = SingleFlight("video_download")
+_audio_download_flight = SingleFlight("audio_download")
+_transcribe_flight = SingleFlight("transcribe")
+
+
+def get_coalescing_stats() -> dict:
+    return {
+        flight.name: flight.stats()
+        for flight in (_video_download_flight, _audio_download_flight, _transcribe_flight)
+    }
+
+
+def update_task_status(task_id: Optional[str], status: Union[str, TaskStatus], message: Optional[str] = None):
+    """
+    更新任务状态：写入内存状态存储（由后台线程批量写回 {task_id}.status.json 与任务表），并推送状态事件
+
+    :param task_id: 任务唯一 ID
+    :param status: TaskStatus 枚举或自定义状态字符串
+    :param message: 可选消息，用于记录失败原因等
+    """
+    if not task_id:
+        return
+
+    status = status.value if isinstance(status, TaskStatus) else status
+    progress = build_progress(status)
+    reset_progress(task_id)
+    get_task_state_store().set(task_id, status, message, progress)
+    logger.debug(f"任务状态更新 (task_id={task_id})：{status}")
+    task_status_changed.send(task_id, status=status, message=message, progress=progress)
+
 
 class NoteGenerator:
     """
     NoteGenerator 用于执行视频/音频下载、转写、GPT 生成笔记、插入截图/链接、
     以及将任务信息写入状态文件与数据库等功能。
+
+    单个任务的状态全部保存在 NoteTaskContext 中，实例本身只持有转写器等可共享资源，
+    因此一个长期存在的实例（见 get_note_generator）可以同时处理多个任务。
     """
 
     def __init__(self):
         self.model_size: str = "base"
         self.device: Optional[str] = None
         self.transcriber_type: str = os.getenv("TRANSCRIBER_TYPE", "fast-whisper")
-        self.transcriber: Transcriber = self._init_transcriber()
-        self.video_path: Optional[Path] = None
-        self.video_img_urls=[]
+        # 启动时加载默认模型；任务指定了其他模型时按需从模型注册表获取
+        self._init_transcriber()
+        self.executor = get_task_executor()
         logger.info("NoteGenerator 初始化完成")
 
 
@@ -94,9 +146,12 @@ class NoteGenerator:
         video_understanding: bool = False,
         video_interval: int = 0,
         grid_size: Optional[List[int]] = None,
+        resume: bool = False,
+        transcriber_model: Optional[str] = None,
     ) -> NoteResult | None:
         """
         主流程：按步骤依次下载、转写、GPT 总结、截图/链接处理、存库、返回 NoteResult。
+        各步骤也可通过 prepare / run_download / run_transcribe / run_summarize / run_finalize 单独调度。
 
         :param video_url: 视频或音频链接
         :param platform: 平台名称，对应 SUPPORT_PLATFORM_MAP 中的键
@@ -113,84 +168,118 @@ class NoteGenerator:
         :param video_understanding: 是否需要视频拼图理解（生成缩略图）
         :param video_interval: 视频帧截取间隔（秒），仅在 video_understanding 为 True 时生效
         :param grid_size: 生成缩略图时的网格大小，如 [3, 3]
+        :param resume: 是否为崩溃/重启后的恢复执行，恢复时复用已完成阶段的缓存（包括 Markdown）
+        :param transcriber_model: 本地转写模型尺寸，为空时使用 WHISPER_MODEL_SIZE
         :return: NoteResult 对象，包含 markdown 文本、转写结果和音频元信息
         """
-        if grid_size is None:
-            grid_size = []
-
+        ctx = NoteTaskContext(
+            task_id=task_id,
+            video_url=video_url,
+            platform=platform,
+            quality=quality,
+            model_name=model_name,
+            provider_id=provider_id,
+            link=link,
+            screenshot=screenshot,
+            formats=_format or [],
+            style=style,
+            extras=extras,
+            output_path=output_path,
+            video_understanding=video_understanding,
+            video_interval=video_interval,
+            grid_size=grid_size or [],
+            resume=resume,
+            transcriber_model=transcriber_model,
+        )
         try:
-            logger.info(f"开始生成笔记 (task_id={task_id})")
-            self._update_status(task_id, TaskStatus.PARSING)
-
-            # 获取下载器与 GPT 实例
-
-            downloader = self._get_downloader(platform)
-            gpt = self._get_gpt(model_name, provider_id)
-
-            # 缓存文件路径
-            audio_cache_file = NOTE_OUTPUT_DIR / f"{task_id}_audio.json"
-            transcript_cache_file = NOTE_OUTPUT_DIR / f"{task_id}_transcript.json"
-            markdown_cache_file = NOTE_OUTPUT_DIR / f"{task_id}_markdown.md"
-            print(audio_cache_file)
-            # 1. 下载音频/视频
-            audio_meta = self._download_media(
-                downloader=downloader,
-                video_url=video_url,
-                quality=quality,
-                audio_cache_file=audio_cache_file,
-                status_phase=TaskStatus.DOWNLOADING,
-                platform=platform,
-                output_path=output_path,
-                screenshot=screenshot,
-                video_understanding=video_understanding,
-                video_interval=video_interval,
-                grid_size=grid_size,
-            )
+            with cancellation_scope(task_id):
+                self.prepare(ctx)
+                self.run_download(ctx)
+                self.run_transcribe(ctx)
+                self.run_summarize(ctx)
+                return self.run_finalize(ctx)
+        except Exception as exc:
+            self.mark_failed(ctx, exc)
+            return None
 
-            # 2. 转写文字
-            transcript = self._transcribe_audio(
-                audio_file=audio_meta.file_path,
-                transcript_cache_file=transcript_cache_file,
-                status_phase=TaskStatus.TRANSCRIBING,
-            )
+    # ---------------- 分阶段执行（供流水线模式单独调度） ----------------
 
-            # 3. GPT 总结
-            markdown = self._summarize_text(
-                audio_meta=audio_meta,
-                transcript=transcript,
-                gpt=gpt,
-                markdown_cache_file=markdown_cache_file,
-                link=link,
-                screenshot=screenshot,
-                formats=_format or [],
-                style=style,
-                extras=extras,
-                video_img_urls=self.video_img_urls,
-            )
+    def prepare(self, ctx: NoteTaskContext) -> None:
+        """
+        解析阶段：获取下载器与 GPT 实例，确定缓存文件路径，探测视频元信息
+        """
+        logger.info(f"开始生成笔记 (task_id={ctx.task_id})")
+        self._update_status(ctx.task_id, TaskStatus.PARSING)
 
-            # 4. 截图 & 链接替换
-            if _format:
-                markdown = self._post_process_markdown(
-                    markdown=markdown,
-                    video_path=self.video_path,
-                    formats=_format,
-                    audio_meta=audio_meta,
-                    platform=platform,
-                )
+        ctx.downloader = self._get_downloader(ctx.platform)
+        ctx.gpt = self._get_gpt(ctx.model_name, ctx.provider_id)
 
-            # 5. 保存记录到数据库
-            self._update_status(task_id, TaskStatus.SAVING)
-            self._save_metadata(video_id=audio_meta.video_id, platform=platform, task_id=task_id)
+        ctx.audio_cache_file = NOTE_OUTPUT_DIR / f"{ctx.task_id}_audio.json"
+        ctx.transcript_cache_file = NOTE_OUTPUT_DIR / f"{ctx.task_id}_transcript.json"
+        ctx.markdown_cache_file = NOTE_OUTPUT_DIR / f"{ctx.task_id}_markdown.md"
+        self._probe(ctx)
 
-            # 6. 完成
-            self._update_status(task_id, TaskStatus.SUCCESS)
-            logger.info(f"笔记生成成功 (task_id={task_id})")
-            return NoteResult(markdown=markdown, transcript=transcript, audio_meta=audio_meta)
+    def _probe(self, ctx: NoteTaskContext) -> None:
+        """
+        探测视频元信息（提交任务时通常已探测过，这里命中缓存），下载时复用，避免重复请求视频信息
+        """
+        if ctx.resume and ctx.audio_cache_file.exists():
+            return
+        ctx.probe = probe_video(ctx.downloader, ctx.platform, ctx.video_url)
 
-        except Exception as exc:
-            logger.error(f"生成笔记流程异常 (task_id={task_id})：{exc}", exc_info=True)
-            self._update_status(task_id, TaskStatus.FAILED, message=str(exc))
-            return None
+    def run_download(self, ctx: NoteTaskContext) -> None:
+        """
+        1. 下载音频/视频
+        """
+        ctx.audio_meta = self._download_media(ctx)
+        self._mark_stage(ctx, TaskStage.DOWNLOAD, {
+            "audio_cache_file": str(ctx.audio_cache_file),
+            "audio_file": ctx.audio_meta.file_path,
+            "video_file": str(ctx.video_path) if ctx.video_path else None,
+        })
+
+    def run_transcribe(self, ctx: NoteTaskContext) -> None:
+        """
+        2. 转写文字
+        """
+        ctx.transcript = self._transcribe_audio(ctx)
+        self._mark_stage(ctx, TaskStage.TRANSCRIBE, {"transcript_cache_file": str(ctx.transcript_cache_file)})
+
+    def run_summarize(self, ctx: NoteTaskContext) -> None:
+        """
+        3. GPT 总结（恢复执行时若已有 Markdown 缓存则直接复用）
+        """
+        if ctx.resume and ctx.markdown_cache_file.exists():
+            logger.info(f"恢复任务，复用 Markdown 缓存 ({ctx.markdown_cache_file})")
+            ctx.markdown = ctx.markdown_cache_file.read_text(encoding="utf-8")
+            return
+
+        ctx.markdown = self._summarize_text(ctx)
+        self._mark_stage(ctx, TaskStage.SUMMARIZE, {"markdown_cache_file": str(ctx.markdown_cache_file)})
+
+    def run_finalize(self, ctx: NoteTaskContext) -> NoteResult:
+        """
+        4. 截图 & 链接替换；5. 保存记录到数据库；6. 完成
+        """
+        if ctx.formats:
+            ctx.markdown = self._post_process_markdown(ctx)
+
+        self._update_status(ctx.task_id, TaskStatus.SAVING)
+        self._save_metadata(video_id=ctx.audio_meta.video_id, platform=ctx.platform, task_id=ctx.task_id)
+
+        self._update_status(ctx.task_id, TaskStatus.SUCCESS)
+        logger.info(f"笔记生成成功 (task_id={ctx.task_id})")
+        return NoteResult(markdown=ctx.markdown, transcript=ctx.transcript, audio_meta=ctx.audio_meta)
+
+    def mark_failed(self, ctx: NoteTaskContext, exc: Exception) -> None:
+        # 取消后各阶段抛出的异常（子进程被终止、下载被中断等）统一记为已取消
+        if is_cancelled(ctx.task_id):
+            logger.info(f"任务已取消 (task_id={ctx.task_id})")
+            self._update_status(ctx.task_id, TaskStatus.CANCELLED, message="任务已取消")
+            record_stopped(ctx.task_id)
+            return
+        logger.error(f"生成笔记流程异常 (task_id={ctx.task_id})：{exc}", exc_info=True)
+        self._update_status(ctx.task_id, TaskStatus.FAILED, message=str(exc))
 
     @staticmethod
     def delete_note(video_id: str, platform: str) -> int:
@@ -210,13 +299,24 @@ class NoteGenerator:
         """
         根据环境变量 TRANSCRIBER_TYPE 动态获取并实例化转写器
         """
-        if self.transcriber_type not in _transcribers:
+        try:
+            TranscriberType(self.transcriber_type)
+        except ValueError:
             logger.error(f"未找到支持的转写器：{self.transcriber_type}")
             raise Exception(f"不支持的转写器：{self.transcriber_type}")
 
         logger.info(f"使用转写器：{self.transcriber_type}")
         return get_transcriber(transcriber_type=self.transcriber_type)
 
+    def _transcriber_model(self, ctx: NoteTaskContext) -> str:
+        """
+        任务使用的转写模型尺寸：任务指定的优先，否则使用 WHISPER_MODEL_SIZE
+        """
+        return ctx.transcriber_model or os.getenv("WHISPER_MODEL_SIZE", self.model_size)
+
+    def _get_transcriber(self, ctx: NoteTaskContext) -> Transcriber:
+        return get_transcriber(transcriber_type=self.transcriber_type, model_size=self._transcriber_model(ctx))
+
     def _get_gpt(self, model_name: Optional[str], provider_id: Optional[str]) -> GPT:
         """
         根据 provider_id 获取对应的 GPT 实例
@@ -224,19 +324,22 @@ class NoteGenerator:
         :param provider_id: 供应商 ID
         :return: GPT 实例
         """
+        return GPTFactory().from_config(self._get_model_config(model_name, provider_id))
+
+    @staticmethod
+    def _get_model_config(model_name: Optional[str], provider_id: Optional[str]) -> ModelConfig:
         provider = ProviderService.get_provider_by_id(provider_id)
         if not provider:
             logger.error(f"[get_gpt] 未找到模型供应商: provider_id={provider_id}")
             raise ProviderError(code=ProviderErrorEnum.NOT_FOUND,message=ProviderErrorEnum.NOT_FOUND.message)
         logger.info(f"创建 GPT 实例 {provider_id}")
-        config = ModelConfig(
+        return ModelConfig(
             api_key=provider["api_key"],
             base_url=provider["base_url"],
             model_name=model_name,
             provider=provider["type"],
             name=provider["name"],
         )
-        return GPTFactory().from_config(config)
 
     def _get_downloader(self, platform: str) -> Downloader:
         """
@@ -261,44 +364,48 @@ class NoteGenerator:
         logger.info(f"使用下载器：{downloader_cls.__class__}")
         return instance
 
-    def _update_status(self, task_id: Optional[str], status: Union[str, TaskStatus], message: Optional[str] = None):
+    def _run_stage(self, stage: TaskStage, fn, *args, **kwargs):
         """
-        创建或更新 {task_id}.status.json，记录当前任务状态
-
-        :param task_id: 任务唯一 ID
-        :param status: TaskStatus 枚举或自定义状态字符串
-        :param message: 可选消息，用于记录失败原因等
+        占用阶段并发名额后执行 fn（在合并执行的 leader 内调用，等待者不占名额）
         """
-        if not task_id:
-            return
-
-        NOTE_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-        status_file = NOTE_OUTPUT_DIR / f"{task_id}.status.json"
-        print(f"写入状态文件: {status_file} 当前状态: {status}")
-        data = {"status": status.value if isinstance(status, TaskStatus) else status}
-        if message:
-            data["message"] = message
+        with self.executor.stage(stage):
+            return fn(*args, **kwargs)
 
+    @staticmethod
+    def _media_key(platform: str, video_url: Union[str, HttpUrl], *extra) -> Optional[tuple]:
+        """
+        按 (平台, 规范化视频 ID, ...) 生成合并键，无法解析视频 ID 时返回 None（不合并）
+        """
         try:
-            # First create a temporary file
-            temp_file = status_file.with_suffix('.tmp')
+            video_id = extract_video_id(str(video_url), platform)
+        except Exception:
+            video_id = None
+        if not video_id:
+            return None
+        return (platform, video_id, *extra)
 
-            # Write to temporary file
-            with temp_file.open('w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+    def _ctx_media_key(self, ctx: NoteTaskContext, *extra) -> Optional[tuple]:
+        """
+        同 _media_key；链接中解析不出视频 ID（如短链接）时使用探测阶段得到的规范 ID
+        """
+        key = self._media_key(ctx.platform, ctx.video_url, *extra)
+        if key is None and ctx.probe and ctx.probe.video_id:
+            key = (ctx.platform, ctx.probe.video_id, *extra)
+        return key
 
-            # Atomic rename operation
-            temp_file.replace(status_file)
+    @staticmethod
+    def _mark_stage(ctx: NoteTaskContext, stage: TaskStage, artifacts: dict) -> None:
+        """
+        记录任务已完成的阶段与产物，供重启后从断点恢复
+        """
+        if ctx.task_id:
+            mark_note_job_stage(ctx.task_id, stage.value, artifacts)
 
-            print(f"状态文件写入成功: {status_file}")
-        except Exception as e:
-            logger.error(f"写入状态文件失败 (task_id={task_id})：{e}")
-            # Try to write error to file directly as fallback
-            try:
-                with status_file.open('w', encoding='utf-8') as f:
-                    f.write(f"Error writing status: {str(e)}")
-            except:
-                logger.error(f"写入错误  {e}")
+    def _update_status(self, task_id: Optional[str], status: Union[str, TaskStatus], message: Optional[str] = None):
+        # 已取消的任务不再回写进行中/失败状态，避免覆盖 CANCELLED
+        if is_cancelled(task_id) and status != TaskStatus.CANCELLED:
+            return
+        update_task_status(task_id, status, message)
 
     def _handle_exception(self, task_id, exc):
         logger.error(f"任务异常 (task_id={task_id})", exc_info=True)
@@ -310,89 +417,212 @@ class NoteGenerator:
                 error_message = str(error_message)
         self._update_status(task_id, TaskStatus.FAILED, message=error_message)
 
-    def _download_media(
-        self,
-        downloader: Downloader,
-        video_url: Union[str, HttpUrl],
-        quality: DownloadQuality,
-        audio_cache_file: Path,
-        status_phase: TaskStatus,
-        platform: str,
-        output_path: Optional[str],
-        screenshot: bool,
-        video_understanding: bool,
-        video_interval: int,
-        grid_size: List[int],
-    ) -> AudioDownloadResult | None:
+    # ---------------- 阶段缓存与辅助（同步/异步生成器共用） ----------------
+
+    def _generate_thumbnails(self, ctx: NoteTaskContext) -> None:
+        """
+        若指定了 grid_size，则从已下载的视频生成缩略图拼图，写入 ctx.video_img_urls
+        """
+        if not ctx.grid_size:
+            logger.info("未指定 grid_size，跳过缩略图生成")
+            return
+        with self.executor.stage(TaskStage.SCREENSHOT):
+            ctx.video_img_urls = VideoReader(
+                video_path=str(ctx.video_path),
+                grid_size=tuple(ctx.grid_size),
+                frame_interval=ctx.video_interval,
+                unit_width=1280,
+                unit_height=720,
+                save_quality=90,
+                # 每个任务使用独立的帧/网格目录，避免并发任务互相清空
+                frame_dir=get_app_dir(os.path.join("output_frames", str(ctx.task_id))),
+                grid_dir=get_app_dir(os.path.join("grid_output", str(ctx.task_id))),
+            ).run()
+
+    def _audio_artifact_key(self, ctx: NoteTaskContext) -> Optional[str]:
+        media_key = self._ctx_media_key(ctx, ctx.quality, ctx.screenshot or ctx.video_understanding)
+        return ArtifactCache.make_key(*media_key) if media_key else None
+
+    def _transcript_artifact_key(self, ctx: NoteTaskContext) -> Optional[str]:
+        """
+        转写结果按音频内容哈希寻址，同一音频被不同任务/路径下载时也能命中
+        """
+        try:
+            digest = file_digest(ctx.audio_meta.file_path)
+        except OSError:
+            return None
+        # 目前各转写器均自动识别语言
+        return ArtifactCache.make_key(digest, self.transcriber_type, self._transcriber_model(ctx), "auto")
+
+    def _load_audio_cache(self, ctx: NoteTaskContext) -> Optional[AudioDownloadResult]:
+        audio_cache_file = ctx.audio_cache_file
+        if audio_cache_file.exists():
+            logger.info(f"检测到音频缓存 ({audio_cache_file})，直接读取")
+            try:
+                data = json.loads(audio_cache_file.read_text(encoding="utf-8"))
+                return AudioDownloadResult(**data)
+            except Exception as e:
+                logger.warning(f"读取音频缓存失败，将重新下载：{e}")
+
+        key = self._audio_artifact_key(ctx)
+        if not key:
+            return None
+        cache = get_artifact_cache()
+        data = cache.get("audio", key)
+        if not data:
+            return None
+        try:
+            audio = AudioDownloadResult(**data)
+        except TypeError:
+            cache.invalidate("audio", key)
+            return None
+        # 音频文件可能已被清理，缓存条目随之失效
+        if not os.path.exists(audio.file_path) or (audio.video_path and not os.path.exists(audio.video_path)):
+            cache.invalidate("audio", key)
+            return None
+        logger.info(f"命中跨任务音频缓存 ({audio.file_path})")
+        StorageManager.touch(audio.file_path)
+        StorageManager.touch(audio.video_path)
+        self._write_audio_cache_file(ctx, audio)
+        return audio
+
+    def _save_audio_cache(self, ctx: NoteTaskContext, audio: AudioDownloadResult) -> None:
+        self._write_audio_cache_file(ctx, audio)
+        key = self._audio_artifact_key(ctx)
+        if key:
+            get_artifact_cache().put("audio", key, asdict(audio))
+        logger.info(f"音频下载并缓存成功 ({ctx.audio_cache_file})")
+
+    @staticmethod
+    def _write_audio_cache_file(ctx: NoteTaskContext, audio: AudioDownloadResult) -> None:
+        # 任务级缓存保留给重试/断点恢复使用
+        ctx.audio_cache_file.write_text(json.dumps(asdict(audio), ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def _load_transcript_cache(self, ctx: NoteTaskContext) -> Optional[TranscriptResult]:
+        transcript_cache_file = ctx.transcript_cache_file
+        if transcript_cache_file.exists():
+            logger.info(f"检测到转写缓存 ({transcript_cache_file})，尝试读取")
+            try:
+                return self._transcript_from_dict(json.loads(transcript_cache_file.read_text(encoding="utf-8")))
+            except Exception as e:
+                logger.warning(f"加载转写缓存失败，将重新转写：{e}")
+
+        key = self._transcript_artifact_key(ctx)
+        if not key:
+            return None
+        cache = get_artifact_cache()
+        data = cache.get("transcript", key)
+        if not data:
+            return None
+        try:
+            transcript = self._transcript_from_dict(data)
+        except Exception:
+            cache.invalidate("transcript", key)
+            return None
+        logger.info(f"命中跨任务转写缓存 (task_id={ctx.task_id})")
+        self._write_transcript_cache_file(ctx, transcript)
+        return transcript
+
+    def _save_transcript_cache(self, ctx: NoteTaskContext, transcript: TranscriptResult) -> None:
+        self._write_transcript_cache_file(ctx, transcript)
+        key = self._transcript_artifact_key(ctx)
+        if key:
+            get_artifact_cache().put("transcript", key, asdict(transcript))
+        logger.info(f"转写并缓存成功 ({ctx.transcript_cache_file})")
+
+    @staticmethod
+    def _write_transcript_cache_file(ctx: NoteTaskContext, transcript: TranscriptResult) -> None:
+        ctx.transcript_cache_file.write_text(json.dumps(asdict(transcript), ensure_ascii=False, indent=2),
+                                             encoding="utf-8")
+
+    @staticmethod
+    def _transcript_from_dict(data: dict) -> TranscriptResult:
+        segments = [TranscriptSegment(**seg) for seg in data.get("segments", [])]
+        return TranscriptResult(language=data["language"], full_text=data["full_text"], segments=segments)
+
+    @staticmethod
+    def _save_markdown_cache(ctx: NoteTaskContext, markdown: str) -> None:
+        # 先写临时文件再原子替换，恢复执行时不会读到写了一半的笔记
+        tmp_file = ctx.markdown_cache_file.with_suffix(".md.tmp")
+        tmp_file.write_text(markdown, encoding="utf-8")
+        os.replace(tmp_file, ctx.markdown_cache_file)
+        discard_partial_markdown(ctx.task_id)
+
+    def _transcribe_key(self, ctx: NoteTaskContext) -> tuple:
+        return os.path.abspath(ctx.audio_meta.file_path), self.transcriber_type, self._transcriber_model(ctx)
+
+    @staticmethod
+    def _observe_transcribe(seconds: float, transcript: Optional[TranscriptResult]) -> None:
+        # 部分平台的 duration 以毫秒计，用转写结果的末尾时间作为音频时长更可靠
+        audio_duration = transcript.segments[-1].end if transcript and transcript.segments else None
+        get_admission_controller().observe_stage(TaskStage.TRANSCRIBE, seconds, audio_duration=audio_duration)
+
+    @staticmethod
+    def _build_gpt_source(ctx: NoteTaskContext) -> GPTSource:
+        return GPTSource(
+            title=ctx.audio_meta.title,
+            segment=ctx.transcript.segments,
+            tags=ctx.audio_meta.raw_info.get("tags", []),
+            screenshot=ctx.screenshot,
+            video_img_urls=ctx.video_img_urls,
+            link=ctx.link,
+            _format=ctx.formats,
+            style=ctx.style,
+            extras=ctx.extras,
+        )
+
+    def _download_media(self, ctx: NoteTaskContext) -> AudioDownloadResult | None:
         """
         1. 检查音频缓存；若不存在，则根据需要下载音频或视频（若需截图/可视化）。
-        2. 如果需要视频，则先下载视频并生成缩略图集，再下载音频。
+        2. 如果需要视频，则先下载视频并生成缩略图集（写入 ctx.video_path / ctx.video_img_urls），再下载音频。
         3. 返回 AudioDownloadResult
 
-        :param downloader: Downloader 实例
-        :param video_url: 视频/音频链接
-        :param quality: 音频下载质量
-        :param audio_cache_file: 本地缓存 JSON 文件路径
-        :param status_phase: 对应的状态枚举，如 TaskStatus.DOWNLOADING
-        :param platform: 平台标识
-        :param output_path: 下载输出目录（可为 None）
-        :param screenshot: 是否需要在笔记中插入截图
-        :param video_understanding: 是否需要生成缩略图
-        :param video_interval: 视频截帧间隔
-        :param grid_size: 缩略图网格尺寸
+        :param ctx: 任务上下文，使用其中的下载器、链接、质量、输出目录、截图/缩略图参数与音频缓存路径
         :return: AudioDownloadResult 对象
         """
-        task_id = audio_cache_file.stem.split("_")[0]
-        self._update_status(task_id, status_phase)
-
-
+        task_id = ctx.task_id
+        self._update_status(task_id, TaskStatus.DOWNLOADING)
 
         # 判断是否需要下载视频
-        need_video = screenshot or video_understanding
+        need_video = ctx.screenshot or ctx.video_understanding
         if need_video:
             try:
                 logger.info("开始下载视频")
-                video_path_str = downloader.download_video(video_url)
-                self.video_path = Path(video_path_str)
-                logger.info(f"视频下载完成：{self.video_path}")
-
-                # 若指定了 grid_size，则生成缩略图
-                if grid_size:
-                    self.video_img_urls=VideoReader(
-                        video_path=str(self.video_path),
-                        grid_size=tuple(grid_size),
-                        frame_interval=video_interval,
-                        unit_width=1280,
-                        unit_height=720,
-                        save_quality=90,
-                    ).run()
-                else:
-                    logger.info("未指定 grid_size，跳过缩略图生成")
+                video_path_str, _ = _video_download_flight.do(
+                    self._ctx_media_key(ctx),
+                    self._run_stage, TaskStage.DOWNLOAD, ctx.downloader.download_video, ctx.video_url,
+                )
+                ctx.video_path = Path(video_path_str)
+                logger.info(f"视频下载完成：{ctx.video_path}")
+
+                self._generate_thumbnails(ctx)
             except Exception as exc:
                 logger.error(f"视频下载失败：{exc}")
 
                 self._handle_exception(task_id, exc)
                 raise
         # 已有缓存，尝试加载
-        if audio_cache_file.exists():
-            logger.info(f"检测到音频缓存 ({audio_cache_file})，直接读取")
-            try:
-                data = json.loads(audio_cache_file.read_text(encoding="utf-8"))
-                return AudioDownloadResult(**data)
-            except Exception as e:
-                logger.warning(f"读取音频缓存失败，将重新下载：{e}")
+        cached = self._load_audio_cache(ctx)
+        if cached:
+            return cached
         # 下载音频
         try:
             logger.info("开始下载音频")
-            audio = downloader.download(
-                video_url=video_url,
-                quality=quality,
-                output_dir=output_path,
+            started = time.perf_counter()
+            audio, shared = _audio_download_flight.do(
+                self._ctx_media_key(ctx, ctx.quality, ctx.output_path, need_video),
+                self._run_stage, TaskStage.DOWNLOAD, ctx.downloader.download,
+                video_url=ctx.video_url,
+                quality=ctx.quality,
+                output_dir=ctx.output_path,
                 need_video=need_video,
+                probe=ctx.probe,
             )
-            # 缓存 audio 元信息到本地 JSON
-            audio_cache_file.write_text(json.dumps(asdict(audio), ensure_ascii=False, indent=2), encoding="utf-8")
-            logger.info(f"音频下载并缓存成功 ({audio_cache_file})")
+            if shared:
+                logger.info(f"复用其他任务的音频下载结果 (task_id={task_id})")
+            else:
+                get_admission_controller().observe_stage(TaskStage.DOWNLOAD, time.perf_counter() - started)
+            self._save_audio_cache(ctx, audio)
             return audio
         except Exception as exc:
             logger.error(f"音频下载失败：{exc}")
@@ -400,119 +630,84 @@ class NoteGenerator:
             raise
 
 
-    def _transcribe_audio(
-        self,
-        audio_file: str,
-        transcript_cache_file: Path,
-        status_phase: TaskStatus,
-    ) -> TranscriptResult | None:
+    def _transcribe_audio(self, ctx: NoteTaskContext) -> TranscriptResult | None:
         """
         1. 检查转写缓存；若存在则尝试加载，否则调用转写器生成并缓存。
         2. 返回 TranscriptResult 对象
 
-        :param audio_file: 音频文件本地路径
-        :param transcript_cache_file: 转写结果缓存路径
-        :param status_phase: 对应的状态枚举，如 TaskStatus.TRANSCRIBING
+        :param ctx: 任务上下文，使用其中的音频文件路径与转写缓存路径
         :return: TranscriptResult 对象
         """
-        task_id = transcript_cache_file.stem.split("_")[0]
-        self._update_status(task_id, status_phase)
+        task_id = ctx.task_id
+        audio_file = ctx.audio_meta.file_path
+        self._update_status(task_id, TaskStatus.TRANSCRIBING)
 
         # 已有缓存，尝试加载
-        if transcript_cache_file.exists():
-            logger.info(f"检测到转写缓存 ({transcript_cache_file})，尝试读取")
-            try:
-                data = json.loads(transcript_cache_file.read_text(encoding="utf-8"))
-                segments = [TranscriptSegment(**seg) for seg in data.get("segments", [])]
-                return TranscriptResult(language=data["language"], full_text=data["full_text"], segments=segments)
-            except Exception as e:
-                logger.warning(f"加载转写缓存失败，将重新转写：{e}")
+        cached = self._load_transcript_cache(ctx)
+        if cached:
+            return cached
 
         # 调用转写器
         try:
             logger.info("开始转写音频")
-            transcript = self.transcriber.transcript(file_path=audio_file)
-            transcript_cache_file.write_text(json.dumps(asdict(transcript), ensure_ascii=False, indent=2), encoding="utf-8")
-            logger.info(f"转写并缓存成功 ({transcript_cache_file})")
+            started = time.perf_counter()
+            transcript, shared = _transcribe_flight.do(
+                self._transcribe_key(ctx),
+                self._run_stage, TaskStage.TRANSCRIBE, self._get_transcriber(ctx).transcript, file_path=audio_file,
+            )
+            if shared:
+                logger.info(f"复用其他任务的转写结果 (task_id={task_id})")
+            else:
+                self._observe_transcribe(time.perf_counter() - started, transcript)
+            self._save_transcript_cache(ctx, transcript)
             return transcript
         except Exception as exc:
             logger.error(f"音频转写失败：{exc}")
             self._handle_exception(task_id, exc)
             raise
 
-    def _summarize_text(
-        self,
-        audio_meta: AudioDownloadResult,
-        transcript: TranscriptResult,
-        gpt: GPT,
-        markdown_cache_file: Path,
-        link: bool,
-        screenshot: bool,
-        formats: List[str],
-        style: Optional[str],
-        extras: Optional[str],
-            video_img_urls: List[str],
-    ) -> str | None:
+    def _summarize_text(self, ctx: NoteTaskContext) -> str | None:
         """
         调用 GPT 对转写结果进行总结，生成 Markdown 文本并缓存。
 
-        :param audio_meta: AudioDownloadResult 元信息
-        :param transcript: TranscriptResult 转写结果
-        :param gpt: GPT 实例
-        :param markdown_cache_file: Markdown 缓存路径
-        :param link: 是否在笔记中插入链接
-        :param screenshot: 是否在笔记中生成截图占位
-        :param formats: 包含 'link' 或 'screenshot' 的列表
-        :param style: GPT 输出风格
-        :param extras: GPT 额外参数
+        :param ctx: 任务上下文，使用其中的音频元信息、转写结果、GPT 实例、笔记格式/风格与缩略图
         :return: 生成的 Markdown 字符串
         """
-        task_id = markdown_cache_file.stem
+        task_id = ctx.task_id
         self._update_status(task_id, TaskStatus.SUMMARIZING)
-
-        source = GPTSource(
-            title=audio_meta.title,
-            segment=transcript.segments,
-            tags=audio_meta.raw_info.get("tags", []),
-            screenshot=screenshot,
-            video_img_urls=video_img_urls,
-            link=link,
-            _format=formats,
-            style=style,
-            extras=extras,
-        )
+        source = self._build_gpt_source(ctx)
 
         try:
-            markdown = gpt.summarize(source)
-            markdown_cache_file.write_text(markdown, encoding="utf-8")
-            logger.info(f"GPT 总结并缓存成功 ({markdown_cache_file})")
+            with self.executor.stage(TaskStage.SUMMARIZE):
+                started = time.perf_counter()
+                markdown = ctx.gpt.summarize(source)
+                get_admission_controller().observe_stage(TaskStage.SUMMARIZE, time.perf_counter() - started)
+            self._save_markdown_cache(ctx, markdown)
+            logger.info(f"GPT 总结并缓存成功 ({ctx.markdown_cache_file})")
             return markdown
         except Exception as exc:
             logger.error(f"GPT 总结失败：{exc}")
             self._handle_exception(task_id, exc)
             raise
 
-    def _post_process_markdown(
-        self,
-        markdown: str,
-        video_path: Optional[Path],
-        formats: List[str],
-        audio_meta: AudioDownloadResult,
-        platform: str,
-    ) -> str:
+    def _post_process_markdown(self, ctx: NoteTaskContext) -> str:
         """
         对生成的 Markdown 做后期处理：插入截图和/或插入链接。
 
-        :param markdown: 原始 Markdown 字符串
-        :param video_path: 本地视频路径（可为 None）
-        :param formats: 包含 'link' 或 'screenshot' 的列表
-        :param audio_meta: AudioDownloadResult 元信息，用于链接替换
-        :param platform: 平台标识，用于链接替换
+        :param ctx: 任务上下文，使用其中的 Markdown、本地视频路径、笔记格式、音频元信息与平台
         :return: 处理后的 Markdown 字符串
         """
+        markdown = ctx.markdown
+        formats = ctx.formats
+        video_path = ctx.video_path
+        audio_meta = ctx.audio_meta
+        platform = ctx.platform
         if "screenshot" in formats and video_path:
             try:
-                markdown = self._insert_screenshots(markdown, video_path)
+                with self.executor.stage(TaskStage.SCREENSHOT):
+                    started = time.perf_counter()
+                    markdown = self._insert_screenshots(markdown, video_path)
+                    get_admission_controller().observe_stage(TaskStage.SCREENSHOT, time.perf_counter() - started)
             except Exception as exc:
                 logger.warning("截图插入失败，跳过该步骤")
 
@@ -576,4 +771,20 @@ class NoteGenerator:
             insert_video_task(video_id=video_id, platform=platform, task_id=task_id)
             logger.info(f"已保存任务记录到数据库 (video_id={video_id}, platform={platform}, task_id={task_id})")
         except Exception as e:
-            logger.error(f"保存任务记录失败：{e}")
\ No newline at end of file
+            logger.error(f"保存任务记录失败：{e}")
+
+
+_note_generator: Optional[NoteGenerator] = None
+_note_generator_lock = threading.Lock()
+
+
+def get_note_generator() -> NoteGenerator:
+    """
+    返回进程内共享的 NoteGenerator，转写器只初始化一次，各任务通过各自的 NoteTaskContext 隔离状态
+    """
+    global _note_generator
+    if _note_generator is None:
+        with _note_generator_lock:
+            if _note_generator is None:
+                _note_generator = NoteGenerator()
+    return _note_generator
@@ -0,0 +1,422 @@
+import asyncio
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from app.core.admission import get_admission_controller
+from app.core.artifact_cache import get_artifact_cache
+from app.core.async_runner import get_async_runner
+from app.core.cancellation import (cancel_task, cancellation_scope, get_cancellation_stats, get_token,
+                                   is_cancelled, record_stopped, release_token)
+from app.core.probe import get_probe_stats
+from app.core.progress import build_progress
+from app.core.stage_pipeline import StagePipeline
+from app.core.storage_manager import get_storage_manager
+from app.core.summary_cache import get_summary_cache
+from app.core.task_events import get_task_event_bus
+from app.core.task_state import get_task_state_store
+from app.core.task_executor import STAGE_CONCURRENCY, get_task_executor
+from app.db.note_job_dao import get_note_job, get_unfinished_note_jobs, set_note_job_celery_id, upsert_note_job
+from app.enmus.note_enums import DownloadQuality
+from app.enmus.task_priority_enums import TaskPriority
+from app.enmus.task_stage_enums import TaskStage
+from app.enmus.task_status_enums import TaskStatus
+from app.models.notes_model import NoteResult
+from app.models.task_context import NoteTaskContext
+from app.services.note import get_coalescing_stats, get_note_generator, update_task_status
+from app.transcriber.transcriber_provider import get_transcriber_stats
+from app.utils.logger import get_logger
+from events.signals import task_status_changed
+
+load_dotenv()
+logger = get_logger(__name__)
+
+NOTE_OUTPUT_DIR = os.getenv("NOTE_OUTPUT_DIR", "note_results")
+
+# 任务执行模式：pool（每个任务在一个工作线程内顺序执行全部阶段）| pipeline（各阶段独立线程池，任务跨阶段流转）
+# | async（任务在事件循环中以协程执行，仅 CPU 阶段交给线程）
+TASK_EXECUTION_MODE = os.getenv("TASK_EXECUTION_MODE", "pool")
+
+# 任务后端：local（本进程执行）| celery（仅入队，由 worker.py 启动的独立进程/主机执行）
+TASK_BACKEND = os.getenv("TASK_BACKEND", "local")
+
+
+def save_note_to_file(task_id: str, note):
+    os.makedirs(NOTE_OUTPUT_DIR, exist_ok=True)
+    result = asdict(note)
+    with open(os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    # 结果落盘后推送一次完整结果，订阅者无需再读取结果文件
+    task_status_changed.send(task_id, status=TaskStatus.SUCCESS.value, message=None,
+                             progress=build_progress(TaskStatus.SUCCESS), result=result)
+
+
+def run_note_task(task_id: str, video_url: str, platform: str, quality: DownloadQuality,
+                  link: bool = False, screenshot: bool = False, model_name: str = None, provider_id: str = None,
+                  _format: list = None, style: str = None, extras: str = None, video_understanding: bool = False,
+                  video_interval=0, grid_size=[], resume: bool = False, transcriber_model: str = None
+                  ):
+
+    if not model_name or not provider_id:
+        raise HTTPException(status_code=400, detail="请选择模型和提供者")
+
+    if is_cancelled(task_id):
+        # 排队期间已被取消，直接释放工作线程
+        logger.info(f"任务已取消，跳过执行 (task_id={task_id})")
+        record_stopped(task_id)
+        release_token(task_id)
+        return None
+
+    try:
+        note = get_note_generator().generate(
+            video_url=video_url,
+            platform=platform,
+            quality=quality,
+            task_id=task_id,
+            model_name=model_name,
+            provider_id=provider_id,
+            link=link,
+            _format=_format,
+            style=style,
+            extras=extras,
+            screenshot=screenshot
+            , video_understanding=video_understanding,
+            video_interval=video_interval,
+            grid_size=grid_size,
+            resume=resume,
+            transcriber_model=transcriber_model,
+        )
+    finally:
+        release_token(task_id)
+    logger.info(f"Note generated: {task_id}")
+    if not note or not note.markdown:
+        logger.warning(f"任务 {task_id} 执行失败，跳过保存")
+        return None
+    save_note_to_file(task_id, note)
+    return note
+
+
+# ---------------- asyncio 模式 ----------------
+
+_async_generator = None
+_async_generator_lock = threading.Lock()
+
+
+def get_async_note_generator():
+    global _async_generator
+    if _async_generator is None:
+        with _async_generator_lock:
+            if _async_generator is None:
+                from app.services.async_note import AsyncNoteGenerator
+                _async_generator = AsyncNoteGenerator()
+    return _async_generator
+
+
+async def run_note_task_async(ctx: NoteTaskContext) -> Optional[NoteResult]:
+    task_id = ctx.task_id
+    if is_cancelled(task_id):
+        logger.info(f"任务已取消，跳过执行 (task_id={task_id})")
+        record_stopped(task_id)
+        release_token(task_id)
+        return None
+    try:
+        note = await get_async_note_generator().generate_async(ctx)
+    finally:
+        release_token(task_id)
+    logger.info(f"Note generated: {task_id}")
+    if not note or not note.markdown:
+        logger.warning(f"任务 {task_id} 执行失败，跳过保存")
+        return None
+    await asyncio.to_thread(save_note_to_file, task_id, note)
+    return note
+
+
+def _build_context(task_id: str, params: dict, resume: bool) -> NoteTaskContext:
+    return NoteTaskContext(
+        task_id=task_id,
+        video_url=params["video_url"],
+        platform=params["platform"],
+        quality=DownloadQuality(params["quality"]),
+        model_name=params["model_name"],
+        provider_id=params["provider_id"],
+        link=params["link"],
+        screenshot=params["screenshot"],
+        formats=params["_format"],
+        style=params["style"],
+        extras=params["extras"],
+        video_understanding=params["video_understanding"],
+        video_interval=params["video_interval"],
+        grid_size=params["grid_size"],
+        resume=resume,
+        transcriber_model=params.get("transcriber_model"),
+    )
+
+
+# ---------------- 流水线模式 ----------------
+
+@dataclass
+class _PipelineJob:
+    ctx: NoteTaskContext
+    result: Optional[NoteResult] = None
+
+
+def _pipeline_download(job: _PipelineJob):
+    with cancellation_scope(job.ctx.task_id):
+        get_note_generator().prepare(job.ctx)
+        get_note_generator().run_download(job.ctx)
+
+
+def _pipeline_transcribe(job: _PipelineJob):
+    with cancellation_scope(job.ctx.task_id):
+        get_note_generator().run_transcribe(job.ctx)
+
+
+def _pipeline_summarize(job: _PipelineJob):
+    with cancellation_scope(job.ctx.task_id):
+        get_note_generator().run_summarize(job.ctx)
+
+
+def _pipeline_finalize(job: _PipelineJob):
+    with cancellation_scope(job.ctx.task_id):
+        job.result = get_note_generator().run_finalize(job.ctx)
+
+
+def _pipeline_complete(job: _PipelineJob):
+    release_token(job.ctx.task_id)
+    logger.info(f"Note generated: {job.ctx.task_id}")
+    if not job.result or not job.result.markdown:
+        logger.warning(f"任务 {job.ctx.task_id} 执行失败，跳过保存")
+        return
+    save_note_to_file(job.ctx.task_id, job.result)
+
+
+def _pipeline_error(job: _PipelineJob, exc: Exception):
+    get_note_generator().mark_failed(job.ctx, exc)
+    release_token(job.ctx.task_id)
+
+
+def build_note_pipeline() -> StagePipeline:
+    return StagePipeline(
+        stages=[
+            (TaskStage.DOWNLOAD.value, _pipeline_download, STAGE_CONCURRENCY[TaskStage.DOWNLOAD]),
+            (TaskStage.TRANSCRIBE.value, _pipeline_transcribe, STAGE_CONCURRENCY[TaskStage.TRANSCRIBE]),
+            (TaskStage.SUMMARIZE.value, _pipeline_summarize, STAGE_CONCURRENCY[TaskStage.SUMMARIZE]),
+            (TaskStage.SCREENSHOT.value, _pipeline_finalize, STAGE_CONCURRENCY[TaskStage.SCREENSHOT]),
+        ],
+        on_complete=_pipeline_complete,
+        on_error=_pipeline_error,
+    )
+
+
+_pipeline: Optional[StagePipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_note_pipeline() -> StagePipeline:
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = build_note_pipeline()
+    return _pipeline
+
+
+# ---------------- 任务分发 ----------------
+
+def dispatch_note_task(task_id: str, video_url: str, platform: str, quality: DownloadQuality,
+                       link: bool = False, screenshot: bool = False, model_name: str = None,
+                       provider_id: str = None, _format: list = None, style: str = None, extras: str = None,
+                       video_understanding: bool = False, video_interval=0, grid_size=None,
+                       client_id: str = None, priority: TaskPriority = TaskPriority.INTERACTIVE,
+                       duration: Optional[float] = None, transcriber_model: Optional[str] = None):
+    """
+    持久化任务参数后，根据 TASK_EXECUTION_MODE 将任务交给执行器或流水线
+
+    :param client_id: 提交方标识，用于按客户端公平调度
+    :param priority: 优先级类别（interactive / batch）
+    :param duration: 探测得到的视频时长（秒），用于估算耗时与调度
+    :param transcriber_model: 本地转写模型尺寸，为空时使用 WHISPER_MODEL_SIZE
+    """
+    params = {
+        "video_url": video_url,
+        "platform": platform,
+        "quality": quality.value if isinstance(quality, DownloadQuality) else quality,
+        "link": link,
+        "screenshot": screenshot,
+        "model_name": model_name,
+        "provider_id": provider_id,
+        "_format": _format or [],
+        "style": style,
+        "extras": extras,
+        "video_understanding": video_understanding,
+        "video_interval": video_interval,
+        "grid_size": grid_size or [],
+        "client_id": client_id,
+        "priority": TaskPriority(priority).value,
+        "duration": duration,
+        "transcriber_model": transcriber_model,
+    }
+    upsert_note_job(task_id, params)
+    _enqueue(task_id, params, resume=False)
+
+
+def _next_celery_id(task_id: str) -> str:
+    """
+    每次执行使用不同的 Celery 消息 ID：取消时撤销的 ID 会留在 worker 的撤销列表中，
+    若重试沿用同一 ID，新消息会被 worker 直接丢弃
+    """
+    job = get_note_job(task_id)
+    celery_id = f"{task_id}:{(job or {}).get('attempts') or 1}"
+    set_note_job_celery_id(task_id, celery_id)
+    return celery_id
+
+
+def _celery_id(task_id: str) -> str:
+    """
+    任务最近一次投递的 Celery 消息 ID，旧任务（未记录）沿用 task_id
+    """
+    try:
+        job = get_note_job(task_id)
+    except Exception as e:
+        logger.warning(f"查询任务的 Celery ID 失败 (task_id={task_id})：{e}")
+        job = None
+    return (job or {}).get("celery_id") or task_id
+
+
+def _enqueue(task_id: str, params: dict, resume: bool):
+    if TASK_BACKEND == "celery":
+        from app.tasks.note_tasks import generate_note_task
+        celery_id = _next_celery_id(task_id)
+        generate_note_task.apply_async(args=[task_id, params, resume], task_id=celery_id)
+        logger.info(f"任务已投递到消息队列 (task_id={task_id}, celery_id={celery_id})")
+        return
+
+    # 入队即创建取消标记，排队中的任务也可以被取消
+    get_token(task_id)
+
+    if TASK_EXECUTION_MODE in ("pipeline", "async"):
+        if not params.get("model_name") or not params.get("provider_id"):
+            raise HTTPException(status_code=400, detail="请选择模型和提供者")
+        ctx = _build_context(task_id, params, resume)
+        if TASK_EXECUTION_MODE == "async":
+            get_async_runner().submit(task_id, run_note_task_async, ctx)
+        else:
+            get_note_pipeline().submit(_PipelineJob(ctx=ctx))
+        return
+
+    get_task_executor().submit(task_id, run_note_task, task_id, params["video_url"], params["platform"],
+                               DownloadQuality(params["quality"]), params["link"], params["screenshot"],
+                               params["model_name"], params["provider_id"], params["_format"], params["style"],
+                               params["extras"], params["video_understanding"], params["video_interval"],
+                               params["grid_size"], resume, params.get("transcriber_model"),
+                               client_id=params.get("client_id"),
+                               priority=params.get("priority", TaskPriority.INTERACTIVE.value),
+                               expected_seconds=get_admission_controller().job_seconds(params.get("duration")))
+
+
+def cancel_dispatched_task(task_id: str) -> bool:
+    """
+    取消已提交的任务：标记为 CANCELLED，并停止本进程中正在执行的阶段（终止 ffmpeg、中断下载/转写/LLM 流）。
+    Celery 模式下撤销尚未执行的消息，执行中的任务由 worker 轮询数据库状态后自行停止。
+
+    :return: 任务是否在本进程中排队或执行
+    """
+    if TASK_BACKEND == "celery":
+        from app.core.celery_app import celery_app
+        celery_app.control.revoke(_celery_id(task_id))
+    # 先置位取消标记，之后执行线程不会再回写进行中状态
+    running_here = cancel_task(task_id)
+    update_task_status(task_id, TaskStatus.CANCELLED, "任务已取消")
+    return running_here
+
+
+def recover_unfinished_tasks() -> int:
+    """
+    启动时重新入队上次进程退出前未完成的任务，已完成阶段的缓存（音频/转写/Markdown）会被复用
+
+    :return: 恢复的任务数
+    """
+    if TASK_BACKEND == "celery":
+        # 消息在 worker 执行完成后才确认，未完成的任务由消息队列重新投递
+        return 0
+
+    jobs = get_unfinished_note_jobs()
+    for job in jobs:
+        try:
+            logger.info(f"恢复未完成任务 (task_id={job['task_id']}, 已完成阶段={job['stage']})")
+            _enqueue(job["task_id"], job["params"], resume=True)
+        except Exception as e:
+            logger.error(f"恢复任务失败 (task_id={job['task_id']})：{e}")
+    return len(jobs)
+
+
+def fetch_remote_note_result(task_id: str) -> Optional[dict]:
+    """
+    在其他节点执行完成的任务，本地没有结果文件时从 Celery 结果后端获取，并落盘到本地缓存
+
+    :return: 笔记结果 dict，未配置结果后端或尚无结果时返回 None
+    """
+    if TASK_BACKEND != "celery":
+        return None
+    from app.core.celery_app import celery_app
+    if not celery_app.conf.result_backend:
+        return None
+    try:
+        async_result = celery_app.AsyncResult(_celery_id(task_id))
+        if not async_result.successful() or not async_result.result:
+            return None
+        result = async_result.result
+        os.makedirs(NOTE_OUTPUT_DIR, exist_ok=True)
+        with open(os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        return result
+    except Exception as e:
+        logger.warning(f"获取远程任务结果失败 (task_id={task_id})：{e}")
+        return None
+
+
+def describe_task_scheduling(task_id: str) -> Optional[dict]:
+    """
+    本进程执行器中该任务的调度信息（排队位置或出队时的调度决策），其他模式下返回 None
+    """
+    if TASK_BACKEND == "celery" or TASK_EXECUTION_MODE != "pool":
+        return None
+    return get_task_executor().describe(task_id)
+
+
+def get_dispatch_stats() -> dict:
+    stats = {
+        "mode": TASK_EXECUTION_MODE,
+        "backend": TASK_BACKEND,
+        "executor": get_task_executor().stats(),
+        "coalescing": get_coalescing_stats(),
+        "cancellation": get_cancellation_stats(),
+        "admission": get_admission_controller().stats(),
+        "probe": get_probe_stats(),
+        "transcriber": get_transcriber_stats(),
+        "events": get_task_event_bus().stats(),
+        "task_state": get_task_state_store().stats(),
+        "artifact_cache": get_artifact_cache().stats(),
+        "summary_cache": get_summary_cache().stats(),
+        "storage": get_storage_manager().stats(),
+    }
+    if _pipeline is not None:
+        stats["pipeline"] = _pipeline.stats()
+    if TASK_EXECUTION_MODE == "async":
+        stats["async"] = {"runner": get_async_runner().stats(), **get_async_note_generator().stats()}
+    return stats
+
+
+def shutdown_dispatchers():
+    get_task_executor().shutdown(wait=False)
+    if _pipeline is not None:
+        _pipeline.shutdown()
+    if TASK_EXECUTION_MODE == "async":
+        get_async_runner().shutdown()
+    get_task_state_store().close()
+    get_storage_manager().close()
@@ -0,0 +1,60 @@
+import json
+import os
+import threading
+from dataclasses import asdict
+
+from app.core.celery_app import celery_app
+from app.core.cancellation import cancel_task, get_token
+from app.db.note_job_dao import get_note_job
+from app.enmus.note_enums import DownloadQuality
+from app.enmus.task_status_enums import TaskStatus
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# worker 轮询任务状态的间隔（秒），API 节点将任务标记为 CANCELLED 后最迟在该间隔内停止
+CANCEL_POLL_INTERVAL = float(os.getenv("CANCEL_POLL_INTERVAL", 2))
+
+
+def _cancel_if_requested(task_id: str) -> bool:
+    try:
+        job = get_note_job(task_id)
+    except Exception as e:
+        logger.warning(f"查询任务状态失败 (task_id={task_id})：{e}")
+        return False
+    if job and job["status"] == TaskStatus.CANCELLED.value:
+        cancel_task(task_id)
+        return True
+    return False
+
+
+def _watch_cancel(task_id: str, stop: threading.Event):
+    while not stop.wait(CANCEL_POLL_INTERVAL):
+        if _cancel_if_requested(task_id):
+            return
+
+
+@celery_app.task(name="bilinote.generate_note")
+def generate_note_task(task_id: str, params: dict, resume: bool = False):
+    """
+    worker 节点上执行笔记生成流程，状态通过数据库同步，结果写入本地文件并作为任务返回值交给结果后端
+    """
+    from app.services.note_task import run_note_task
+
+    logger.info(f"worker 开始执行任务 (task_id={task_id}, resume={resume})")
+    get_token(task_id)
+    # 消息出队前已被取消时，run_note_task 会直接跳过
+    _cancel_if_requested(task_id)
+    stop = threading.Event()
+    threading.Thread(target=_watch_cancel, args=(task_id, stop), daemon=True).start()
+    try:
+        note = run_note_task(task_id, params["video_url"], params["platform"], DownloadQuality(params["quality"]),
+                             params["link"], params["screenshot"], params["model_name"], params["provider_id"],
+                             params["_format"], params["style"], params["extras"], params["video_understanding"],
+                             params["video_interval"], params["grid_size"], resume,
+                             params.get("transcriber_model"))
+    finally:
+        stop.set()
+    if not note:
+        return None
+    return json.loads(json.dumps(asdict(note), ensure_ascii=False, default=str))
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 from app.models.transcriber_model import TranscriptResult
@@ -13,6 +14,16 @@ class Transcriber(ABC):
         '''
         pass
 
+    async def transcript_async(self, file_path: str) -> TranscriptResult:
+        '''
+        异步转写，默认将同步的 transcript（本地模型推理等 CPU 工作）放到线程中执行；
+        基于 HTTP 接口的转写器可覆盖为原生异步实现
+
+        :param file_path:音频路径
+        :return: 返回一个 TranscriptResult 类
+        '''
+        return await asyncio.to_thread(self.transcript, file_path)
+
     def on_finish(self,video_path:str,result: TranscriptResult)->None:
         '''
         当音频转录完成时调用
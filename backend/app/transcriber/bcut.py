@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import time
@@ -5,9 +6,13 @@ from typing import Optional, List, Dict, Union
 
 import requests
 
+from app.core.cancellation import check_cancelled
+from app.core.progress import report_progress
 from app.decorators.timeit import timeit
+from app.enmus.task_status_enums import TaskStatus
 from app.models.transcriber_model import TranscriptSegment, TranscriptResult
 from app.transcriber.base import Transcriber
+from app.utils.async_http import get_async_client
 from app.utils.logger import get_logger
 from events import transcription_finished
 
@@ -197,7 +202,10 @@ class BcutTranscriber(Transcriber):
                 # 每隔一段时间打印进度
                 if i % 10 == 0:
                     logger.info(f"转录进行中... {i}/{max_retries}")
-                    
+
+                # 接口不返回进度，只能上报轮询次数
+                report_progress(TaskStatus.TRANSCRIBING, polls=i + 1)
+                check_cancelled()
                 time.sleep(1)
                 
             if not task_resp or task_resp["state"] != 4:
@@ -207,33 +215,8 @@ class BcutTranscriber(Transcriber):
                 
             # 解析结果
             logger.info("转录成功，处理结果...")
-            result_json = json.loads(task_resp["result"])
-            
-            # 提取分段数据
-            segments = []
-            full_text = ""
-            
-            for u in result_json.get("utterances", []):
-                text = u.get("transcript", "").strip()
-                # B站ASR返回的时间戳是毫秒，需要转换为秒
-                start_time = float(u.get("start_time", 0)) / 1000.0
-                end_time = float(u.get("end_time", 0)) / 1000.0
-                
-                full_text += text + " "
-                segments.append(TranscriptSegment(
-                    start=start_time,
-                    end=end_time,
-                    text=text
-                ))
-            
-            # 创建结果对象
-            result = TranscriptResult(
-                language=result_json.get("language", "zh"),
-                full_text=full_text.strip(),
-                segments=segments,
-                raw=result_json
-            )
-            
+            result = self._parse_result(task_resp)
+
             # 触发完成事件
             # self.on_finish(file_path, result)
             
@@ -243,6 +226,125 @@ class BcutTranscriber(Transcriber):
             logger.error(f"B站ASR处理失败: {str(e)}")
             raise
 
+    @staticmethod
+    def _parse_result(task_resp: dict) -> TranscriptResult:
+        result_json = json.loads(task_resp["result"])
+
+        # 提取分段数据
+        segments = []
+        full_text = ""
+
+        for u in result_json.get("utterances", []):
+            text = u.get("transcript", "").strip()
+            # B站ASR返回的时间戳是毫秒，需要转换为秒
+            start_time = float(u.get("start_time", 0)) / 1000.0
+            end_time = float(u.get("end_time", 0)) / 1000.0
+
+            full_text += text + " "
+            segments.append(TranscriptSegment(
+                start=start_time,
+                end=end_time,
+                text=text
+            ))
+
+        # 创建结果对象
+        return TranscriptResult(
+            language=result_json.get("language", "zh"),
+            full_text=full_text.strip(),
+            segments=segments,
+            raw=result_json
+        )
+
+    async def transcript_async(self, file_path: str) -> TranscriptResult:
+        """
+        原生异步版本：上传、创建任务与轮询均通过共享的 httpx.AsyncClient 完成，轮询间隔不占用线程。
+        上传状态保存在局部变量中，多个任务可以同时使用同一个实例。
+        """
+        client = get_async_client()
+        try:
+            logger.info(f"开始处理文件: {file_path}")
+            file_binary = await asyncio.to_thread(self._load_file, file_path)
+            if not file_binary:
+                raise ValueError("无法读取文件数据")
+
+            # 申请上传
+            resp = await client.post(API_REQ_UPLOAD, headers=self.headers, content=json.dumps({
+                "type": 2,
+                "name": "audio.mp3",
+                "size": len(file_binary),
+                "ResourceFileType": "mp3",
+                "model_id": "8",
+            }))
+            resp.raise_for_status()
+            upload = resp.json()["data"]
+            per_size = upload["per_size"]
+
+            # 分片上传
+            etags = []
+            for clip, upload_url in enumerate(upload["upload_urls"]):
+                check_cancelled()
+                chunk = file_binary[clip * per_size:min((clip + 1) * per_size, len(file_binary))]
+                resp = await client.put(upload_url, content=chunk,
+                                        headers={'Content-Type': 'application/octet-stream'})
+                resp.raise_for_status()
+                etags.append(resp.headers.get("Etag", "").strip('"'))
+
+            # 提交上传
+            resp = await client.post(API_COMMIT_UPLOAD, headers=self.headers, content=json.dumps({
+                "InBossKey": upload["in_boss_key"],
+                "ResourceId": upload["resource_id"],
+                "Etags": ",".join(etags),
+                "UploadId": upload["upload_id"],
+                "model_id": "8",
+            }))
+            resp.raise_for_status()
+            resp = resp.json()
+            if resp.get("code") != 0:
+                raise Exception(f"上传提交失败: {resp.get('message', '未知错误')}")
+            download_url = resp["data"]["download_url"]
+
+            # 创建任务
+            resp = await client.post(API_CREATE_TASK, headers=self.headers,
+                                     json={"resource": download_url, "model_id": "8"})
+            resp.raise_for_status()
+            resp = resp.json()
+            if resp.get("code") != 0:
+                raise Exception(f"创建任务失败: {resp.get('message', '未知错误')}")
+            task_id = resp["data"]["task_id"]
+            logger.info(f"任务已创建: {task_id}")
+
+            # 轮询检查任务状态
+            task_resp = None
+            max_retries = 500
+            for i in range(max_retries):
+                resp = await client.get(API_QUERY_RESULT, params={"model_id": 7, "task_id": task_id},
+                                        headers=self.headers)
+                resp.raise_for_status()
+                resp = resp.json()
+                if resp.get("code") != 0:
+                    raise Exception(f"查询结果失败: {resp.get('message', '未知错误')}")
+                task_resp = resp["data"]
+
+                if task_resp["state"] == 4:  # 完成状态
+                    break
+                elif task_resp["state"] == 3:  # 失败状态
+                    raise Exception(f"B站ASR任务失败，状态码: {task_resp['state']}")
+
+                if i % 10 == 0:
+                    logger.info(f"转录进行中... {i}/{max_retries}")
+                report_progress(TaskStatus.TRANSCRIBING, polls=i + 1)
+                check_cancelled()
+                await asyncio.sleep(1)
+
+            if not task_resp or task_resp["state"] != 4:
+                raise Exception(f"B站ASR任务未能完成，状态: {task_resp.get('state') if task_resp else 'Unknown'}")
+
+            logger.info("转录成功，处理结果...")
+            return self._parse_result(task_resp)
+        except Exception as e:
+            logger.error(f"B站ASR处理失败: {str(e)}")
+            raise
+
     def on_finish(self, video_path: str, result: TranscriptResult) -> None:
         """转录完成的回调"""
         logger.info(f"B站ASR转写完成: {video_path}")
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from modelscope import snapshot_download
+from modelscope.hub.api import HubApi
+
+from app.core.singleflight import SingleFlight
+from app.utils.logger import get_logger
+from app.utils.path_helper import get_model_dir
+
+logger = get_logger(__name__)
+
+MODEL_MAP = {
+    "tiny": "pengzhendong/faster-whisper-tiny",
+    'base': 'pengzhendong/faster-whisper-base',
+    'small': 'pengzhendong/faster-whisper-small',
+    'medium': 'pengzhendong/faster-whisper-medium',
+    'large-v1': 'pengzhendong/faster-whisper-large-v1',
+    'large-v2': 'pengzhendong/faster-whisper-large-v2',
+    'large-v3': 'pengzhendong/faster-whisper-large-v3',
+    'large-v3-turbo': 'pengzhendong/faster-whisper-large-v3-turbo',
+}
+
+# 校验通过后写入模型目录的清单文件，存在即视为模型完整，启动时无需重新计算哈希
+MANIFEST_NAME = ".bilinote-verified.json"
+
+_download_flight = SingleFlight("model-download")
+
+
+def whisper_model_path(model_size: str) -> str:
+    return os.path.join(get_model_dir("whisper"), f"whisper-{model_size}")
+
+
+def is_model_verified(model_size: str) -> bool:
+    return os.path.exists(os.path.join(whisper_model_path(model_size), MANIFEST_NAME))
+
+
+def ensure_whisper_model(model_size: str, on_progress: Optional[Callable[[int, int], None]] = None) -> str:
+    """
+    确保 fast-whisper 模型已完整下载并通过校验，返回模型目录。
+    相同模型的并发调用（启动预热与任务按需加载）合并为一次下载。
+
+    :param on_progress: 下载进度回调 (已下载字节, 总字节)
+    """
+    if model_size not in MODEL_MAP:
+        raise ValueError(f"不支持的 whisper 模型：{model_size}")
+    if is_model_verified(model_size):
+        return whisper_model_path(model_size)
+    model_path, _ = _download_flight.do(model_size, _download_and_verify, model_size, on_progress)
+    return model_path
+
+
+def _remote_files(repo_id: str) -> Optional[List[dict]]:
+    """
+    模型仓库的文件列表（含大小与 sha256），获取失败（如离线）时返回 None
+    """
+    try:
+        files = HubApi().get_model_files(model_id=repo_id, recursive=True)
+    except Exception as e:
+        logger.warning(f"获取模型文件列表失败 ({repo_id})：{e}")
+        return None
+    # 隐藏文件（.gitattributes 等）不参与下载与校验
+    return [f for f in files if f.get("Type") != "tree" and not os.path.basename(f["Path"]).startswith(".")]
+
+
+def _local_size(model_path: str) -> int:
+    total = 0
+    for root, _, names in os.walk(model_path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _find_corrupted(model_path: str, files: List[dict]) -> List[str]:
+    """
+    按文件大小与 sha256 校验已下载的文件，返回缺失或不一致的文件
+    """
+    corrupted = []
+    for f in files:
+        path = os.path.join(model_path, f["Path"])
+        if not os.path.exists(path) or (f.get("Size") and os.path.getsize(path) != f["Size"]):
+            corrupted.append(f["Path"])
+        elif f.get("Sha256") and _sha256(path) != f["Sha256"]:
+            corrupted.append(f["Path"])
+    return corrupted
+
+
+def _download(repo_id: str, model_path: str, total: int, on_progress: Optional[Callable[[int, int], None]]):
+    """
+    下载模型；modelscope 会跳过已完整下载的文件、从中断处续传未完成的文件。
+    下载期间按模型目录大小定期回调进度
+    """
+    stop = threading.Event()
+
+    def poll():
+        while not stop.wait(1):
+            on_progress(min(_local_size(model_path), total), total)
+
+    poller = None
+    if on_progress and total:
+        poller = threading.Thread(target=poll, daemon=True, name="model-download-progress")
+        poller.start()
+    try:
+        snapshot_download(repo_id, local_dir=model_path)
+    finally:
+        stop.set()
+        if poller:
+            poller.join()
+    if on_progress and total:
+        on_progress(total, total)
+
+
+def _download_and_verify(model_size: str, on_progress: Optional[Callable[[int, int], None]]) -> str:
+    repo_id = MODEL_MAP[model_size]
+    model_path = whisper_model_path(model_size)
+    files = _remote_files(repo_id)
+    if files is None:
+        if os.path.exists(os.path.join(model_path, "model.bin")):
+            # 离线环境下沿用已有模型，恢复联网后的下次启动再校验
+            logger.warning(f"无法校验模型 whisper-{model_size}，使用本地已有文件")
+            return model_path
+        raise RuntimeError(f"模型 whisper-{model_size} 不存在且无法获取下载信息")
+
+    total = sum(f.get("Size") or 0 for f in files)
+    started = time.perf_counter()
+    logger.info(f"下载/校验模型 whisper-{model_size}（{total / 1024 / 1024:.0f}MB）")
+    corrupted: List[str] = []
+    for attempt in range(2):
+        _download(repo_id, model_path, total, on_progress)
+        corrupted = _find_corrupted(model_path, files)
+        if not corrupted:
+            break
+        logger.warning(f"模型 whisper-{model_size} 校验失败，重新下载：{corrupted}")
+        for name in corrupted:
+            try:
+                os.remove(os.path.join(model_path, name))
+            except OSError:
+                pass
+    if corrupted:
+        raise RuntimeError(f"模型 whisper-{model_size} 校验失败：{corrupted}")
+
+    manifest: Dict[str, object] = {
+        "repo_id": repo_id,
+        "verified_at": int(time.time()),
+        "files": {f["Path"]: f.get("Sha256") for f in files},
+    }
+    with open(os.path.join(model_path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    logger.info(f"模型 whisper-{model_size} 已就绪，耗时 {time.perf_counter() - started:.1f}s")
+    return model_path
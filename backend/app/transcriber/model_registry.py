@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+from app.core.singleflight import SingleFlight
+from app.transcriber.base import Transcriber
+from app.transcriber.pool import TranscriberPool
+from app.utils.logger import get_logger
+from app.utils.path_helper import get_model_dir
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 本地模型常驻内存预算（MB），超出时按最近最少使用淘汰空闲模型，0 表示不限制
+WHISPER_MODEL_MEMORY_MB = float(os.getenv("WHISPER_MODEL_MEMORY_MB", 0))
+
+# 各尺寸 whisper 模型 float16 权重的大致占用（MB），int8 约为一半；本地已有 model.bin 时以文件大小为准
+MODEL_MEMORY_MB = {
+    "tiny": 80,
+    "base": 150,
+    "small": 490,
+    "medium": 1530,
+    "large-v1": 3100,
+    "large-v2": 3100,
+    "large-v3": 3100,
+    "large-v3-turbo": 1620,
+}
+
+
+class ModelKey(NamedTuple):
+    transcriber_type: str
+    model_size: Optional[str] = None
+    device: Optional[str] = None
+    compute_type: Optional[str] = None
+
+
+def estimate_model_mb(key: ModelKey, replicas: int = 1) -> float:
+    """
+    估算一个模型加载后的内存占用；云端转写器（无本地模型）为 0
+    """
+    if key.model_size is None:
+        return 0
+    model_bin = os.path.join(get_model_dir("whisper"), f"whisper-{key.model_size}", "model.bin")
+    if os.path.exists(model_bin):
+        size_mb = os.path.getsize(model_bin) / 1024 / 1024
+    else:
+        size_mb = MODEL_MEMORY_MB.get(key.model_size, MODEL_MEMORY_MB["medium"])
+    if key.compute_type and key.compute_type.startswith("int8"):
+        size_mb /= 2
+    return size_mb * max(1, replicas)
+
+
+class _Entry:
+    def __init__(self, transcriber: Transcriber, memory_mb: float):
+        self.transcriber = transcriber
+        self.memory_mb = memory_mb
+        self.last_used = time.monotonic()
+
+
+class ModelRegistry:
+    """
+    按 (转写器类型, 模型尺寸, 设备, 计算精度) 缓存已加载的转写器，不同任务可以使用不同的模型。
+    加载新模型前若超出内存预算，按最近最少使用顺序淘汰没有任务在用的模型；
+    都在使用中时仍会加载（暂时超出预算），避免任务因预算配置过小而无法执行。
+    """
+
+    def __init__(self, budget_mb: float = WHISPER_MODEL_MEMORY_MB):
+        self.budget_mb = budget_mb
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._flight = SingleFlight("model-load")
+        self.hits = 0
+        self.loads = 0
+        self.load_failures = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def get(self, key: ModelKey, loader: Callable[[], Transcriber], replicas: int = 1) -> Transcriber:
+        """
+        获取 key 对应的转写器，不存在时调用 loader 加载（相同 key 的并发加载合并为一次）
+
+        :param replicas: 该 key 会加载的模型副本数，用于估算内存
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_used = time.monotonic()
+                self.hits += 1
+                return entry.transcriber
+        transcriber, _ = self._flight.do(key, self._load, key, loader, replicas)
+        return transcriber
+
+    def _load(self, key: ModelKey, loader: Callable[[], Transcriber], replicas: int) -> Transcriber:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry.transcriber
+        memory_mb = estimate_model_mb(key, replicas)
+        self._make_room(memory_mb)
+        logger.info(f"加载转写模型 {tuple(key)}，预计占用 {memory_mb:.0f}MB")
+        started = time.perf_counter()
+        try:
+            transcriber = loader()
+        except Exception:
+            with self._lock:
+                self.load_failures += 1
+            raise
+        with self._lock:
+            self._entries[key] = _Entry(transcriber, memory_mb)
+            self.loads += 1
+            self.load_seconds += time.perf_counter() - started
+        return transcriber
+
+    @staticmethod
+    def _is_idle(transcriber: Transcriber) -> bool:
+        if isinstance(transcriber, TranscriberPool):
+            stats = transcriber.stats()
+            return stats["in_use"] == 0 and stats["waiting"] == 0
+        return True
+
+    def _make_room(self, needed_mb: float) -> None:
+        if self.budget_mb <= 0 or needed_mb <= 0:
+            return
+        evicted = []
+        with self._lock:
+            used = sum(entry.memory_mb for entry in self._entries.values())
+            for key in list(self._entries):
+                if used + needed_mb <= self.budget_mb:
+                    break
+                entry = self._entries[key]
+                if entry.memory_mb <= 0 or not self._is_idle(entry.transcriber):
+                    continue
+                del self._entries[key]
+                used -= entry.memory_mb
+                self.evictions += 1
+                evicted.append(key)
+            if used + needed_mb > self.budget_mb:
+                logger.warning(f"模型内存预算不足（已用 {used:.0f}MB + 需要 {needed_mb:.0f}MB > "
+                               f"{self.budget_mb:.0f}MB），其余模型均在使用中，暂时超出预算")
+        for key in evicted:
+            # 只移除登记，已借出该模型的调用结束后引用释放，内存随之回收
+            logger.info(f"淘汰空闲转写模型 {tuple(key)}")
+
+    def evict(self, key: ModelKey) -> bool:
+        """
+        主动卸载一个模型（仅在空闲时）
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._is_idle(entry.transcriber):
+                return False
+            del self._entries[key]
+            self.evictions += 1
+        logger.info(f"卸载转写模型 {tuple(key)}")
+        return True
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            models = []
+            for key, entry in self._entries.items():
+                item = {**key._asdict(), "memory_mb": round(entry.memory_mb),
+                        "idle_seconds": round(now - entry.last_used)}
+                if isinstance(entry.transcriber, TranscriberPool):
+                    item["pool"] = entry.transcriber.stats()
+                models.append(item)
+            return {
+                "budget_mb": self.budget_mb,
+                "used_mb": round(sum(entry.memory_mb for entry in self._entries.values())),
+                "hits": self.hits,
+                "loads": self.loads,
+                "load_failures": self.load_failures,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 1),
+                "coalesced_loads": self._flight.coalesced,
+                "models": models,
+            }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
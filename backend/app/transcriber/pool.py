@@ -0,0 +1,121 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, List
+
+from dotenv import load_dotenv
+
+from app.core.cancellation import check_cancelled
+from app.models.transcriber_model import TranscriptResult
+from app.transcriber.base import Transcriber
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 转写池大小：默认与转写阶段并发数一致
+WHISPER_POOL_SIZE = int(os.getenv("WHISPER_POOL_SIZE") or os.getenv("TRANSCRIBE_CONCURRENCY") or 1)
+# workers：加载一个模型，以 num_workers=N 并行推理（省内存）；replicas：加载 N 个独立模型副本
+WHISPER_POOL_MODE = os.getenv("WHISPER_POOL_MODE", "workers")
+# 每个并发推理使用的 CPU 线程数，0 表示按 CPU 核数 / 池大小自动计算
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", 0))
+
+
+# ctranslate2 单次推理超过 4 个线程后收益很小，多余的核留给长音频的并行分段
+MAX_AUTO_CPU_THREADS = 4
+
+
+def default_cpu_threads(pool_size: int) -> int:
+    """
+    将 CPU 核数平均分给池中的每个并发推理，避免多个任务同时转写时线程数超过核数
+    """
+    if WHISPER_CPU_THREADS > 0:
+        return WHISPER_CPU_THREADS
+    return max(1, min(MAX_AUTO_CPU_THREADS, (os.cpu_count() or 1) // max(1, pool_size)))
+
+
+def default_chunk_workers(pool_size: int, cpu_threads: int) -> int:
+    """
+    长音频分段并发数：池中每个转写器分到的核数 / 每个推理的线程数
+    """
+    return max(1, (os.cpu_count() or 1) // (max(1, pool_size) * max(1, cpu_threads)))
+
+
+class TranscriberPool(Transcriber):
+    """
+    转写器池：每次转写先借出一个转写器，结束后归还，池满时等待（等待期间响应任务取消）。
+    转写器在首次需要时才创建；factory 每次返回同一实例时（如 num_workers=N 的单个模型），池只负责限制并发数。
+    """
+
+    def __init__(self, factory: Callable[[], Transcriber], size: int = WHISPER_POOL_SIZE, name: str = "transcriber"):
+        self.factory = factory
+        self.size = max(1, size)
+        self.name = name
+        self._idle: "queue.Queue[Transcriber]" = queue.Queue()
+        self._created: List[Transcriber] = []
+        self._create_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+
+    def _acquire(self) -> Transcriber:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._create_lock:
+            if len(self._created) < self.size:
+                logger.info(f"{self.name} 池创建第 {len(self._created) + 1}/{self.size} 个转写器")
+                transcriber = self.factory()
+                self._created.append(transcriber)
+                return transcriber
+        with self._stats_lock:
+            self.waiting += 1
+        try:
+            while True:
+                try:
+                    return self._idle.get(timeout=0.5)
+                except queue.Empty:
+                    check_cancelled()
+        finally:
+            with self._stats_lock:
+                self.waiting -= 1
+
+    @contextmanager
+    def checkout(self):
+        transcriber = self._acquire()
+        with self._stats_lock:
+            self.in_use += 1
+            self.checkouts += 1
+        try:
+            yield transcriber
+        finally:
+            with self._stats_lock:
+                self.in_use -= 1
+            self._idle.put(transcriber)
+
+    def warmup(self) -> None:
+        """
+        预先创建一个转写器（启动时加载模型，避免首个任务等待）
+        """
+        with self.checkout():
+            pass
+
+    def transcript(self, file_path: str) -> TranscriptResult:
+        with self.checkout() as transcriber:
+            return transcriber.transcript(file_path)
+
+    def on_finish(self, video_path: str, result: TranscriptResult) -> None:
+        pass
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "size": self.size,
+                "created": len(self._created),
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+            }
@@ -1,17 +1,25 @@
 import os
 import platform
+import threading
 from enum import Enum
 
 from app.transcriber.groq import GroqTranscriber
 from app.transcriber.whisper import WhisperTranscriber
 from app.transcriber.bcut import BcutTranscriber
 from app.transcriber.kuaishou import KuaishouTranscriber
+from app.transcriber.pool import TranscriberPool, WHISPER_POOL_MODE, WHISPER_POOL_SIZE, default_chunk_workers, \
+    default_cpu_threads
+from app.transcriber.whisper import WHISPER_CHUNK_WORKERS
+from app.transcriber.whisper_batched import BatchedWhisperTranscriber, WHISPER_BATCH_SIZE
+from app.transcriber.model_registry import ModelKey, get_model_registry
+from app.utils.env_checker import is_cuda_available
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 class TranscriberType(str, Enum):
     FAST_WHISPER = "fast-whisper"
+    FAST_WHISPER_BATCHED = "fast-whisper-batched"
     MLX_WHISPER = "mlx-whisper"
     BCUT = "bcut"
     KUAISHOU = "kuaishou"
@@ -29,33 +37,95 @@ if platform.system() == "Darwin" and os.environ.get("TRANSCRIBER_TYPE") == "mlx-
 
 logger.info('初始化转录服务提供器')
 
-# 转录器单例缓存
+# 云端转录器单例缓存；本地模型（fast-whisper / mlx-whisper）按模型尺寸、设备等缓存在 ModelRegistry 中
 _transcribers = {
-    TranscriberType.FAST_WHISPER: None,
-    TranscriberType.MLX_WHISPER: None,
     TranscriberType.BCUT: None,
     TranscriberType.KUAISHOU: None,
     TranscriberType.GROQ: None,
 }
 
+# 并发的首次请求只创建一次实例（避免重复加载模型）
+_init_lock = threading.Lock()
+
 # 公共实例初始化函数
 def _init_transcriber(key: TranscriberType, cls, *args, **kwargs):
     if _transcribers[key] is None:
-        logger.info(f'创建 {cls.__name__} 实例: {key}')
-        try:
-            _transcribers[key] = cls(*args, **kwargs)
-            logger.info(f'{cls.__name__} 创建成功')
-        except Exception as e:
-            logger.error(f"{cls.__name__} 创建失败: {e}")
-            raise
+        with _init_lock:
+            if _transcribers[key] is None:
+                logger.info(f'创建 {cls.__name__} 实例: {key}')
+                try:
+                    _transcribers[key] = cls(*args, **kwargs)
+                    logger.info(f'{cls.__name__} 创建成功')
+                except Exception as e:
+                    logger.error(f"{cls.__name__} 创建失败: {e}")
+                    raise
     return _transcribers[key]
 
+
+def _resolve_device(device: str = None, compute_type: str = None):
+    """
+    与 WhisperTranscriber 相同的设备/精度选择规则，用于确定模型在注册表中的 key
+    """
+    device = "cuda" if device not in (None, "cpu") and is_cuda_available() else "cpu"
+    return device, compute_type or ("float16" if device == "cuda" else "int8")
+
+
+def _create_whisper_pool(model_size="base", device="cuda", batched: bool = False,
+                         compute_type: str = None) -> TranscriberPool:
+    """
+    创建 fast-whisper 转写池，每个并发推理的 CPU 线程数按核数平均分配
+
+    :param batched: 使用 BatchedInferencePipeline 批量推理（批大小由 WHISPER_BATCH_SIZE 配置）
+    """
+    size = WHISPER_POOL_SIZE
+    cpu_threads = default_cpu_threads(size)
+    name = "fast-whisper-batched" if batched else "fast-whisper"
+    if batched:
+        cls = BatchedWhisperTranscriber
+        extra = {"batch_size": WHISPER_BATCH_SIZE}
+        logger.info(f'{name} 转写池：模式 {WHISPER_POOL_MODE}，大小 {size}，每个推理 {cpu_threads} 线程，'
+                    f'batch_size {WHISPER_BATCH_SIZE}')
+    else:
+        cls = WhisperTranscriber
+        extra = {"chunk_workers": WHISPER_CHUNK_WORKERS or default_chunk_workers(size, cpu_threads)}
+        logger.info(f'{name} 转写池：模式 {WHISPER_POOL_MODE}，大小 {size}，每个推理 {cpu_threads} 线程，'
+                    f'长音频分段并发 {extra["chunk_workers"]}')
+    if WHISPER_POOL_MODE == "replicas":
+        def factory():
+            return cls(model_size=model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads,
+                       **extra)
+    else:
+        shared = []
+
+        def factory():
+            # 单个模型，num_workers=size 允许 size 个线程同时推理
+            if not shared:
+                shared.append(cls(model_size=model_size, device=device, compute_type=compute_type,
+                                  cpu_threads=cpu_threads, num_workers=size, **extra))
+            return shared[0]
+    pool = TranscriberPool(factory, size=size, name=name)
+    # 启动时加载第一个模型，其余副本按需创建
+    pool.warmup()
+    return pool
+
 # 各类型获取方法
 def get_groq_transcriber():
     return _init_transcriber(TranscriberType.GROQ, GroqTranscriber)
 
-def get_whisper_transcriber(model_size="base", device="cuda"):
-    return _init_transcriber(TranscriberType.FAST_WHISPER, WhisperTranscriber, model_size=model_size, device=device)
+def get_whisper_transcriber(model_size="base", device="cuda", compute_type=None, batched=False):
+    device, compute_type = _resolve_device(device, compute_type)
+    transcriber_type = TranscriberType.FAST_WHISPER_BATCHED if batched else TranscriberType.FAST_WHISPER
+    key = ModelKey(transcriber_type.value, model_size, device, compute_type)
+    replicas = WHISPER_POOL_SIZE if WHISPER_POOL_MODE == "replicas" else 1
+    return get_model_registry().get(
+        key,
+        lambda: _create_whisper_pool(model_size=model_size, device=device, batched=batched,
+                                     compute_type=compute_type),
+        replicas=replicas,
+    )
+
+def get_batched_whisper_transcriber(model_size="base", device="cuda", compute_type=None):
+    return get_whisper_transcriber(model_size, device=device, compute_type=compute_type, batched=True)
 
 def get_bcut_transcriber():
     return _init_transcriber(TranscriberType.BCUT, BcutTranscriber)
@@ -67,17 +137,19 @@ def get_mlx_whisper_transcriber(model_size="base"):
     if not MLX_WHISPER_AVAILABLE:
         logger.warning("MLX Whisper 不可用，请确保在 Apple 平台且已安装 mlx_whisper")
         raise ImportError("MLX Whisper 不可用")
-    return _init_transcriber(TranscriberType.MLX_WHISPER, MLXWhisperTranscriber, model_size=model_size)
+    key = ModelKey(TranscriberType.MLX_WHISPER.value, model_size, "mps")
+    return get_model_registry().get(key, lambda: MLXWhisperTranscriber(model_size=model_size))
 
 # 通用入口
-def get_transcriber(transcriber_type="fast-whisper", model_size="base", device="cuda"):
+def get_transcriber(transcriber_type="fast-whisper", model_size=None, device="cuda", compute_type=None):
     """
     获取指定类型的转录器实例
 
     参数:
-        transcriber_type: 支持 "fast-whisper", "mlx-whisper", "bcut", "kuaishou", "groq"
-        model_size: 模型大小，适用于 whisper 类
+        transcriber_type: 支持 "fast-whisper", "fast-whisper-batched", "mlx-whisper", "bcut", "kuaishou", "groq"
+        model_size: 模型大小，适用于 whisper 类；为空时使用 WHISPER_MODEL_SIZE（默认 base）
         device: 设备类型（如 cuda / cpu），仅 whisper 使用
+        compute_type: 计算精度（如 int8 / float16），为空时按设备选择，仅 fast-whisper 使用
 
     返回:
         对应类型的转录器实例
@@ -90,15 +162,18 @@ def get_transcriber(transcriber_type="fast-whisper", model_size="base", device="
         logger.warning(f'未知转录器类型 "{transcriber_type}"，默认使用 fast-whisper')
         transcriber_enum = TranscriberType.FAST_WHISPER
 
-    whisper_model_size = os.environ.get("WHISPER_MODEL_SIZE", model_size)
+    whisper_model_size = model_size or os.environ.get("WHISPER_MODEL_SIZE", "base")
 
     if transcriber_enum == TranscriberType.FAST_WHISPER:
-        return get_whisper_transcriber(whisper_model_size, device=device)
+        return get_whisper_transcriber(whisper_model_size, device=device, compute_type=compute_type)
+
+    elif transcriber_enum == TranscriberType.FAST_WHISPER_BATCHED:
+        return get_batched_whisper_transcriber(whisper_model_size, device=device, compute_type=compute_type)
 
     elif transcriber_enum == TranscriberType.MLX_WHISPER:
         if not MLX_WHISPER_AVAILABLE:
             logger.warning("MLX Whisper 不可用，回退到 fast-whisper")
-            return get_whisper_transcriber(whisper_model_size, device=device)
+            return get_whisper_transcriber(whisper_model_size, device=device, compute_type=compute_type)
         return get_mlx_whisper_transcriber(whisper_model_size)
 
     elif transcriber_enum == TranscriberType.BCUT:
@@ -112,4 +187,11 @@ def get_transcriber(transcriber_type="fast-whisper", model_size="base", device="
 
     # fallback
     logger.warning(f'未识别转录器类型 "{transcriber_type}"，使用 fast-whisper 作为默认')
-    return get_whisper_transcriber(whisper_model_size, device=device)
+    return get_whisper_transcriber(whisper_model_size, device=device, compute_type=compute_type)
+
+
+def get_transcriber_stats() -> dict:
+    """
+    已加载的本地模型、各转写池的使用情况与模型加载/淘汰计数
+    """
+    return get_model_registry().stats()
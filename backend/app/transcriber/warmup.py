@@ -0,0 +1,184 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.transcriber.model_download import ensure_whisper_model
+from app.transcriber.transcriber_provider import TranscriberType, get_transcriber
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 除默认模型外，启动时额外预热的 whisper 模型尺寸（逗号分隔），不影响就绪判断
+WHISPER_WARMUP_MODELS = [m.strip() for m in os.getenv("WHISPER_WARMUP_MODELS", "").split(",") if m.strip()]
+# 预热失败后的重试间隔上限（秒），从 10 秒开始逐次翻倍
+MODEL_WARMUP_MAX_BACKOFF = float(os.getenv("MODEL_WARMUP_MAX_BACKOFF", 300))
+
+LOCAL_TRANSCRIBERS = {TranscriberType.FAST_WHISPER, TranscriberType.FAST_WHISPER_BATCHED, TranscriberType.MLX_WHISPER}
+
+
+class _WarmupState:
+    def __init__(self, transcriber_type: str, model_size: Optional[str], required: bool):
+        self.transcriber_type = transcriber_type
+        self.model_size = model_size
+        self.required = required
+        self.status = "pending"
+        self.downloaded = 0
+        self.total = 0
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        item = {
+            "transcriber_type": self.transcriber_type,
+            "model_size": self.model_size,
+            "required": self.required,
+            "status": self.status,
+            "attempts": self.attempts,
+        }
+        if self.total:
+            item["download"] = {
+                "progress": round(self.downloaded / self.total, 3),
+                "downloaded_mb": round(self.downloaded / 1024 / 1024),
+                "total_mb": round(self.total / 1024 / 1024),
+            }
+        if self.error:
+            item["error"] = self.error
+        if self.ready_at and self.started_at:
+            item["warmup_seconds"] = round(self.ready_at - self.started_at, 1)
+        return item
+
+
+class ModelWarmup:
+    """
+    在后台线程中下载、校验并加载转写模型，服务启动后立即可以响应健康检查；
+    默认转写器加载完成前 is_ready() 为 False，提交任务的接口据此返回 503。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, _WarmupState] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._ready_callbacks: List[Callable[[], None]] = []
+        self._ready_fired = False
+
+    def start(self, transcriber_type: str, extra_models: Optional[List[str]] = None) -> None:
+        """
+        :param transcriber_type: 默认转写器类型（就绪判断以它为准）
+        :param extra_models: 额外预热的 whisper 模型尺寸
+        """
+        try:
+            transcriber_enum = TranscriberType(transcriber_type)
+        except ValueError:
+            transcriber_enum = TranscriberType.FAST_WHISPER
+        local = transcriber_enum in LOCAL_TRANSCRIBERS
+        default_model = os.getenv("WHISPER_MODEL_SIZE", "base") if local else None
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._add(transcriber_enum.value, default_model, required=True)
+            if local:
+                for model_size in extra_models or []:
+                    self._add(transcriber_enum.value, model_size, required=False)
+            self._thread = threading.Thread(target=self._run, daemon=True, name="model-warmup")
+            self._thread.start()
+
+    def _add(self, transcriber_type: str, model_size: Optional[str], required: bool):
+        self._states[f"{transcriber_type}/{model_size}" if model_size else transcriber_type] = \
+            _WarmupState(transcriber_type, model_size, required)
+
+    def _run(self):
+        for state in list(self._states.values()):
+            backoff = 10.0
+            while not self._warm(state):
+                if not state.required:
+                    break
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MODEL_WARMUP_MAX_BACKOFF)
+            # 必需的转写器就绪后立即回调，不等待额外模型预热完成
+            if self.is_ready():
+                self._fire_ready()
+
+    def when_ready(self, callback: Callable[[], None]) -> None:
+        """
+        必需的转写器就绪后执行 callback：已就绪（或未启动预热）时在当前线程立即执行，
+        否则在预热线程中就绪后执行
+        """
+        with self._lock:
+            if not (self._ready_fired or self.is_ready()):
+                self._ready_callbacks.append(callback)
+                return
+        callback()
+
+    def _fire_ready(self):
+        with self._lock:
+            if self._ready_fired:
+                return
+            self._ready_fired = True
+            callbacks, self._ready_callbacks = self._ready_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"转写器就绪回调执行失败：{e}", exc_info=True)
+
+    def _warm(self, state: _WarmupState) -> bool:
+        state.attempts += 1
+        state.started_at = state.started_at or time.time()
+        state.error = None
+        try:
+            if state.transcriber_type in (TranscriberType.FAST_WHISPER.value,
+                                          TranscriberType.FAST_WHISPER_BATCHED.value):
+                state.status = "downloading"
+
+                def on_progress(downloaded: int, total: int):
+                    state.downloaded, state.total = downloaded, total
+
+                ensure_whisper_model(state.model_size, on_progress=on_progress)
+            state.status = "loading"
+            get_transcriber(transcriber_type=state.transcriber_type, model_size=state.model_size)
+        except Exception as e:
+            logger.error(f"转写模型预热失败 ({state.transcriber_type} {state.model_size or ''})：{e}")
+            state.status = "failed"
+            state.error = str(e)
+            return False
+        state.status = "ready"
+        state.ready_at = time.time()
+        logger.info(f"转写器已就绪：{state.transcriber_type} {state.model_size or ''}")
+        return True
+
+    def is_ready(self) -> bool:
+        """
+        所有必需的转写器都已加载；未启动预热（如 celery 模式下的 API 节点）时视为就绪
+        """
+        return all(state.status == "ready" for state in self._states.values() if state.required)
+
+    def describe(self) -> str:
+        pending = [state for state in self._states.values() if state.required and state.status != "ready"]
+        if not pending:
+            return "就绪"
+        state = pending[0]
+        if state.status == "downloading" and state.total:
+            return f"模型下载中 {state.downloaded / state.total:.0%}"
+        if state.status == "failed":
+            return f"模型加载失败，正在重试：{state.error}"
+        return "模型加载中"
+
+    def status(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "message": self.describe(),
+            "transcribers": [state.to_dict() for state in self._states.values()],
+        }
+
+
+_warmup = ModelWarmup()
+
+
+def get_model_warmup() -> ModelWarmup:
+    return _warmup
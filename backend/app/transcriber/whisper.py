@@ -1,8 +1,23 @@
+import contextvars
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import List, Optional, Tuple
+
+import av
 from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
 
+from app.core.cancellation import check_cancelled
+from app.core.partial_transcript import PartialTranscript
+from app.core.progress import report_progress
 from app.decorators.timeit import timeit
+from app.enmus.task_status_enums import TaskStatus
+from app.exceptions.task import TaskCancelledError
 from app.models.transcriber_model import TranscriptSegment, TranscriptResult
 from app.transcriber.base import Transcriber
+from app.transcriber.model_download import MODEL_MAP, ensure_whisper_model
 from app.utils.env_checker import is_cuda_available, is_torch_installed
 from app.utils.logger import get_logger
 from app.utils.path_helper import get_model_dir
@@ -11,7 +26,6 @@ from events import transcription_finished
 from pathlib import Path
 import os
 from tqdm import tqdm
-from modelscope import snapshot_download
 
 
 '''
@@ -19,16 +33,16 @@ from modelscope import snapshot_download
 '''
 logger=get_logger(__name__)
 
-MODEL_MAP={
-    "tiny": "pengzhendong/faster-whisper-tiny",
-    'base':'pengzhendong/faster-whisper-base',
-    'small':'pengzhendong/faster-whisper-small',
-    'medium':'pengzhendong/faster-whisper-medium',
-    'large-v1':'pengzhendong/faster-whisper-large-v1',
-    'large-v2':'pengzhendong/faster-whisper-large-v2',
-    'large-v3':'pengzhendong/faster-whisper-large-v3',
-    'large-v3-turbo':'pengzhendong/faster-whisper-large-v3-turbo',
-}
+SAMPLE_RATE = 16000
+VAD_PARAMETERS = dict(min_silence_duration_ms=1000)
+
+# 长音频分段并行转写：超过该时长（秒）的音频按静音切分后并行转写，0 表示关闭
+WHISPER_LONG_AUDIO_SECONDS = float(os.getenv("WHISPER_LONG_AUDIO_SECONDS", 1800))
+# 每段的目标时长（秒），实际切点落在最近的静音处
+WHISPER_CHUNK_SECONDS = float(os.getenv("WHISPER_CHUNK_SECONDS", 600))
+# 单个长音频同时转写的分段数，0 表示按 CPU 核数 / 每个推理的线程数自动计算
+WHISPER_CHUNK_WORKERS = int(os.getenv("WHISPER_CHUNK_WORKERS", 0))
+
 
 class WhisperTranscriber(Transcriber):
     # TODO:修改为可配置
@@ -37,8 +51,15 @@ class WhisperTranscriber(Transcriber):
             model_size: str = "base",
             device: str = 'cpu',
             compute_type: str = None,
-            cpu_threads: int = 1,
+            cpu_threads: int = 0,
+            num_workers: int = 1,
+            chunk_workers: int = WHISPER_CHUNK_WORKERS,
     ):
+        """
+        :param cpu_threads: 每次推理使用的 CPU 线程数，0 表示使用 ctranslate2 默认值
+        :param num_workers: 同一模型可并行执行的 transcribe 调用数（多个线程同时调用时生效）
+        :param chunk_workers: 长音频分段并行转写的并发数，0 表示自动
+        """
         if device == 'cpu' or device is None:
             self.device = 'cpu'
         else:
@@ -49,22 +70,21 @@ class WhisperTranscriber(Transcriber):
         self.compute_type = compute_type or ("float16" if self.device == "cuda" else "int8")
 
         model_dir = get_model_dir("whisper")
-        model_path = os.path.join(model_dir, f"whisper-{model_size}")
-        model_bin_path = os.path.join(model_dir, f"whisper-{model_size}/model.bin")
-        if not Path(model_path).exists() or not Path(model_bin_path).exists():
-            logger.info(f"模型 whisper-{model_size} 不存在，开始下载...")
-            repo_id = MODEL_MAP[model_size]
-            model_path = snapshot_download(
-                repo_id,
-
-                local_dir=model_path,
-            )
-            logger.info("模型下载完成")
+        # 缺失或未通过校验时下载（断点续传）并校验
+        model_path = ensure_whisper_model(model_size)
+
+        if chunk_workers <= 0:
+            # ctranslate2 默认每个推理使用 4 个线程
+            chunk_workers = 1 if self.device == "cuda" else max(1, (os.cpu_count() or 1) // (cpu_threads or 4))
+        self.chunk_workers = chunk_workers if WHISPER_LONG_AUDIO_SECONDS > 0 else 1
 
         self.model = WhisperModel(
             model_size_or_path=model_path,
             device=self.device,
             compute_type=self.compute_type,
+            cpu_threads=cpu_threads,
+            # 分段并行时同一模型需要足够的 worker，否则并发调用会在 ctranslate2 内部排队
+            num_workers=max(num_workers, self.chunk_workers),
             download_root=model_dir
         )
     @staticmethod
@@ -94,25 +114,36 @@ class WhisperTranscriber(Transcriber):
     @timeit
     def transcript(self, file_path: str) -> TranscriptResult:
         try:
+            source = file_path
+            # 先读容器头中的时长，短音频直接把路径交给模型，省去整段解码与 VAD 切分
+            if self.chunk_workers > 1 and self._long_audio(file_path):
+                audio = decode_audio(file_path, sampling_rate=SAMPLE_RATE)
+                bounds = self._plan_chunks(audio)
+                if len(bounds) > 1:
+                    return self._transcript_chunked(audio, bounds)
+                source = audio
 
-            segments_raw, info = self.model.transcribe(file_path,task="transcribe",
-                                                        vad_filter=True,
-                                                        vad_parameters=dict(
-                                                        min_silence_duration_ms=1000,
-                                                        # threshold=0.5
-                                                        ))
+            segments_raw, info = self._run_model(source)
 
             segments = []
             full_text = ""
 
-            for seg in segments_raw:
-                text = seg.text.strip()
-                full_text += text + " "
-                segments.append(TranscriptSegment(
-                    start=seg.start,
-                    end=seg.end,
-                    text=text
-                ))
+            # segments_raw 是惰性生成器，逐段解码；每段检查一次取消标记，停止迭代即停止推理
+            # 每段同时写入临时字幕并推送，前端可在转写完成前展示已识别的部分
+            with PartialTranscript() as partial:
+                for seg in segments_raw:
+                    check_cancelled()
+                    text = seg.text.strip()
+                    full_text += text + " "
+                    segment = TranscriptSegment(
+                        start=seg.start,
+                        end=seg.end,
+                        text=text
+                    )
+                    segments.append(segment)
+                    partial.append(segment)
+                    if info.duration:
+                        report_progress(TaskStatus.TRANSCRIBING, seg.end / info.duration, segments=len(segments))
 
             result= TranscriptResult(
                 language=info.language,
@@ -122,9 +153,145 @@ class WhisperTranscriber(Transcriber):
             )
             # self.on_finish(file_path, result)
             return result
+        except TaskCancelledError:
+            raise
+        except Exception as e:
+            # 抛出而不是返回 None，避免分段失败被当成空的转写结果继续生成笔记
+            logger.error(f"转写失败（{file_path}）：{e}", exc_info=True)
+            raise
+
+
+    def _run_model(self, source):
+        """
+        对文件路径或已解码的音频执行一次推理，返回 (惰性的字幕生成器, TranscriptionInfo)
+        """
+        return self.model.transcribe(source, task="transcribe", vad_filter=True, vad_parameters=VAD_PARAMETERS)
+
+    # ---------------- 长音频分段并行 ----------------
+
+    @staticmethod
+    def _audio_seconds(file_path: str) -> Optional[float]:
+        """
+        从容器头读取音频时长（不解码），读取失败返回 None
+        """
+        try:
+            with av.open(file_path) as container:
+                if container.duration:
+                    return container.duration / av.time_base
         except Exception as e:
-            print(f"转写失败：{e}")
+            logger.warning(f"读取音频时长失败（{file_path}）：{e}")
+        return None
+
+    def _long_audio(self, file_path: str) -> bool:
+        duration = self._audio_seconds(file_path)
+        # 时长未知时按长音频处理，解码后由 _plan_chunks 按实际长度判断
+        return duration is None or duration >= WHISPER_LONG_AUDIO_SECONDS
+
+    def _plan_chunks(self, audio) -> List[Tuple[int, int]]:
+        """
+        对长音频做一次 VAD，在语音段之间的静音中点切分为约 WHISPER_CHUNK_SECONDS 的分段
+
+        :return: [(起始采样点, 结束采样点)]，不需要切分时只有一段
+        """
+        total = len(audio)
+        if total < WHISPER_LONG_AUDIO_SECONDS * SAMPLE_RATE:
+            return [(0, total)]
+        speech = get_speech_timestamps(audio, VadOptions(**VAD_PARAMETERS))
+        target = int(WHISPER_CHUNK_SECONDS * SAMPLE_RATE)
+        bounds = []
+        chunk_start = 0
+        for prev, nxt in zip(speech, speech[1:]):
+            if prev["end"] - chunk_start >= target:
+                cut = (prev["end"] + nxt["start"]) // 2
+                bounds.append((chunk_start, cut))
+                chunk_start = cut
+        if bounds and total - chunk_start < target // 2:
+            # 末尾过短的分段并入前一段
+            bounds[-1] = (bounds[-1][0], total)
+        else:
+            bounds.append((chunk_start, total))
+        return bounds
+
+    def _transcribe_chunk(self, audio, start: int, end: int,
+                          stop: threading.Event) -> Tuple[List[TranscriptSegment], str]:
+        segments_raw, info = self._run_model(audio[start:end])
+        offset = start / SAMPLE_RATE
+        segments = []
+        for seg in segments_raw:
+            check_cancelled()
+            if stop.is_set():
+                # 其他分段已失败或任务被取消，结果不会再被使用
+                break
+            segments.append(TranscriptSegment(start=seg.start + offset, end=seg.end + offset, text=seg.text.strip()))
+        return segments, info.language
 
+    def _transcript_chunked(self, audio, bounds: List[Tuple[int, int]]) -> TranscriptResult:
+        """
+        各分段在线程中并行转写（ctranslate2 推理时释放 GIL，同一模型的多个 worker 可真正并行），
+        按顺序合并并校正时间偏移；已完成的连续前缀分段立即写入临时字幕
+        """
+        total_seconds = len(audio) / SAMPLE_RATE
+        logger.info(f"长音频分段转写：{total_seconds:.0f}s 切分为 {len(bounds)} 段，并发 {self.chunk_workers}")
+        results = [None] * len(bounds)
+        merged: List[TranscriptSegment] = []
+        emitted = 0
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.chunk_workers, thread_name_prefix="whisper-chunk")
+        try:
+            # 复制上下文，分段线程中的 check_cancelled 仍能感知当前任务的取消
+            futures = {
+                pool.submit(contextvars.copy_context().run, self._transcribe_chunk, audio, start, end, stop): i
+                for i, (start, end) in enumerate(bounds)
+            }
+            pending = set(futures)
+            with PartialTranscript() as partial:
+                while pending:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+                    check_cancelled()
+                    for future in done:
+                        results[futures[future]] = future.result()
+                    while emitted < len(bounds) and results[emitted] is not None:
+                        for segment in self._dedupe_seam(merged, results[emitted][0]):
+                            merged.append(segment)
+                            partial.append(segment)
+                        emitted += 1
+                    if emitted:
+                        report_progress(TaskStatus.TRANSCRIBING, bounds[emitted - 1][1] / len(audio),
+                                        segments=len(merged), chunks=f"{emitted}/{len(bounds)}")
+        finally:
+            # 结束（包括某段失败或任务取消）时通知正在执行的分段在下一条字幕处退出，
+            # 丢弃尚未开始的分段，不等待正在执行的分段
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        # 语言按各分段时长投票
+        votes = Counter()
+        for (start, end), (_, language) in zip(bounds, results):
+            votes[language] += end - start
+        return TranscriptResult(
+            language=votes.most_common(1)[0][0],
+            full_text=" ".join(seg.text for seg in merged).strip(),
+            segments=merged,
+            raw={"chunks": len(bounds), "duration": total_seconds},
+        )
+
+    @staticmethod
+    def _dedupe_seam(merged: List[TranscriptSegment], segments: List[TranscriptSegment]) -> List[TranscriptSegment]:
+        """
+        去掉分段衔接处与上一段重叠的字幕：完全落在上一段之前的、与上一段文本相同的丢弃，部分重叠的裁掉开头
+        """
+        if not merged:
+            return segments
+        last = merged[-1]
+        kept = []
+        for seg in segments:
+            if seg.end <= last.end or (seg.start < last.end and seg.text == last.text):
+                continue
+            if seg.start < last.end:
+                seg.start = last.end
+            kept.append(seg)
+            last = seg
+        return kept
 
     def on_finish(self,video_path:str,result: TranscriptResult)->None:
         print("转写完成")
@@ -0,0 +1,32 @@
+import os
+
+from dotenv import load_dotenv
+from faster_whisper import BatchedInferencePipeline
+
+from app.transcriber.whisper import VAD_PARAMETERS, WhisperTranscriber
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 批量推理时每批送入编码器/解码器的语音片段数，越大吞吐越高，内存占用也越高
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", 8))
+
+
+class BatchedWhisperTranscriber(WhisperTranscriber):
+    """
+    使用 faster-whisper 的 BatchedInferencePipeline：先按 VAD 切出语音片段，再成批送入模型推理，
+    CPU 上吞吐明显高于逐段顺序解码。输出与 WhisperTranscriber 相同。
+    """
+
+    def __init__(self, *args, batch_size: int = WHISPER_BATCH_SIZE, **kwargs):
+        # 批量推理本身已在片段间并行，不再对长音频做分段并行
+        kwargs["chunk_workers"] = 1
+        super().__init__(*args, **kwargs)
+        self.batch_size = max(1, batch_size)
+        self.pipeline = BatchedInferencePipeline(model=self.model)
+        logger.info(f"fast-whisper 批量推理已启用，batch_size={self.batch_size}")
+
+    def _run_model(self, source):
+        return self.pipeline.transcribe(source, task="transcribe", batch_size=self.batch_size,
+                                        vad_filter=True, vad_parameters=VAD_PARAMETERS)
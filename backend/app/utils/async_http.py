@@ -0,0 +1,65 @@
+import asyncio
+import os
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.cancellation import check_cancelled
+from app.core.progress import report_progress
+from app.enmus.task_status_enums import TaskStatus
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# httpx.AsyncClient 绑定创建时的事件循环，按事件循环分别复用连接池
+_clients: Dict[int, httpx.AsyncClient] = {}
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    返回当前事件循环共享的 AsyncClient（需在协程中调用）
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(id(loop))
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=httpx.Timeout(30.0, read=120.0),
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+        )
+        _clients[id(loop)] = client
+    return client
+
+
+async def close_async_client() -> None:
+    loop = asyncio.get_running_loop()
+    client = _clients.pop(id(loop), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def download_to_file(url: str, output_path: str, headers: Optional[dict] = None) -> str:
+    """
+    流式下载到文件：先写入 .part 临时文件，完成后重命名，中途失败/取消不会留下不完整的目标文件
+    """
+    tmp_path = f"{output_path}.part"
+    client = get_async_client()
+    try:
+        async with client.stream("GET", url, headers=headers) as resp:
+            resp.raise_for_status()
+            total = int(resp.headers.get("content-length") or 0) or None
+            downloaded = 0
+            with open(tmp_path, "wb") as f:
+                async for chunk in resp.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    check_cancelled()
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    report_progress(TaskStatus.DOWNLOADING, downloaded / total if total else None,
+                                    downloaded_bytes=downloaded, total_bytes=total)
+        os.replace(tmp_path, output_path)
+        return output_path
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -10,16 +10,16 @@ from fastapi.responses import JSONResponse
 
 class ResponseWrapper:
     @staticmethod
-    def success(data=None, msg="success", code=0):
-        return SafeJSONResponse(content={
+    def success(data=None, msg="success", code=0, headers=None):
+        return SafeJSONResponse(headers=headers, content={
             "code": code,
             "msg": msg,
             "data": data
         })
 
     @staticmethod
-    def error(msg="error", code=500, data=None):
-        return SafeJSONResponse(content={
+    def error(msg="error", code=500, data=None, status_code=200, headers=None):
+        return SafeJSONResponse(status_code=status_code, headers=headers, content={
             "code": code,
             "msg": str(msg),
             "data": data
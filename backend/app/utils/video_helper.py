@@ -3,6 +3,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 import subprocess
+
+from app.core.cancellation import run_process
 import os
 import uuid
 load_dotenv()
@@ -33,7 +35,7 @@ def generate_screenshot(video_path: str, output_dir: str, timestamp: int, index:
     ]
 
     print("Running command:", command)
-    result = subprocess.run(command, capture_output=True, text=True)
+    result = run_process(command, capture_output=True, text=True)
 
     if result.returncode != 0:
         print("ffmpeg failed:", result.stderr)
@@ -5,6 +5,7 @@ import subprocess
 import ffmpeg
 from PIL import Image, ImageDraw, ImageFont
 
+from app.core.cancellation import run_process
 from app.utils.logger import get_logger
 from app.utils.path_helper import get_app_dir
 
@@ -56,7 +57,7 @@ class VideoReader:
                 output_path = os.path.join(self.frame_dir, f"frame_{time_label}.jpg")
                 cmd = ["ffmpeg", "-ss", str(ts), "-i", self.video_path, "-frames:v", "1", "-q:v", "2", "-y", output_path,
                        "-hide_banner", "-loglevel", "error"]
-                subprocess.run(cmd, check=True)
+                run_process(cmd, check=True)
                 image_paths.append(output_path)
             return image_paths
         except Exception as e:
@@ -1,13 +1,19 @@
 # 注册监听器
 from app.utils.logger import get_logger
-from events.handlers import cleanup_temp_files
-from events.signals import transcription_finished
+from events.handlers import cleanup_temp_files, publish_task_event, publish_transcript_segment, \
+    publish_summary_delta, request_storage_sweep
+from events.signals import transcription_finished, task_status_changed, transcript_segment_added, \
+    summary_delta_added
 
 logger = get_logger(__name__)
 
 def  register_handler():
     try:
         transcription_finished.connect(cleanup_temp_files)
+        task_status_changed.connect(publish_task_event)
+        task_status_changed.connect(request_storage_sweep)
+        transcript_segment_added.connect(publish_transcript_segment)
+        summary_delta_added.connect(publish_summary_delta)
         logger.info("注册监听器成功")
     except Exception as e:
         logger.error(f"注册监听器失败:{e}")
@@ -23,3 +23,28 @@ def cleanup_temp_files(data):
                 logger.info(f"删除文件：{full_path}")
             except Exception as e:
                 logger.error(f"删除失败：{full_path}，原因：{e}")
+
+
+def publish_task_event(task_id, **kwargs):
+    # 转发到进程内事件总线，由 SSE 连接推送给前端
+    from app.core.task_events import get_task_event_bus
+    get_task_event_bus().publish(task_id, kwargs)
+
+
+def publish_transcript_segment(task_id, segment):
+    # 字幕段只推送给当前订阅者，不覆盖任务的最新状态
+    from app.core.task_events import get_task_event_bus
+    get_task_event_bus().publish(task_id, {"segment": segment}, kind="segment")
+
+
+def publish_summary_delta(task_id, delta, offset):
+    from app.core.task_events import get_task_event_bus
+    get_task_event_bus().publish(task_id, {"delta": delta, "offset": offset}, kind="markdown")
+
+
+def request_storage_sweep(task_id, status=None, **kwargs):
+    # 任务结束后其产物不再受保护，触发一次磁盘配额检查
+    from app.core.storage_manager import get_storage_manager
+    from app.enmus.task_status_enums import TaskStatus
+    if TaskStatus.is_terminal(status):
+        get_storage_manager().request_sweep()
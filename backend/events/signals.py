@@ -1,2 +1,8 @@
 from blinker import signal
-transcription_finished = signal("transcription_finished")
\ No newline at end of file
+transcription_finished = signal("transcription_finished")
+# 任务状态变更：sender 为 task_id，kwargs 包含 status / message / progress，任务完成时额外携带 result
+task_status_changed = signal("task_status_changed")
+# 转写过程中产生一段字幕：sender 为 task_id，kwargs 包含 segment（含 index/start/end/text）
+transcript_segment_added = signal("transcript_segment_added")
+# LLM 流式生成笔记的增量：sender 为 task_id，kwargs 包含 delta 与其在笔记中的字符偏移 offset
+summary_delta_added = signal("summary_delta_added")
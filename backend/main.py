@@ -14,7 +14,9 @@ from app.exceptions.exception_handlers import register_exception_handlers
 # from app.db.provider_dao import init_provider_table
 from app.utils.logger import get_logger
 from app import create_app
-from app.transcriber.transcriber_provider import get_transcriber
+from app.core.storage_manager import get_storage_manager
+from app.services.note_task import TASK_BACKEND, recover_unfinished_tasks, shutdown_dispatchers
+from app.transcriber.warmup import WHISPER_WARMUP_MODELS, get_model_warmup
 from events import register_handler
 from ffmpeg_helper import ensure_ffmpeg_or_raise
 
@@ -40,9 +42,16 @@ if not os.path.exists(out_dir):
 async def lifespan(app: FastAPI):
     register_handler()
     init_db()
-    get_transcriber(transcriber_type=os.getenv("TRANSCRIBER_TYPE", "fast-whisper"))
+    if TASK_BACKEND != "celery":
+        # 模型下载/加载放到后台，服务立即可以响应健康检查；就绪前提交任务返回 503（见 /api/readiness）
+        # celery 模式下转写在 worker 节点执行，API 节点无需加载模型
+        get_model_warmup().start(os.getenv("TRANSCRIBER_TYPE", "fast-whisper"), WHISPER_WARMUP_MODELS)
     seed_default_providers()
+    # 恢复的任务同样要等转写器就绪，否则会在预热下载模型的同时同步加载模型
+    get_model_warmup().when_ready(recover_unfinished_tasks)
+    get_storage_manager().start()
     yield
+    shutdown_dispatchers()
 
 app = create_app(lifespan=lifespan)
 origins = [
@@ -0,0 +1,35 @@
+import os
+
+from dotenv import load_dotenv
+
+from app.core.celery_app import celery_app
+from app.db.init_db import init_db
+from app.transcriber.transcriber_provider import get_transcriber
+from app.utils.logger import get_logger
+from events import register_handler
+
+logger = get_logger(__name__)
+load_dotenv()
+
+'''
+笔记任务 worker 入口：从消息队列中取任务执行 NoteGenerator 流程。
+API 节点设置 TASK_BACKEND=celery 后只负责入队，可在多台机器上启动多个 worker 横向扩展转写能力：
+
+    python worker.py
+'''
+
+if __name__ == "__main__":
+    register_handler()
+    init_db()
+    # 预加载转写模型，worker 内所有线程共享同一个模型实例
+    get_transcriber(transcriber_type=os.getenv("TRANSCRIBER_TYPE", "fast-whisper"))
+
+    concurrency = os.getenv("CELERY_WORKER_CONCURRENCY", "2")
+    logger.info(f"启动笔记 worker，并发数：{concurrency}")
+    celery_app.worker_main([
+        "worker",
+        "--loglevel=INFO",
+        "--pool=threads",
+        f"--concurrency={concurrency}",
+        "-Q", celery_app.conf.task_default_queue,
+    ])
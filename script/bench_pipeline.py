@@ -0,0 +1,59 @@
+"""
+对比顺序执行与流水线模式的吞吐量（使用 sleep 模拟各阶段耗时，不依赖真实下载/转写/大模型）
+
+用法（在 backend 目录下执行）:
+    python ../script/bench_pipeline.py --jobs 20 --download 0.2 --transcribe 0.4 --summarize 0.3
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app.core.stage_pipeline import StagePipeline  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--download", type=float, default=0.2, help="下载阶段耗时（秒）")
+    parser.add_argument("--transcribe", type=float, default=0.4, help="转写阶段耗时（秒）")
+    parser.add_argument("--summarize", type=float, default=0.3, help="总结阶段耗时（秒）")
+    parser.add_argument("--download-workers", type=int, default=2)
+    parser.add_argument("--transcribe-workers", type=int, default=1)
+    parser.add_argument("--summarize-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    stages = [
+        ("download", lambda job: time.sleep(args.download), args.download_workers),
+        ("transcribe", lambda job: time.sleep(args.transcribe), args.transcribe_workers),
+        ("summarize", lambda job: time.sleep(args.summarize), args.summarize_workers),
+    ]
+
+    # 顺序执行：一个任务跑完所有阶段后才开始下一个
+    start = time.perf_counter()
+    for job in range(args.jobs):
+        for _, fn, _ in stages:
+            fn(job)
+    sequential = time.perf_counter() - start
+
+    # 流水线：各阶段独立线程池，任务跨阶段重叠
+    pipeline = StagePipeline(stages)
+    start = time.perf_counter()
+    for job in range(args.jobs):
+        pipeline.submit(job)
+    pipeline.join()
+    pipelined = time.perf_counter() - start
+    pipeline.shutdown()
+
+    print(f"任务数: {args.jobs}")
+    print(f"顺序执行: {sequential:.2f}s  吞吐 {args.jobs / sequential:.2f} 任务/秒")
+    print(f"流水线:   {pipelined:.2f}s  吞吐 {args.jobs / pipelined:.2f} 任务/秒")
+    print(f"提升:     {sequential / pipelined:.2f}x")
+    for name, s in pipeline.stats()["stages"].items():
+        print(f"  {name}: workers={s['workers']} processed={s['processed']} busy={s['busy_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+fast-whisper 顺序推理与批量推理（BatchedInferencePipeline）的实时率对比（CPU int8）
+实时率 = 转写耗时 / 音频时长，越小越快；每种模式先预热一次再计时
+
+用法（在 backend 目录下执行）:
+    python ../script/bench_whisper_batched.py --audio data/sample.mp3 --model-size base --batch-sizes 4,8,16 --cpu-threads 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app.transcriber.whisper import WhisperTranscriber  # noqa: E402
+from app.transcriber.whisper_batched import BatchedWhisperTranscriber  # noqa: E402
+
+
+def run(transcriber, audio: str, repeat: int):
+    transcriber.transcript(audio)
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = transcriber.transcript(audio)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--audio", required=True, help="音频文件路径")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--batch-sizes", default="8", help="要对比的批大小，逗号分隔")
+    parser.add_argument("--cpu-threads", type=int, default=4, help="推理使用的 CPU 线程数")
+    parser.add_argument("--repeat", type=int, default=3, help="每种模式计时的次数，取中位数")
+    args = parser.parse_args()
+
+    common = dict(model_size=args.model_size, device="cpu", compute_type="int8", cpu_threads=args.cpu_threads)
+    modes = [("sequential", WhisperTranscriber(chunk_workers=1, **common))]
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        modes.append((f"batched/{batch_size}", BatchedWhisperTranscriber(batch_size=batch_size, **common)))
+
+    print(f"音频: {args.audio}  模型: {args.model_size}  int8  {args.cpu_threads} 线程  CPU 核数: {os.cpu_count()}")
+    baseline = None
+    for name, transcriber in modes:
+        try:
+            elapsed, result = run(transcriber, args.audio, args.repeat)
+        except Exception as e:
+            print(f"{name:<14} 转写失败：{e}")
+            continue
+        duration = result.segments[-1].end if result.segments else 0
+        baseline = baseline or elapsed
+        print(f"{name:<14} {elapsed:8.1f}s  实时率 {elapsed / duration if duration else 0:.3f}  "
+              f"加速 {baseline / elapsed:.2f}x  字幕 {len(result.segments)} 条  字数 {len(result.full_text)}")
+
+
+if __name__ == "__main__":
+    main()
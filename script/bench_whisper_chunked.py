@@ -0,0 +1,52 @@
+"""
+长音频分段并行转写的耗时对比：同一音频分别以不同分段并发数转写，输出耗时与相对单段顺序转写的加速比
+（需要 faster-whisper 与本地模型，建议使用 30 分钟以上的音频）
+
+用法（在 backend 目录下执行）:
+    python ../script/bench_whisper_chunked.py --audio data/lecture.mp3 --model-size base --workers 1,2,4,8 --cpu-threads 2
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import app.transcriber.whisper as whisper_module  # noqa: E402
+from app.transcriber.whisper import WhisperTranscriber  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--audio", required=True, help="音频文件路径")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--workers", default="1,2,4", help="要对比的分段并发数，逗号分隔；1 表示不切分的顺序转写")
+    parser.add_argument("--cpu-threads", type=int, default=2, help="每个推理使用的 CPU 线程数")
+    parser.add_argument("--chunk-seconds", type=float, default=600, help="分段目标时长（秒）")
+    args = parser.parse_args()
+
+    # 基准测试中任意时长的音频都按分段处理
+    whisper_module.WHISPER_LONG_AUDIO_SECONDS = 1
+    whisper_module.WHISPER_CHUNK_SECONDS = args.chunk_seconds
+
+    baseline = None
+    print(f"音频: {args.audio}  模型: {args.model_size}  每个推理 {args.cpu_threads} 线程  CPU 核数: {os.cpu_count()}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        transcriber = WhisperTranscriber(model_size=args.model_size, device="cpu",
+                                         cpu_threads=args.cpu_threads, chunk_workers=workers)
+        start = time.perf_counter()
+        try:
+            result = transcriber.transcript(args.audio)
+        except Exception as e:
+            print(f"并发 {workers}: 转写失败：{e}")
+            continue
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = elapsed
+        duration = result.segments[-1].end if result.segments else 0
+        print(f"并发 {workers:>2}: {elapsed:8.1f}s  实时率 {elapsed / duration if duration else 0:.3f}  "
+              f"加速 {baseline / elapsed:.2f}x  分段字幕 {len(result.segments)} 条  字数 {len(result.full_text)}")
+
+
+if __name__ == "__main__":
+    main()